@@ -0,0 +1,222 @@
+"""
+Contagens agregadas dos processos ativos, mantidas a cada alteração.
+
+Mantém, sem percorrer os processos a cada consulta:
+
+- quantidade de processos por status, tipo, cliente, terminal e origem;
+- quantidade por data de entrada no porto/recinto, da qual saem as faixas de dias
+  armazenados (STORAGE_DAY_BUCKETS);
+- quantidade por data de vencimento (free time e período de armazenagem), da qual
+  saem os vencimentos dos próximos 7 dias.
+
+As contagens são montadas na primeira consulta da sessão a partir da lista de processos
+e atualizadas pelas notificações de data.py (data.get_process_index): cada processo
+guarda a sua contribuição, que é retirada e recolocada quando ele muda. As faixas de dias e os
+vencimentos dependem da data de hoje e são calculados a partir dos histogramas por
+data (poucas datas distintas), com o resultado guardado até a próxima alteração ou
+a virada do dia.
+
+Os processos arquivados ficam fora (ver archive_store.status_counts).
+
+Uso:
+    import aggregates
+    aggregates.get_counts("status")          # {"Em andamento": 12, ...}
+    aggregates.get_storage_day_buckets()     # {"0-30": 40, "31-60": 7, ...}
+"""
+from datetime import datetime, timedelta
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Campos agregados (dimensão -> campo do processo; 'client' usa client ou importer)
+DIMENSIONS = {
+    "status": "status",
+    "type": "type",
+    "client": "client",
+    "terminal": "terminal",
+    "origin": "origin",
+}
+
+# Datas de vencimento acompanhadas (mesmos campos dos alertas de prazo)
+DEADLINE_FIELDS = ("free_time_expiry", "current_period_expiry")
+
+# Faixas de dias armazenados: (rótulo, mínimo, máximo; None = sem limite)
+STORAGE_DAY_BUCKETS = [
+    ("0-30", 0, 30),
+    ("31-60", 31, 60),
+    ("61-90", 61, 90),
+    ("90+", 91, None),
+]
+
+# Janela dos vencimentos próximos (dias a partir de hoje, inclusive)
+EXPIRING_WINDOW_DAYS = 7
+
+
+def parse_date(value):
+    """Converte uma data DD/MM/YYYY ou YYYY-MM-DD em date (ou None)"""
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value[:10], fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _dimension_value(process, dimension):
+    if dimension == "client":
+        value = process.get("client") or process.get("importer")
+    else:
+        value = process.get(DIMENSIONS[dimension])
+    if value is None or value != value:  # None ou NaN
+        return ""
+    return str(value).strip()
+
+
+def _contribution(process):
+    """Chaves com que um processo contribui para as contagens"""
+    return (
+        tuple(_dimension_value(process, dimension) for dimension in DIMENSIONS),
+        parse_date(process.get("port_entry_date")),
+        tuple(parse_date(process.get(field)) for field in DEADLINE_FIELDS),
+    )
+
+
+def _add(table, key, delta):
+    table[key] = table.get(key, 0) + delta
+    if table[key] <= 0:
+        del table[key]
+
+
+class ProcessAggregates:
+    """Contagens e histogramas por data de um conjunto de processos"""
+
+    def __init__(self, processes=()):
+        self.contributions = {}
+        self.counts = {dimension: {} for dimension in DIMENSIONS}
+        self.entry_dates = {}
+        self.deadlines = {field: {} for field in DEADLINE_FIELDS}
+        self.version = 0
+        # Resultados calculados: chave -> (versão, dia, valor)
+        self._cache = {}
+        for process in processes:
+            self.update(process["id"], process)
+
+    def _apply(self, contribution, delta):
+        values, entry_date, deadlines = contribution
+        for dimension, value in zip(DIMENSIONS, values):
+            _add(self.counts[dimension], value, delta)
+        if entry_date is not None:
+            _add(self.entry_dates, entry_date, delta)
+        for field, deadline in zip(DEADLINE_FIELDS, deadlines):
+            if deadline is not None:
+                _add(self.deadlines[field], deadline, delta)
+
+    def update(self, process_id, process):
+        """Inclui, atualiza ou (process None) retira um processo das contagens"""
+        old = self.contributions.pop(process_id, None)
+        new = _contribution(process) if process is not None else None
+        if new is not None:
+            self.contributions[process_id] = new
+        if old == new:
+            return
+        if old is not None:
+            self._apply(old, -1)
+        if new is not None:
+            self._apply(new, 1)
+        self.version += 1
+
+    def cached(self, key, compute):
+        """Resultado guardado até a próxima alteração ou a virada do dia"""
+        today = datetime.now().date()
+        cached = self._cache.get(key)
+        if cached and cached[0] == self.version and cached[1] == today:
+            return cached[2]
+        value = compute(today)
+        self._cache[key] = (self.version, today, value)
+        return value
+
+
+def _get_aggregates(processes=None):
+    """Contagens dos processos ativos da sessão (ver data.get_process_index)"""
+    from data import get_process_index
+
+    return get_process_index("aggregates", ProcessAggregates, ProcessAggregates.update, processes)
+
+
+def get_total(processes=None):
+    """Quantidade de processos ativos"""
+    from data import index_lock
+
+    with index_lock():
+        return len(_get_aggregates(processes).contributions)
+
+
+def get_counts(dimension, processes=None):
+    """
+    Quantidade de processos ativos por valor de uma dimensão.
+
+    Args:
+        dimension: 'status', 'type', 'client', 'terminal' ou 'origin'
+        processes: Lista de processos (padrão: st.session_state.data["processes"])
+
+    Returns:
+        dict: Valor -> quantidade (valor vazio = campo não preenchido)
+    """
+    from data import index_lock
+
+    with index_lock():
+        return dict(_get_aggregates(processes).counts[dimension])
+
+
+def get_options(dimension, processes=None):
+    """Valores preenchidos de uma dimensão, em ordem alfabética (ex: opções de filtro)"""
+    from data import index_lock
+
+    with index_lock():
+        aggregates = _get_aggregates(processes)
+        return list(aggregates.cached(("options", dimension),
+                                      lambda today: sorted(v for v in aggregates.counts[dimension] if v)))
+
+
+def get_storage_day_buckets(processes=None):
+    """Quantidade de processos ativos em cada faixa de dias armazenados (STORAGE_DAY_BUCKETS)"""
+    from data import index_lock
+
+    with index_lock():
+        aggregates = _get_aggregates(processes)
+
+        def compute(today):
+            buckets = {label: 0 for label, _, _ in STORAGE_DAY_BUCKETS}
+            for entry_date, n in aggregates.entry_dates.items():
+                days = max(0, (today - entry_date).days)
+                for label, low, high in STORAGE_DAY_BUCKETS:
+                    if days >= low and (high is None or days <= high):
+                        buckets[label] += n
+                        break
+            return buckets
+
+        return dict(aggregates.cached("storage_days", compute))
+
+
+def get_expiring(processes=None, days=EXPIRING_WINDOW_DAYS):
+    """
+    Quantidade de vencimentos entre hoje e os próximos dias, por campo de prazo.
+
+    Returns:
+        dict: Campo (free_time_expiry, current_period_expiry) -> quantidade
+    """
+    from data import index_lock
+
+    with index_lock():
+        aggregates = _get_aggregates(processes)
+
+        def compute(today):
+            end = today + timedelta(days=days - 1)
+            return {field: sum(n for deadline, n in histogram.items() if today <= deadline <= end)
+                    for field, histogram in aggregates.deadlines.items()}
+
+        return dict(aggregates.cached(("expiring", days), compute))
@@ -0,0 +1,391 @@
+"""
+Alertas automáticos para os clientes.
+
+As regras são avaliadas a partir das alterações notificadas por data.py (mudança de
+status, de prazos, renovação automática do período, novos eventos), sem percorrer
+todos os processos periodicamente. Os vencimentos de free time e de período são
+mantidos em uma fila de prioridade ordenada pela data do alerta: a verificação diária
+retira apenas os vencimentos que chegaram, e a fila é atualizada a cada alteração.
+
+Os alertas de cada cliente são acumulados em alerts_pending.json e enviados em um
+único email (resumo) pela caixa de saída de notifications.py.
+
+Uso (uma vez por execução do app):
+    import alerts
+    alerts.install()
+    alerts.run_scheduled(st.session_state.data)
+"""
+import os
+import json
+import time
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Arquivo com os alertas ainda não enviados e o estado do agendamento
+ALERTS_FILE = "alerts_pending.json"
+
+# Antecedência (em dias) dos alertas de vencimento
+DEADLINE_LEAD_DAYS = 3
+
+# Intervalo mínimo entre dois envios de resumo
+DIGEST_INTERVAL_SECONDS = 60 * 60
+
+# Campos de prazo acompanhados e o nome exibido ao cliente
+DEADLINE_FIELDS = {
+    "free_time_expiry": "Vencimento do Free Time",
+    "current_period_expiry": "Vencimento do período de armazenagem",
+}
+
+# Eventos internos que não devem gerar alerta para o cliente
+HIDDEN_EVENT_PREFIXES = ("processo atribuído ao cliente", "processo removido do cliente",
+                         "processo criado", "período atualizado automaticamente")
+
+_lock = threading.RLock()
+_installed = False
+
+# Fila de vencimentos: (data do alerta, id do processo, campo, valor do prazo)
+_deadline_heap = []
+_deadline_heap_built = False
+
+# Cópia em memória do agendamento, para não ler o arquivo a cada execução
+_last_deadline_check = None
+_last_digest = None
+
+# Alertas de um lote de alterações ainda não gravados: (processo, alertas)
+_batch_alerts = []
+
+
+def _parse_date(value):
+    """Converte uma data DD/MM/YYYY em date (ou None)"""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value.strip(), "%d/%m/%Y").date()
+    except ValueError:
+        return None
+
+
+def load_state():
+    """Carrega os alertas pendentes e o estado do agendamento"""
+    if os.path.exists(ALERTS_FILE):
+        try:
+            with open(ALERTS_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Erro ao carregar alertas pendentes: {e}")
+    return {"pending": {}, "last_digest": 0, "last_deadline_check": None}
+
+
+def save_state(state):
+    """Grava os alertas pendentes de forma atômica"""
+    tmp_file = f"{ALERTS_FILE}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_file, ALERTS_FILE)
+
+
+# ---------------------------------------------------------------------------
+# Regras: cada regra recebe a alteração e retorna uma lista de alertas
+# ---------------------------------------------------------------------------
+
+def rule_status_changed(change):
+    """Alerta quando o status do processo muda"""
+    before, after = change.get("before"), change.get("after")
+    if change["action"] != "update" or not before or not after:
+        return []
+    # Renomear ou mesclar status (status_migration) não é uma mudança no andamento do processo
+    if change.get("source") == "status_migration":
+        return []
+    if before.get("status") == after.get("status") or not after.get("status"):
+        return []
+    return [{
+        "kind": "status",
+        "message": f"Status alterado de '{before.get('status') or '-'}' para '{after['status']}'",
+    }]
+
+
+def rule_deadline_changed(change):
+    """Alerta quando um prazo é alterado manualmente"""
+    before, after = change.get("before"), change.get("after")
+    if change["action"] != "update" or not before or not after:
+        return []
+    alerts = []
+    for field, label in DEADLINE_FIELDS.items():
+        old_value, new_value = before.get(field, ""), after.get(field, "")
+        if old_value != new_value and new_value:
+            alerts.append({
+                "kind": f"deadline:{field}",
+                "message": f"{label} alterado para {new_value}",
+            })
+    return alerts
+
+
+def rule_period_rollover(change):
+    """Alerta quando o período de armazenagem é renovado automaticamente"""
+    after = change.get("after")
+    if change["action"] != "period_rollover" or not after:
+        return []
+    return [{
+        "kind": "rollover",
+        "message": (f"Novo período de armazenagem iniciado em {after.get('current_period_start', '')}, "
+                    f"com vencimento em {after.get('current_period_expiry', '')}"),
+    }]
+
+
+def rule_event_added(change):
+    """Alerta quando um evento visível ao cliente é registrado"""
+    event = change.get("event")
+    if change["action"] != "add_event" or not event:
+        return []
+    description = event.get("description") or ""
+    if description.lower().startswith(HIDDEN_EVENT_PREFIXES):
+        return []
+    return [{"kind": "event", "message": f"Novo evento: {description}"}]
+
+
+RULES = [rule_status_changed, rule_deadline_changed, rule_period_rollover, rule_event_added]
+
+
+# ---------------------------------------------------------------------------
+# Fila de vencimentos
+# ---------------------------------------------------------------------------
+
+def _push_deadlines(process, fields=None):
+    """Adiciona à fila os vencimentos atuais de um processo"""
+    if process.get("archived"):
+        return
+    for field in fields or DEADLINE_FIELDS:
+        deadline = _parse_date(process.get(field, ""))
+        if deadline:
+            alert_date = deadline - timedelta(days=DEADLINE_LEAD_DAYS)
+            heapq.heappush(_deadline_heap, (alert_date.isoformat(), process["id"], field, process[field]))
+
+
+def _build_deadline_heap(data):
+    """Monta a fila de vencimentos a partir dos dados (uma única vez por processo)"""
+    global _deadline_heap, _deadline_heap_built
+    _deadline_heap = []
+    for process in data.get("processes", []):
+        _push_deadlines(process)
+    _deadline_heap_built = True
+
+
+def check_deadlines(data, today=None):
+    """
+    Gera os alertas de vencimento cuja data de aviso já chegou.
+
+    Apenas os itens vencidos são retirados da fila; itens desatualizados (prazo
+    alterado ou processo arquivado/excluído) são descartados ao serem retirados.
+
+    Args:
+        data: Dados da aplicação (st.session_state.data)
+        today: Data de referência (padrão: hoje)
+
+    Returns:
+        int: Quantidade de alertas gerados
+    """
+    global _last_deadline_check
+    today = today or datetime.now().date()
+
+    if _last_deadline_check == today.isoformat():
+        return 0
+
+    with _lock:
+        state = load_state()
+        last_check = state.get("last_deadline_check")
+        if last_check == today.isoformat():
+            _last_deadline_check = last_check
+            return 0
+
+        if not _deadline_heap_built:
+            _build_deadline_heap(data)
+
+        processes_by_id = None
+        generated = 0
+        while _deadline_heap and _deadline_heap[0][0] <= today.isoformat():
+            alert_date, process_id, field, value = heapq.heappop(_deadline_heap)
+
+            # Avisos já enviados em uma verificação anterior (ex: após reiniciar o app)
+            if last_check and alert_date <= last_check:
+                continue
+
+            if processes_by_id is None:
+                processes_by_id = {p["id"]: p for p in data.get("processes", [])}
+            process = processes_by_id.get(process_id)
+            if not process or process.get("archived") or process.get(field) != value:
+                continue
+
+            deadline = _parse_date(value)
+            days_left = (deadline - today).days
+            if days_left > 0:
+                message = f"{DEADLINE_FIELDS[field]} em {value} ({days_left} dias)"
+            elif days_left == 0:
+                message = f"{DEADLINE_FIELDS[field]} hoje ({value})"
+            else:
+                message = f"{DEADLINE_FIELDS[field]} vencido em {value}"
+
+            if _queue_alerts(state, process, [{"kind": f"due:{field}", "message": message}]):
+                generated += 1
+
+        state["last_deadline_check"] = today.isoformat()
+        save_state(state)
+        _last_deadline_check = state["last_deadline_check"]
+
+    return generated
+
+
+# ---------------------------------------------------------------------------
+# Alertas pendentes e resumos
+# ---------------------------------------------------------------------------
+
+def _get_client(process_id):
+    """Obtém o cliente (com email válido) responsável pelo processo"""
+    from components.auth import get_client_for_process
+
+    client = get_client_for_process(process_id)
+    if client and "@" in (client.get("email") or ""):
+        return client
+    return None
+
+
+def _queue_alerts(state, process, alerts):
+    """Acumula alertas no resumo pendente do cliente do processo"""
+    client = _get_client(process["id"])
+    if not client:
+        return False
+
+    entry = state["pending"].setdefault(client["id"], {
+        "email": client["email"],
+        "name": client.get("name", ""),
+        "alerts": [],
+    })
+    entry["email"] = client["email"]
+
+    # Um alerta do mesmo tipo substitui o anterior ainda não enviado
+    kinds = {alert["kind"] for alert in alerts}
+    entry["alerts"] = [a for a in entry["alerts"]
+                       if not (a["process_id"] == process["id"] and a["kind"] in kinds)]
+    for alert in alerts:
+        entry["alerts"].append({
+            "process_id": process["id"],
+            "ref": process.get("ref", ""),
+            "kind": alert["kind"],
+            "message": alert["message"],
+            "created": datetime.now().isoformat(),
+        })
+    return True
+
+
+def handle_change(change):
+    """Avalia as regras para uma alteração de processo (registrada em data.py)"""
+    with _lock:
+        # Manter a fila de vencimentos atualizada (apenas os prazos que mudaram)
+        before, after = change.get("before"), change.get("after")
+        if _deadline_heap_built and after and change["action"] in (
+                "add", "update", "period_rollover", "unarchive"):
+            if before and change["action"] != "unarchive":
+                changed = [f for f in DEADLINE_FIELDS if before.get(f) != after.get(f)]
+            else:
+                changed = list(DEADLINE_FIELDS)
+            if changed:
+                _push_deadlines(after, changed)
+
+        alerts = []
+        for rule in RULES:
+            alerts.extend(rule(change))
+        if alerts:
+            _batch_alerts.append((change.get("after") or change.get("before"), alerts))
+
+        # Alterações em lote (data.apply_process_changes): gravar apenas na última
+        if _batch_alerts and change.get("batch_last", True):
+            state = load_state()
+            queued = [process["id"] for process, alerts in _batch_alerts
+                      if _queue_alerts(state, process, alerts)]
+            _batch_alerts.clear()
+            if queued:
+                save_state(state)
+                logger.debug("Alertas acumulados", extra={"fields": {"process_ids": queued}})
+
+
+def _format_digest(entry):
+    """Monta o texto do email de resumo de um cliente"""
+    lines = [f"Prezado(a) {entry.get('name') or 'Cliente'},", "",
+             "Houve atualizações nos seus processos de importação:", ""]
+
+    by_process = {}
+    refs = {}
+    for alert in entry["alerts"]:
+        by_process.setdefault(alert["process_id"], []).append(alert["message"])
+        refs[alert["process_id"]] = refs.get(alert["process_id"]) or alert["ref"]
+
+    for process_id, messages in by_process.items():
+        ref = refs[process_id]
+        title = f"Processo {process_id}" + (f" (Ref. {ref})" if ref else "")
+        lines.append(title)
+        lines.extend(f"  - {message}" for message in messages)
+        lines.append("")
+
+    lines.extend(["Atenciosamente,", "Equipe de Importação"])
+    return "\n".join(lines)
+
+
+def flush_digests():
+    """
+    Envia um email de resumo por cliente com os alertas acumulados.
+
+    Returns:
+        int: Quantidade de emails colocados na fila de envio
+    """
+    global _last_digest
+    from notifications import enqueue_many
+
+    with _lock:
+        state = load_state()
+        items = [{
+            "channel": "email",
+            "to": entry["email"],
+            "subject": "Atualizações dos seus processos de importação",
+            "body": _format_digest(entry),
+        } for entry in state["pending"].values() if entry["alerts"]]
+
+        if items:
+            enqueue_many(items)
+        state["pending"] = {}
+        state["last_digest"] = time.time()
+        save_state(state)
+        _last_digest = state["last_digest"]
+
+    logger.debug("Resumos de alertas enviados", extra={"fields": {"emails": len(items)}})
+    return len(items)
+
+
+def run_scheduled(data):
+    """
+    Executa as tarefas periódicas quando estiverem vencidas: a verificação diária
+    de vencimentos e o envio dos resumos. Custo desprezível nas demais chamadas.
+    """
+    global _last_digest
+    try:
+        check_deadlines(data)
+        if _last_digest is None:
+            _last_digest = load_state().get("last_digest", 0)
+        if time.time() - _last_digest >= DIGEST_INTERVAL_SECONDS:
+            flush_digests()
+    except Exception as e:
+        logger.error(f"Erro ao processar alertas: {e}")
+
+
+def install():
+    """Registra o processamento de alertas nas alterações de processo (uma vez por processo)"""
+    global _installed
+    if _installed:
+        return
+    from data import register_change_listener
+
+    register_change_listener(handle_change)
+    _installed = True
@@ -20,20 +20,11 @@ except ImportError as e:
     print(f"Conteúdo do diretório atual: {os.listdir('.')}")
     raise
 
-# Agora importamos os componentes
-from components.home import display_home
-from components.add_edit import display_add_edit_form
-from components.view_details import display_detail_view
-from components.client_view import display_client_view
-from components.share import display_share_interface, validate_share_token
-from components.settings import display_settings
-from components.auth import display_login, display_user_management, init_auth_state, logout
-from components.archived import display_archived_processes
-from components.data_sync import display_data_sync
-from components.backup import display_backup_page
+# Agora importamos apenas o necessário para qualquer página.
+# Os módulos de cada página (e seus exportadores, Sheets, Excel, email/SMS)
+# são importados sob demanda, quando a página é exibida pela primeira vez.
+from components.auth import init_auth_state
 from data import load_data, save_data
-from assets.stock_photos import get_random_image
-import sheets_to_html
 
 # Page configuration
 st.set_page_config(
@@ -54,6 +45,16 @@ def load_css():
 # Carregar os estilos CSS
 load_css()
 
+# Registrar os alertas automáticos antes de carregar os dados, para que as
+# renovações de período feitas no carregamento também gerem alertas
+import alerts
+alerts.install()
+import sheets_sync
+sheets_sync.install()
+# Retomar o envio das notificações que ficaram pendentes na caixa de saída
+import notifications
+notifications.install()
+
 # Initialize session state
 if 'data' not in st.session_state:
     st.session_state.data = load_data()
@@ -74,13 +75,20 @@ if 'filter_value' not in st.session_state:
 # Inicializa o estado de autenticação
 init_auth_state()
 
+# Verificação diária de vencimentos e envio dos resumos de alertas (quando vencidos)
+alerts.run_scheduled(st.session_state.data)
+
 # Check URL parameters for client view mode
 query_params = st.query_params
 if "token" in query_params:
+    from components.share import validate_share_token
+    
     token = query_params["token"]
     process_id = validate_share_token(token)
     
     if process_id:
+        from components.client_view import display_client_view
+        
         # Display client view for this process
         st.image("assets/images/jgr_logo.png", width=150)
         st.title("JGR BROKER - Sistema de Acompanhamento de Importação")
@@ -105,6 +113,7 @@ def navigate_to(page, process_id=None):
 
 # Verificar autenticação para acessar o sistema
 if not st.session_state.authenticated:
+    from components.auth import display_login
     display_login()
     st.stop()
 
@@ -127,12 +136,13 @@ with col3:
     role_display = "Administrador" if st.session_state.user_role == "admin" else "Cliente"
     st.caption(f"Perfil: {role_display}")
     if st.button("🚪 Sair", use_container_width=True):
+        from components.auth import logout
         logout()
         st.rerun()
 
 # Navigation bar - Mostra todos os botões para administradores
 if st.session_state.user_role == "admin":
-    nav_col1, nav_col2, nav_col3, nav_col4, nav_col5, nav_col6, nav_col7, nav_col8, nav_col9 = st.columns(9)
+    nav_col1, nav_col2, nav_col3, nav_col4, nav_col5, nav_col6, nav_col7, nav_col8, nav_col9, nav_col10, nav_col11 = st.columns(11)
     with nav_col1:
         if st.button("📋 Painel", use_container_width=True):
             navigate_to("home")
@@ -161,9 +171,15 @@ if st.session_state.user_role == "admin":
     with nav_col9:
         if st.button("👥 Usuários", use_container_width=True):
             navigate_to("users")
+    with nav_col10:
+        if st.button("🩺 Diagnóstico", use_container_width=True):
+            navigate_to("diagnostics")
+    with nav_col11:
+        if st.button("📈 Indicadores", use_container_width=True):
+            navigate_to("dashboard")
 elif st.session_state.user_role == "manager":
-    # Para gestores, mostrar painel, adicionar, backup e sincronização
-    nav_col1, nav_col2, nav_col3, nav_col4 = st.columns(4)
+    # Para gestores, mostrar painel, adicionar, backup, sincronização e indicadores
+    nav_col1, nav_col2, nav_col3, nav_col4, nav_col5 = st.columns(5)
     with nav_col1:
         if st.button("📋 Painel", use_container_width=True):
             navigate_to("home")
@@ -177,6 +193,9 @@ elif st.session_state.user_role == "manager":
     with nav_col4:
         if st.button("🔄 Sincronizar Dados", use_container_width=True):
             navigate_to("data_sync")
+    with nav_col5:
+        if st.button("📈 Indicadores", use_container_width=True):
+            navigate_to("dashboard")
 else:
     # Para clientes, apenas mostrar o botão de painel
     if st.button("📋 Painel", use_container_width=True):
@@ -186,6 +205,7 @@ st.divider()
 
 # Display the current page
 if st.session_state.current_page == "home":
+    from components.home import display_home
     # Cliente só vê seus processos
     if st.session_state.user_role == 'client':
         display_home(navigate_to, filter_ids=st.session_state.client_processes)
@@ -194,6 +214,8 @@ if st.session_state.current_page == "home":
 elif st.session_state.current_page == "add_edit":
     # Somente admin pode adicionar/editar
     if st.session_state.user_role == 'admin':
+        from components.add_edit import display_add_edit_form
+        
         # Recarregar a lista de status do arquivo de configuração antes de exibir o formulário
         from components.settings import load_status_config
         status_config = load_status_config()
@@ -211,10 +233,12 @@ elif st.session_state.current_page == "view_details":
         st.error("Você não tem permissão para visualizar este processo.")
         navigate_to("home")
     else:
+        from components.view_details import display_detail_view
         display_detail_view(navigate_to)
 elif st.session_state.current_page == "share":
     # Somente admin pode compartilhar
     if st.session_state.user_role == 'admin':
+        from components.share import display_share_interface
         display_share_interface()
     else:
         st.error("Você não tem permissão para acessar esta página.")
@@ -222,6 +246,8 @@ elif st.session_state.current_page == "share":
 elif st.session_state.current_page == "reports":
     # Somente admin pode acessar relatórios
     if st.session_state.user_role == 'admin':
+        import sheets_to_html
+        
         st.header("Importação de Planilha")
         
         tab1, tab2 = st.tabs(["Converter Planilha", "Baixar Modelo"])
@@ -237,6 +263,7 @@ elif st.session_state.current_page == "reports":
 elif st.session_state.current_page == "settings":
     # Somente admin pode acessar configurações
     if st.session_state.user_role == 'admin':
+        from components.settings import display_settings
         display_settings()
     else:
         st.error("Você não tem permissão para acessar esta página.")
@@ -244,6 +271,7 @@ elif st.session_state.current_page == "settings":
 elif st.session_state.current_page == "users":
     # Somente admin pode gerenciar usuários
     if st.session_state.user_role == 'admin':
+        from components.auth import display_user_management
         display_user_management()
     else:
         st.error("Você não tem permissão para acessar esta página.")
@@ -251,6 +279,7 @@ elif st.session_state.current_page == "users":
 elif st.session_state.current_page == "archived":
     # Somente admin pode ver processos arquivados
     if st.session_state.user_role == 'admin':
+        from components.archived import display_archived_processes
         display_archived_processes(navigate_to)
     else:
         st.error("Você não tem permissão para acessar esta página.")
@@ -258,6 +287,7 @@ elif st.session_state.current_page == "archived":
 elif st.session_state.current_page == "data_sync":
     # Admin e gestores podem sincronizar dados
     if st.session_state.user_role in ['admin', 'manager']:
+        from components.data_sync import display_data_sync
         display_data_sync()
     else:
         st.error("Você não tem permissão para acessar esta página.")
@@ -266,11 +296,30 @@ elif st.session_state.current_page == "data_sync":
 elif st.session_state.current_page == "backup":
     # Admin e gestores podem acessar backup
     if st.session_state.user_role in ['admin', 'manager']:
+        from components.backup import display_backup_page
         display_backup_page()
     else:
         st.error("Você não tem permissão para acessar esta página.")
         navigate_to("home")
 
+elif st.session_state.current_page == "diagnostics":
+    # Somente admin pode ver o diagnóstico de desempenho
+    if st.session_state.user_role == 'admin':
+        from components.diagnostics import display_diagnostics
+        display_diagnostics()
+    else:
+        st.error("Você não tem permissão para acessar esta página.")
+        navigate_to("home")
+
+elif st.session_state.current_page == "dashboard":
+    # Admin e gestores podem ver os indicadores
+    if st.session_state.user_role in ['admin', 'manager']:
+        from components.dashboard import display_dashboard
+        display_dashboard()
+    else:
+        st.error("Você não tem permissão para acessar esta página.")
+        navigate_to("home")
+
 # Footer
 st.divider()
 current_year = datetime.now().year
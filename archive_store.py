@@ -0,0 +1,306 @@
+"""
+Armazenamento separado (frio) dos processos arquivados.
+
+Os processos arquivados saem da lista de processos de data.json e são gravados em
+arquivos comprimidos por ano, conforme o prefixo do ID (20250001 -> 2025):
+
+    archive/2025.json.gz    processos arquivados com ID de 2025
+    archive/outros.json.gz  processos com ID fora do formato AAAA0001
+    archive/manifest.json   IDs e contagem por status de cada arquivo
+
+Assim, load_data, get_processes_df e save_data trabalham apenas com os processos
+ativos. Os arquivos de cada ano são lidos somente quando a página de arquivados, uma
+exportação de arquivados ou a restauração de um processo precisam deles (e mantidos
+em memória enquanto não mudarem). O manifest responde às consultas de IDs e de
+contagens sem abrir os arquivos.
+
+Mover processos entre data.json e o arquivo frio (data.archive_process e
+data.unarchive_process) é feito em duas gravações; a gravação de data.json é o ponto
+de confirmação. Os IDs em movimento ficam em archive/pending.json até o fim e, se o
+processo for interrompido no meio, recover() mantém a versão de data.json e descarta
+a cópia duplicada do arquivo frio.
+
+As funções deste módulo não usam a trava de data.py; quem altera os dois lados
+(data.py, backup_store) deve chamá-las sob data.storage_lock().
+"""
+import os
+import gzip
+import json
+import threading
+
+from profiling import track
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Diretório do armazenamento frio
+ARCHIVE_DIR = "archive"
+
+MANIFEST_FILE = os.path.join(ARCHIVE_DIR, "manifest.json")
+
+# IDs sendo movidos entre data.json e o armazenamento frio
+PENDING_FILE = os.path.join(ARCHIVE_DIR, "pending.json")
+
+# Arquivo dos processos cujo ID não começa com o ano
+OTHER_PARTITION = "outros"
+
+_lock = threading.RLock()
+
+# Arquivo (ano) -> (mtime_ns do arquivo, processos)
+_partitions = {}
+_manifest = None
+
+
+def partition_for(process_id):
+    """Arquivo (ano) de um processo, pelo prefixo do ID"""
+    prefix = str(process_id)[:4]
+    if prefix.isdigit() and 1900 <= int(prefix) <= 2999:
+        return prefix
+    return OTHER_PARTITION
+
+
+def _partition_path(partition):
+    return os.path.join(ARCHIVE_DIR, f"{partition}.json.gz")
+
+
+def _write_atomic(path, content, compress=False):
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    opener = gzip.open if compress else open
+    with opener(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(content, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_manifest():
+    """Índice do armazenamento frio: arquivo (ano) -> {'ids': [...], 'statuses': {status: n}}"""
+    global _manifest
+    with _lock:
+        if _manifest is None:
+            _manifest = {"partitions": {}}
+            if os.path.exists(MANIFEST_FILE):
+                try:
+                    with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+                        _manifest = json.load(f)
+                except Exception as e:
+                    logger.error(f"Erro ao carregar índice dos arquivados: {e}")
+        return _manifest
+
+
+def _read_partition(partition):
+    """Processos arquivados de um ano (lidos do disco apenas se o arquivo mudou)"""
+    path = _partition_path(partition)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return []
+    cached = _partitions.get(partition)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with track("archive_store.read_partition") as span, gzip.open(path, "rt", encoding="utf-8") as f:
+        processes = json.load(f)
+        span.bytes = os.path.getsize(path)
+    _partitions[partition] = (mtime, processes)
+    return processes
+
+
+def _write_partition(partition, processes):
+    """Grava um arquivo do armazenamento frio e atualiza o manifest"""
+    path = _partition_path(partition)
+    manifest = load_manifest()
+    with track("archive_store.write_partition"):
+        if processes:
+            _write_atomic(path, processes, compress=True)
+            _partitions[partition] = (os.stat(path).st_mtime_ns, processes)
+            statuses = {}
+            for process in processes:
+                status = process.get("status") or ""
+                statuses[status] = statuses.get(status, 0) + 1
+            manifest["partitions"][partition] = {
+                "ids": [process["id"] for process in processes],
+                "statuses": statuses,
+            }
+        else:
+            if os.path.exists(path):
+                os.remove(path)
+            _partitions.pop(partition, None)
+            manifest["partitions"].pop(partition, None)
+        _write_atomic(MANIFEST_FILE, manifest)
+
+
+def list_partitions():
+    """Anos (arquivos) com processos arquivados, do mais recente para o mais antigo"""
+    return sorted(load_manifest()["partitions"], reverse=True)
+
+
+def count():
+    """Quantidade de processos arquivados"""
+    return sum(len(entry["ids"]) for entry in load_manifest()["partitions"].values())
+
+
+def archived_ids(partition=None):
+    """IDs dos processos arquivados (de um ano ou de todos)"""
+    partitions = load_manifest()["partitions"]
+    if partition is not None:
+        return set(partitions.get(str(partition), {}).get("ids", []))
+    return {process_id for entry in partitions.values() for process_id in entry["ids"]}
+
+
+def status_counts():
+    """Quantidade de processos arquivados em cada status"""
+    counts = {}
+    for entry in load_manifest()["partitions"].values():
+        for status, n in entry["statuses"].items():
+            counts[status] = counts.get(status, 0) + n
+    return counts
+
+
+def load_archived(partitions=None):
+    """
+    Carrega os processos arquivados.
+
+    Args:
+        partitions: Anos a carregar (padrão: todos)
+
+    Returns:
+        list: Processos arquivados
+    """
+    with _lock:
+        if partitions is None:
+            partitions = list_partitions()
+        processes = []
+        for partition in partitions:
+            processes.extend(_read_partition(str(partition)))
+        return processes
+
+
+def load_partition(partition):
+    """
+    Processos arquivados de um ano.
+
+    A lista devolvida é a mantida em memória (a mesma enquanto o arquivo não mudar) e
+    não deve ser alterada.
+    """
+    with _lock:
+        return _read_partition(str(partition))
+
+
+def get_archived_process(process_id):
+    """Obtém um processo arquivado pelo ID (lê apenas o arquivo do ano dele), ou None"""
+    with _lock:
+        partition = partition_for(process_id)
+        if process_id not in archived_ids(partition):
+            return None
+        for process in _read_partition(partition):
+            if process["id"] == process_id:
+                return process
+    return None
+
+
+def add_processes(processes):
+    """Inclui processos no armazenamento frio (substituindo os de mesmo ID)"""
+    by_partition = {}
+    for process in processes:
+        by_partition.setdefault(partition_for(process["id"]), []).append(process)
+
+    with _lock:
+        for partition, new_processes in by_partition.items():
+            new_ids = {process["id"] for process in new_processes}
+            kept = [p for p in _read_partition(partition) if p["id"] not in new_ids]
+            _write_partition(partition, kept + new_processes)
+
+
+def remove_processes(process_ids):
+    """
+    Remove processos do armazenamento frio.
+
+    Returns:
+        list: Processos removidos
+    """
+    by_partition = {}
+    for process_id in process_ids:
+        by_partition.setdefault(partition_for(process_id), set()).add(process_id)
+
+    removed = []
+    with _lock:
+        for partition, ids in by_partition.items():
+            if not ids & archived_ids(partition):
+                continue
+            kept = []
+            for process in _read_partition(partition):
+                (removed if process["id"] in ids else kept).append(process)
+            _write_partition(partition, kept)
+    return removed
+
+
+def update_processes(update, statuses=None):
+    """
+    Altera processos arquivados, regravando apenas os arquivos que mudaram.
+
+    Args:
+        update: Função que recebe um processo, altera-o e retorna True se houve alteração
+        statuses: Se informado, lê apenas os arquivos com processos nesses status
+
+    Returns:
+        int: Quantidade de processos alterados
+    """
+    changed_total = 0
+    with _lock:
+        for partition, entry in list(load_manifest()["partitions"].items()):
+            if statuses is not None and not set(statuses) & set(entry["statuses"]):
+                continue
+            processes = [dict(process) for process in _read_partition(partition)]
+            changed = sum(1 for process in processes if update(process))
+            if changed:
+                _write_partition(partition, processes)
+                changed_total += changed
+    return changed_total
+
+
+def replace_all(processes):
+    """Substitui todo o armazenamento frio pelos processos informados (ex: restauração de backup)"""
+    with _lock:
+        by_partition = {}
+        for process in processes:
+            by_partition.setdefault(partition_for(process["id"]), []).append(process)
+        for partition in set(list_partitions()) | set(by_partition):
+            _write_partition(partition, by_partition.get(partition, []))
+
+
+def begin_move(process_ids):
+    """Registra os IDs que serão movidos entre data.json e o armazenamento frio"""
+    _write_atomic(PENDING_FILE, sorted(process_ids))
+
+
+def end_move():
+    """Conclui a movimentação registrada em begin_move"""
+    if os.path.exists(PENDING_FILE):
+        os.remove(PENDING_FILE)
+
+
+def has_pending_move():
+    return os.path.exists(PENDING_FILE)
+
+
+def recover(active_ids):
+    """
+    Conclui uma movimentação interrompida.
+
+    data.json é o ponto de confirmação: um processo que está entre os ativos é removido
+    do armazenamento frio; um que não está permanece arquivado.
+
+    Args:
+        active_ids: IDs dos processos em data.json
+    """
+    with _lock:
+        try:
+            with open(PENDING_FILE, "r", encoding="utf-8") as f:
+                pending = json.load(f)
+        except Exception as e:
+            logger.error(f"Erro ao ler movimentação pendente de arquivados: {e}")
+            pending = []
+        duplicated = [process_id for process_id in pending if process_id in active_ids]
+        if duplicated:
+            remove_processes(duplicated)
+        end_move()
+    logger.info("Movimentação de arquivados recuperada", extra={"fields": {"process_ids": pending}})
@@ -0,0 +1,463 @@
+"""
+Backups incrementais dos dados, com deduplicação e compressão.
+
+Cada processo é um objeto comprimido (zlib) identificado pelo hash do seu conteúdo,
+então um processo que não mudou entre dois backups é armazenado uma única vez. O
+restante dos dados (configurações, informações da empresa, next_id...) é gravado da
+mesma forma, como um único objeto.
+
+Cada backup grava apenas a diferença em relação ao anterior:
+
+    packs/<id>.pack        objetos novos do backup, concatenados em um único arquivo
+    snapshots/<id>.json.z  processos alterados/incluídos/removidos em relação ao
+                           backup anterior e a posição dos objetos novos no pack
+    manifest.json          índice dos backups (data, descrição, contagens, tamanho)
+
+A cada KEYFRAME_INTERVAL backups, a lista completa de processos é gravada, para que a
+restauração não precise percorrer uma cadeia longa de diferenças.
+
+A listagem lê apenas o manifest.json. A restauração pode ser feita por ID do backup
+ou por data/hora (o backup mais recente até aquele momento).
+
+Uso:
+    import backup_store
+    backup_store.create_snapshot(data, label="Antes da limpeza")
+    backup_store.restore_snapshot(at=datetime(2025, 5, 20, 18, 0))
+"""
+import os
+import json
+import glob
+import zlib
+import uuid
+import hashlib
+import threading
+from datetime import datetime
+
+import archive_store
+from profiling import track
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Diretório do repositório de backups
+BACKUP_DIR = os.path.join("backups", "store")
+
+# Arquivo de dados restaurado por padrão
+DATA_FILE = "data.json"
+
+# Nível de compressão (1 = mais rápido, 9 = menor)
+COMPRESSION_LEVEL = 6
+
+# A cada quantos backups a lista completa de processos é gravada
+KEYFRAME_INTERVAL = 50
+
+# Descrição dos backups de segurança criados antes de uma restauração
+AUTO_LABEL_PREFIX = "Antes da restauração de"
+
+_lock = threading.RLock()
+
+# Hash -> [ID do pack, posição, tamanho] de todos os objetos gravados (lido na primeira chamada)
+_object_index = None
+
+# IDs dos backups cujos objetos já estão em _object_index
+_indexed_snapshots = set()
+
+# Último backup gravado por este processo: (ID, ordem das chaves, chave -> hash, hash do
+# restante dos dados). Só é usado quando o mesmo ID é reconstruído, então backups
+# gravados por outros processos não o tornam inválido
+_head = None
+
+
+def _path(*parts):
+    return os.path.join(BACKUP_DIR, *parts)
+
+
+def _snapshot_path(snapshot_id):
+    return _path("snapshots", f"{snapshot_id}.json.z")
+
+
+def _write_atomic(path, content):
+    """Grava bytes em um arquivo de forma atômica"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(content)
+    os.replace(tmp_file, path)
+
+
+def _encode(value):
+    """
+    Serialização compacta usada no hash.
+
+    As chaves não são ordenadas (sort_keys dobra o custo): a ordem dos campos de um
+    processo só muda quando ele é editado, e uma ordem diferente apenas grava o
+    processo mais uma vez, sem afetar a restauração.
+    """
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _digest(payload):
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _read_snapshot(snapshot_id):
+    with open(_snapshot_path(snapshot_id), "rb") as f:
+        return json.loads(zlib.decompress(f.read()).decode("utf-8"))
+
+
+def load_manifest():
+    """Carrega o índice dos backups (lista do mais antigo para o mais recente)"""
+    path = _path("manifest.json")
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Erro ao carregar o índice de backups: {e}")
+    return {"snapshots": []}
+
+
+def _save_manifest(manifest):
+    _write_atomic(_path("manifest.json"), json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+def _latest(snapshots):
+    """
+    Backup gravado por último (maior 'seq').
+
+    O índice é ordenado pela data do backup, que pode ser anterior à de gravação
+    (ex: import_legacy_backups), então o último da lista nem sempre é o mais recente.
+    Backups sem 'seq' (gravados antes dele existir) mantêm a ordem do índice.
+    """
+    if not snapshots:
+        return None
+    return max(reversed(snapshots), key=lambda s: s.get("seq", 0))
+
+
+def _is_auto(entry):
+    """
+    Backup de segurança feito automaticamente (antes de uma restauração).
+
+    Backups gravados antes do campo 'auto' existir são reconhecidos pela descrição.
+    """
+    if "auto" in entry:
+        return entry["auto"]
+    label = entry.get("label", "")
+    return label.startswith(AUTO_LABEL_PREFIX) or label.startswith("Importado de data_pre_restauracao_")
+
+
+def _get_object_index(manifest=None):
+    """
+    Índice de todos os objetos, montado a partir dos backups do índice.
+
+    Backups gravados por outro processo (ex: restaurar_backup.py) desde a última
+    chamada são incluídos assim que aparecem no manifest.json.
+    """
+    global _object_index
+    if _object_index is None:
+        _object_index = {}
+        _indexed_snapshots.clear()
+    manifest = manifest or load_manifest()
+    for entry in manifest["snapshots"]:
+        if entry["id"] in _indexed_snapshots:
+            continue
+        for digest, (offset, length) in _read_snapshot(entry["id"]).get("objects", {}).items():
+            _object_index.setdefault(digest, [entry["id"], offset, length])
+        _indexed_snapshots.add(entry["id"])
+    return _object_index
+
+
+def _process_keys(processes):
+    """Chave de cada processo na lista (o ID; repetições recebem um sufixo)"""
+    seen = {}
+    keys = []
+    for process in processes:
+        key = str(process.get("id", ""))
+        count = seen.get(key, 0)
+        seen[key] = count + 1
+        keys.append(key if count == 0 else f"{key}#{count}")
+    return keys
+
+
+def _reconstruct(snapshot_id):
+    """
+    Reconstrói a lista de processos de um backup seguindo as diferenças até o
+    último backup completo.
+
+    Returns:
+        tuple: (ordem das chaves, chave -> hash, hash do restante dos dados)
+    """
+    if _head is not None and _head[0] == snapshot_id:
+        return list(_head[1]), dict(_head[2]), _head[3]
+
+    chain = []
+    current = snapshot_id
+    while current:
+        snapshot = _read_snapshot(current)
+        chain.append(snapshot)
+        if snapshot.get("full"):
+            break
+        current = snapshot.get("parent")
+
+    order, refs = [], {}
+    for snapshot in reversed(chain):
+        if snapshot.get("full"):
+            order, refs = list(snapshot["order"]), dict(snapshot["changed"])
+            continue
+        refs.update(snapshot["changed"])
+        removed = set(snapshot.get("removed", []))
+        for key in removed:
+            refs.pop(key, None)
+        if "order" in snapshot:
+            order = list(snapshot["order"])
+        else:
+            order = [key for key in order if key not in removed] + snapshot.get("appended", [])
+    return order, refs, chain[0]["rest"]
+
+
+def create_snapshot(data, label="", created_at=None, include_archived=True, auto=False):
+    """
+    Cria um backup dos dados, gravando apenas os processos que mudaram.
+
+    Args:
+        data: Dados da aplicação (mesmo formato do data.json)
+        label: Descrição do backup
+        created_at: Data/hora do backup (padrão: agora)
+        include_archived: Se True, inclui os processos do armazenamento frio (archive_store)
+        auto: Se True, marca o backup como cópia de segurança automática (ignorado
+            por find_snapshot() ao procurar o mais recente)
+
+    Returns:
+        dict: Entrada do índice (id, created_at, label, processes, new_processes, bytes_added, auto)
+    """
+    global _head
+    created_at = created_at or datetime.now()
+
+    with _lock, track("backup_store.create_snapshot") as span:
+        manifest = load_manifest()
+        index = _get_object_index(manifest)
+        snapshot_id = f"{created_at.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+        # Objetos novos vão para um único arquivo (pack) deste backup
+        pack = []
+        pack_size = 0
+        new_objects = {}
+
+        def store(payload):
+            nonlocal pack_size
+            digest = _digest(payload)
+            if digest not in index and digest not in new_objects:
+                compressed = zlib.compress(payload, COMPRESSION_LEVEL)
+                new_objects[digest] = [pack_size, len(compressed)]
+                pack.append(compressed)
+                pack_size += len(compressed)
+            return digest
+
+        processes = data.get("processes", [])
+        if include_archived:
+            processes = processes + archive_store.load_archived()
+        order = _process_keys(processes)
+        refs = {key: store(_encode(process)) for key, process in zip(order, processes)}
+        rest_ref = store(_encode({k: v for k, v in data.items() if k != "processes"}))
+
+        # Diferença em relação ao último backup gravado
+        previous = _latest(manifest["snapshots"])
+        since_full = previous.get("since_full", 0) + 1 if previous else 0
+        if previous is None or since_full >= KEYFRAME_INTERVAL:
+            snapshot = {"full": True, "order": order, "changed": refs}
+            since_full = 0
+        else:
+            parent_order, parent_refs, _ = _reconstruct(previous["id"])
+            removed = [key for key in parent_refs if key not in refs]
+            appended = [key for key in order if key not in parent_refs]
+            snapshot = {
+                "parent": previous["id"],
+                "changed": {key: ref for key, ref in refs.items() if parent_refs.get(key) != ref},
+                "removed": removed,
+            }
+            removed_set = set(removed)
+            if [key for key in parent_order if key not in removed_set] + appended == order:
+                snapshot["appended"] = appended
+            else:
+                snapshot["order"] = order
+        snapshot["rest"] = rest_ref
+        snapshot["objects"] = new_objects
+
+        # Pack antes do backup e backup antes do índice: uma interrupção não deixa
+        # o índice apontando para dados incompletos
+        if pack:
+            _write_atomic(_path("packs", f"{snapshot_id}.pack"), b"".join(pack))
+        snapshot_bytes = zlib.compress(_encode(snapshot), COMPRESSION_LEVEL)
+        _write_atomic(_snapshot_path(snapshot_id), snapshot_bytes)
+
+        entry = {
+            "id": snapshot_id,
+            "created_at": created_at.isoformat(timespec="seconds"),
+            "label": label,
+            "processes": len(processes),
+            "new_processes": len(new_objects) - (1 if rest_ref in new_objects else 0),
+            "bytes_added": pack_size + len(snapshot_bytes),
+            "since_full": since_full,
+            "seq": previous.get("seq", 0) + 1 if previous else 1,
+            "auto": auto,
+        }
+        manifest["snapshots"].append(entry)
+        manifest["snapshots"].sort(key=lambda s: s["created_at"])
+        _save_manifest(manifest)
+
+        for digest, (offset, length) in new_objects.items():
+            index[digest] = [snapshot_id, offset, length]
+        _indexed_snapshots.add(snapshot_id)
+        _head = (snapshot_id, order, refs, rest_ref)
+        span.bytes = entry["bytes_added"]
+
+    logger.info("Backup criado", extra={"fields": entry})
+    return entry
+
+
+def list_snapshots():
+    """Lista os backups do mais recente para o mais antigo (apenas o índice é lido)"""
+    return list(reversed(load_manifest()["snapshots"]))
+
+
+def find_snapshot(snapshot_id=None, at=None):
+    """
+    Localiza um backup pelo ID ou pela data/hora.
+
+    Args:
+        snapshot_id: ID do backup
+        at: datetime; retorna o backup mais recente criado até esse momento
+
+    Returns:
+        dict: Entrada do índice, ou None (sem argumentos, retorna o mais recente que
+        não seja uma cópia de segurança automática)
+    """
+    snapshots = load_manifest()["snapshots"]
+    if snapshot_id:
+        return next((s for s in snapshots if s["id"] == snapshot_id), None)
+    if at is not None:
+        limit = at.isoformat(timespec="seconds")
+        candidates = [s for s in snapshots if s["created_at"] <= limit]
+        return candidates[-1] if candidates else None
+    candidates = [s for s in snapshots if not _is_auto(s)]
+    return candidates[-1] if candidates else None
+
+
+def load_snapshot(snapshot_id):
+    """
+    Reconstrói os dados de um backup.
+
+    Returns:
+        dict: Dados no formato do data.json
+    """
+    with _lock:
+        order, refs, rest_ref = _reconstruct(snapshot_id)
+        index = _get_object_index()
+
+    # Ler os objetos agrupados por pack, em ordem de posição (um arquivo aberto por pack)
+    wanted = set(refs.values()) | {rest_ref}
+    by_pack = {}
+    for digest in wanted:
+        pack_id, offset, length = index[digest]
+        by_pack.setdefault(pack_id, []).append((offset, length, digest))
+
+    objects = {}
+    for pack_id, items in by_pack.items():
+        with open(_path("packs", f"{pack_id}.pack"), "rb") as f:
+            for offset, length, digest in sorted(items):
+                f.seek(offset)
+                objects[digest] = f.read(length)
+
+    def decode(digest):
+        return json.loads(zlib.decompress(objects[digest]).decode("utf-8"))
+
+    data = decode(rest_ref)
+    data["processes"] = [decode(refs[key]) for key in order]
+    return data
+
+
+def restore_snapshot(snapshot_id=None, at=None, target=DATA_FILE, backup_current=True):
+    """
+    Restaura um backup no arquivo de dados.
+
+    Antes de sobrescrever, o estado atual é guardado como um novo backup (que custa
+    apenas os processos alterados desde o último). Os processos arquivados do backup
+    substituem o armazenamento frio (archive_store).
+
+    Args:
+        snapshot_id: ID do backup (ou use 'at')
+        at: datetime; restaura o backup mais recente criado até esse momento
+        target: Arquivo de dados a sobrescrever
+        backup_current: Se True, faz backup do arquivo atual antes
+
+    Returns:
+        dict: Entrada do índice restaurada, ou None se não houver backup correspondente
+    """
+    from data import storage_lock
+
+    # data.json e o armazenamento frio são substituídos juntos, sem gravações no meio
+    with storage_lock(), _lock:
+        entry = find_snapshot(snapshot_id=snapshot_id, at=at)
+        if entry is None:
+            return None
+
+        data = load_snapshot(entry["id"])
+
+        if backup_current and os.path.exists(target):
+            with open(target, "r", encoding="utf-8") as f:
+                current = json.load(f)
+            create_snapshot(current, label=f"{AUTO_LABEL_PREFIX} {entry['id']}", auto=True)
+
+        # Os processos arquivados do backup substituem o armazenamento frio
+        if target == DATA_FILE:
+            archive_store.replace_all([p for p in data["processes"] if p.get("archived")])
+            data["processes"] = [p for p in data["processes"] if not p.get("archived")]
+
+        _write_atomic(target, json.dumps(data, indent=4).encode("utf-8"))
+
+    logger.info("Backup restaurado", extra={"fields": {"snapshot_id": entry["id"], "target": target}})
+    return entry
+
+
+def get_store_size():
+    """Tamanho total do repositório de backups em bytes"""
+    total = 0
+    for root, _, files in os.walk(BACKUP_DIR):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def import_legacy_backups(patterns=("data_backup_*.json", "data_pre_restauracao_*.json",
+                                    os.path.join("backups", "data_backup_antes_limpeza_*.json"))):
+    """
+    Importa os backups antigos (cópias completas em JSON) para o repositório.
+
+    Cada arquivo vira um backup com a data de modificação do arquivo. Os arquivos
+    originais não são removidos.
+
+    Returns:
+        int: Quantidade de arquivos importados
+    """
+    imported_labels = {s["label"] for s in load_manifest()["snapshots"]}
+    files = sorted({path for pattern in patterns for path in glob.glob(pattern)},
+                   key=os.path.getmtime)
+
+    imported = 0
+    for path in files:
+        label = f"Importado de {os.path.basename(path)}"
+        if label in imported_labels:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Erro ao importar o backup {path}: {e}")
+            continue
+        # As cópias feitas antes das restaurações antigas também são de segurança
+        create_snapshot(data, label=label, created_at=datetime.fromtimestamp(os.path.getmtime(path)),
+                        include_archived=False,
+                        auto=os.path.basename(path).startswith("data_pre_restauracao_"))
+        imported += 1
+    return imported
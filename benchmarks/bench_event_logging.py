@@ -0,0 +1,170 @@
+"""
+Benchmark: renderização do histórico de eventos com o logging desligado vs. os prints antigos.
+
+Renderiza um processo com 500 eventos chamando a própria
+components.event_log.display_event_log (todos os eventos na mesma página), com as
+chamadas de exibição do Streamlit substituídas por operações vazias, em três cenários:
+
+- "anterior": a função atual com o print() por evento que existia antes
+  (print(f"Evento {i}: ID = '{event_id}'")), recolocado logo após o cálculo do ID
+- "atual": a função como está, no nível de log padrão (JGR_LOG_LEVEL ou WARNING)
+- "atual (DEBUG)": a função como está, com a depuração ativa (um registro por renderização)
+
+A saída dos cenários é gravada em um arquivo temporário, simulando o stdout/stderr
+do container.
+
+Uso:
+    python benchmarks/bench_event_logging.py [--events 500] [--repeat 50]
+"""
+import os
+import re
+import sys
+import time
+import uuid
+import inspect
+import argparse
+import tempfile
+import textwrap
+
+# Permitir importar os módulos da aplicação a partir da raiz do repositório
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from log_config import configure_logging
+from components import event_log
+
+
+class _Bloco:
+    """Contexto vazio (st.container, colunas)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _SessionState(dict):
+    """st.session_state com acesso por atributo"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+def _nada(*args, **kwargs):
+    return None
+
+
+class StreamlitFalso:
+    """Substitui as chamadas de exibição do Streamlit por operações vazias"""
+
+    def __init__(self, session_state):
+        self.session_state = session_state
+
+    def columns(self, spec):
+        n = spec if isinstance(spec, int) else len(spec)
+        return [_Bloco() for _ in range(n)]
+
+    def container(self):
+        return _Bloco()
+
+    def button(self, *args, **kwargs):
+        return False
+
+    def text_area(self, label, value="", **kwargs):
+        return value
+
+    def __getattr__(self, name):
+        # subheader, markdown, caption, info, divider, success, error...
+        return _nada
+
+
+def montar_processo(num_eventos):
+    """Cria um processo de teste com num_eventos eventos"""
+    return {
+        "id": "BENCH0001",
+        "revision": 1,
+        "events": [
+            {
+                "id": str(uuid.uuid4()),
+                "date": f"{(i % 28) + 1:02d}/01/2025",
+                "description": f"Evento de teste {i}",
+                "user": "Benchmark"
+            }
+            for i in range(num_eventos)
+        ],
+    }
+
+
+def montar_renderizacao_anterior():
+    """display_event_log com o print() por evento do código anterior recolocado"""
+    source = textwrap.dedent(inspect.getsource(event_log.display_event_log))
+    pattern = re.compile(r"^(\s*)(event_id = event\.get\('id'\).*)$", re.MULTILINE)
+    if not pattern.search(source):
+        raise RuntimeError("Linha do ID do evento não encontrada em display_event_log")
+    source = pattern.sub(lambda m: f"{m.group(1)}{m.group(2)}\n{m.group(1)}print(f\"Evento {{i}}: ID = '{{event_id}}'\")",
+                         source, count=1)
+    namespace = dict(vars(event_log))
+    exec(compile(source, event_log.__file__, "exec"), namespace)
+    return namespace["display_event_log"]
+
+
+def medir(funcao, processo, repeticoes):
+    """Tempo médio de uma renderização do histórico (segundos)"""
+    funcao(processo)  # aquecimento (modelo de exibição em cache, como nas renderizações seguintes)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(processo)
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    processo = montar_processo(args.events)
+    session_state = _SessionState(user_role="admin")
+    # Todos os eventos na mesma página, como antes da paginação
+    session_state[f"event_log_limit_{processo['id']}"] = args.events
+    event_log.st = StreamlitFalso(session_state)
+    renderizar_anterior = montar_renderizacao_anterior()
+
+    saida = open(os.path.join(tempfile.mkdtemp(prefix="jgr_bench_"), "saida.log"), "w", encoding="utf-8")
+    stdout_original = sys.stdout
+
+    # Código anterior: um print() por evento renderizado
+    configure_logging(stream=saida)
+    sys.stdout = saida
+    try:
+        tempo_anterior = medir(renderizar_anterior, processo, args.repeat)
+    finally:
+        sys.stdout = stdout_original
+
+    # Código atual no nível de log padrão
+    tempo_atual = medir(event_log.display_event_log, processo, args.repeat)
+
+    # Código atual com a depuração ativa
+    configure_logging(level="DEBUG", stream=saida)
+    tempo_debug = medir(event_log.display_event_log, processo, args.repeat)
+
+    saida.close()
+
+    print(f"Eventos no histórico: {args.events}")
+    print(f"Renderização anterior (print por evento): {tempo_anterior * 1000:.3f} ms")
+    print(f"Renderização atual (log padrão):          {tempo_atual * 1000:.3f} ms")
+    print(f"Renderização atual (nível DEBUG):         {tempo_debug * 1000:.3f} ms")
+    if tempo_atual > 0:
+        print(f"Redução em relação ao anterior: {tempo_anterior / tempo_atual:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
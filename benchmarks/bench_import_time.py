@@ -0,0 +1,107 @@
+"""
+Benchmark: tempo de importação dos módulos usados na primeira renderização.
+
+Executa `python -X importtime` em um processo novo para cada cenário e soma o
+tempo cumulativo das importações de primeiro nível. O cenário principal é a
+visualização de cliente aberta por um link de compartilhamento (?token=...),
+que deve carregar apenas o necessário para exibir um processo.
+
+Uso:
+    python benchmarks/bench_import_time.py [--target-ms 1500] [--top 15]
+
+Retorna código de saída 1 se a visualização de cliente ultrapassar a meta.
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Meta de tempo de importação para a primeira renderização da visualização de cliente
+TOKEN_VIEW_TARGET_MS = 1500
+
+# Módulos importados pelo app.py ao abrir um link de compartilhamento
+TOKEN_VIEW_MODULES = [
+    "components.auth",
+    "data",
+    "alerts",
+    "sheets_sync",
+    "notifications",
+    "components.share",
+    "components.client_view",
+]
+
+# Todos os módulos de página (equivalente às importações antecipadas anteriores)
+ALL_PAGE_MODULES = TOKEN_VIEW_MODULES + [
+    "components.home",
+    "components.add_edit",
+    "components.view_details",
+    "components.settings",
+    "components.archived",
+    "components.diagnostics",
+    "html_generator",
+    "html_export_pagination",
+    "sheets_to_html",
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def medir_importacao(modulos):
+    """
+    Importa os módulos em um processo novo com -X importtime.
+
+    Returns:
+        tuple: (tempo total em ms, lista de (tempo cumulativo em ms, módulo) de primeiro nível)
+    """
+    codigo = "; ".join(f"import {m}" for m in modulos)
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+
+    primeiro_nivel = []
+    for linha in resultado.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(linha)
+        if not match:
+            continue
+        cumulativo_us = int(match.group(2))
+        indentacao = len(match.group(3))
+        # Importações de primeiro nível têm apenas um espaço de indentação
+        if indentacao == 1:
+            primeiro_nivel.append((cumulativo_us / 1000, match.group(4)))
+
+    total_ms = sum(tempo for tempo, _ in primeiro_nivel)
+    return total_ms, sorted(primeiro_nivel, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=TOKEN_VIEW_TARGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    total_token, detalhes_token = medir_importacao(TOKEN_VIEW_MODULES)
+    total_todos, _ = medir_importacao(ALL_PAGE_MODULES)
+
+    print(f"Visualização de cliente (token): {total_token:.0f} ms (meta: {args.target_ms:.0f} ms)")
+    print(f"Todas as páginas (importação antecipada): {total_todos:.0f} ms")
+    print()
+    print(f"Maiores importações da visualização de cliente:")
+    for tempo, modulo in detalhes_token[:args.top]:
+        print(f"  {tempo:8.1f} ms  {modulo}")
+
+    if total_token > args.target_ms:
+        print()
+        print("Meta de tempo de importação NÃO atingida")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,253 @@
 """
 Módulo para gerenciamento de clientes no sistema JGR Broker
+
+O diretório de clientes reúne três fontes:
+
+- as contas de cliente de users.json (via índice de atribuições de components.auth);
+- os campos explícitos dos processos ativos ('client' e 'importer');
+- os nomes encontrados pela recuperação opcional (backfill_from_events), que procura
+  nomes de clientes nas descrições dos eventos e grava o resultado em CLIENT_DIRECTORY_FILE.
+
+O índice dos nomes dos processos é montado na primeira consulta da sessão e mantido
+atualizado pelas notificações de data.py (data.get_process_index), de modo que as
+consultas não percorrem os processos nem os eventos.
 """
-from data import load_data
+import os
+import json
+import threading
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Nomes encontrados pela recuperação a partir dos eventos (backfill_from_events)
+CLIENT_DIRECTORY_FILE = "client_directory.json"
+
+# Campos dos processos que identificam o cliente
+CLIENT_FIELDS = ("client", "importer")
+
+# Clientes conhecidos que só aparecem nas descrições de eventos antigos
+KNOWN_CLIENTS = ["121", "Skills Química"]
+
+_lock = threading.RLock()
+
+# Nomes das contas de cliente e a versão de users.json a partir da qual foram lidos
+_account_names = None
+_accounts_signature = None
+
+_backfilled = None
+
+
+def _client_names(process):
+    """Nomes de cliente informados nos campos explícitos de um processo"""
+    names = set()
+    for field in CLIENT_FIELDS:
+        value = process.get(field)
+        if value and isinstance(value, str) and value.strip():
+            names.add(value.strip())
+    return names
+
+
+def _get_processes():
+    """Processos da sessão atual ou, fora do app, lidos de data.json (sem renovações de período)"""
+    try:
+        import streamlit as st
+        if "data" in st.session_state:
+            return st.session_state.data.get("processes", [])
+    except Exception:
+        pass
+    if os.path.exists("data.json"):
+        with open("data.json", "r") as f:
+            return json.load(f).get("processes", [])
+    return []
 
-def get_all_clients():
+
+def _load_backfilled():
+    global _backfilled
+    if _backfilled is None:
+        _backfilled = set()
+        if os.path.exists(CLIENT_DIRECTORY_FILE):
+            try:
+                with open(CLIENT_DIRECTORY_FILE, "r", encoding="utf-8") as f:
+                    _backfilled = set(json.load(f).get("backfilled", []))
+            except Exception as e:
+                logger.error(f"Erro ao carregar diretório de clientes: {e}")
+    return _backfilled
+
+
+def _refresh_accounts():
+    """Relê os nomes das contas de cliente apenas quando users.json mudou"""
+    global _account_names, _accounts_signature
+    from components.auth import get_assignment_index
+
+    index = get_assignment_index()
+    if _account_names is None or index["signature"] != _accounts_signature:
+        _account_names = {user["name"].strip() for user in index["clients"].values()
+                          if isinstance(user.get("name"), str) and user["name"].strip()}
+        _accounts_signature = index["signature"]
+
+
+class ClientIndex:
+    """Nome do cliente -> IDs dos processos (campos explícitos) de um conjunto de processos"""
+
+    def __init__(self, processes=()):
+        self.by_name = {}
+        self._names = {}
+        # Lista ordenada do diretório: (versão das contas e dos recuperados, nomes)
+        self.sorted_names = None
+        for process in processes:
+            self.update(process["id"], process)
+
+    def update(self, process_id, process):
+        """Inclui, atualiza ou (process None) retira um processo do índice"""
+        old = self._names.pop(process_id, set())
+        new = _client_names(process) if process is not None else set()
+        if new:
+            self._names[process_id] = new
+        if old == new:
+            return
+        for name in old - new:
+            ids = self.by_name.get(name)
+            if ids is not None:
+                ids.discard(process_id)
+                if not ids:
+                    del self.by_name[name]
+                    self.sorted_names = None
+        for name in new - old:
+            if name not in self.by_name:
+                self.sorted_names = None
+            self.by_name.setdefault(name, set()).add(process_id)
+
+
+def _get_index(processes=None):
+    """Índice dos nomes dos processos ativos (um por sessão, ver data.get_process_index)"""
+    from data import get_process_index
+
+    if processes is None:
+        processes = _get_processes()
+    return get_process_index("clients", ClientIndex, ClientIndex.update, processes)
+
+
+def get_all_clients(processes=None):
     """
-    Obtém todos os clientes do sistema a partir dos dados existentes.
-    
+    Obtém todos os clientes do sistema a partir do diretório de clientes.
+
+    Args:
+        processes: Lista de processos (padrão: dados da sessão ou data.json)
+
     Returns:
         list: Lista de nomes de clientes ordenados alfabeticamente
     """
-    data = load_data()
+    from data import index_lock
+
+    with _lock, index_lock():
+        index = _get_index(processes)
+        _refresh_accounts()
+        backfilled = _load_backfilled()
+        # Os recuperados só crescem: a quantidade identifica a versão
+        version = (_accounts_signature, len(backfilled))
+        if index.sorted_names is None or index.sorted_names[0] != version:
+            index.sorted_names = (version, sorted(set(index.by_name) | _account_names | backfilled))
+        return list(index.sorted_names[1])
+
+
+def has_client(name, processes=None):
+    """Verifica se o nome está no diretório de clientes"""
+    from data import index_lock
+
+    with _lock, index_lock():
+        name = name.strip()
+        _refresh_accounts()
+        return name in _get_index(processes).by_name or name in _account_names or name in _load_backfilled()
+
+
+def get_client_processes(name, processes=None):
+    """
+    Obtém os IDs dos processos cujo campo 'client' ou 'importer' é o cliente informado.
+
+    Returns:
+        set: IDs dos processos (vazio se não houver)
+    """
+    from data import index_lock
+
+    with index_lock():
+        return set(_get_index(processes).by_name.get(name.strip(), ()))
+
+
+def _scrape_event_clients(process):
+    """Nomes de cliente mencionados nas descrições dos eventos de um processo (heurística antiga)"""
     clients = set()
-    
-    # Buscar em eventos
-    for process in data.get('processes', []):
-        for event in process.get('events', []):
-            description = event.get('description', '')
-            # Procurar menção a "cliente" na descrição do evento
-            if 'cliente' in description.lower():
-                try:
-                    # Verificar se é um evento de atribuição
-                    if 'atribuído ao cliente' in description:
-                        client_name = description.split('atribuído ao cliente')[1].strip()
-                        if client_name:
-                            clients.add(client_name)
-                    # Outros tipos de eventos mencionando cliente
-                    else:
-                        # Extrair possíveis nomes de cliente
-                        parts = description.lower().split('cliente')
-                        if len(parts) > 1:
-                            client_text = parts[1].strip()
-                            # Pegar a primeira palavra após "cliente"
-                            if ' ' in client_text:
-                                possible_client = client_text.split(' ')[0].strip()
-                            else:
-                                possible_client = client_text
-                            
-                            if possible_client and len(possible_client) > 2:
-                                clients.add(possible_client.capitalize())
-                except Exception:
-                    # Ignorar erros na extração
-                    pass
-    
-    # Buscar em campos específicos
-    for process in data.get('processes', []):
-        # Campo client explícito
-        if 'client' in process and process['client'] and isinstance(process['client'], str):
-            clients.add(process['client'].strip())
-        
-        # Campo importer (comum em processos de importação)
-        if 'importer' in process and process['importer'] and isinstance(process['importer'], str):
-            clients.add(process['importer'].strip())
-    
+    for event in process.get('events', []):
+        description = event.get('description', '')
+        # Procurar menção a "cliente" na descrição do evento
+        if 'cliente' not in description.lower():
+            continue
+        try:
+            # Verificar se é um evento de atribuição
+            if 'atribuído ao cliente' in description:
+                client_name = description.split('atribuído ao cliente')[1].strip()
+                if client_name:
+                    clients.add(client_name)
+            # Outros tipos de eventos mencionando cliente
+            else:
+                # Extrair possíveis nomes de cliente
+                parts = description.lower().split('cliente')
+                client_text = parts[1].strip()
+                # Pegar a primeira palavra após "cliente"
+                possible_client = client_text.split(' ')[0].strip()
+                if possible_client and len(possible_client) > 2:
+                    clients.add(possible_client.capitalize())
+        except Exception:
+            # Ignorar erros na extração
+            pass
+    return clients
+
+
+def backfill_from_events(data=None):
+    """
+    Recuperação opcional (executada uma vez): procura nomes de clientes nas descrições
+    dos eventos (de processos ativos e arquivados) e na lista 'clients' dos dados
+    antigos e grava os nomes no diretório.
+
+    Args:
+        data: Dados do sistema (padrão: data.json, lido sem renovações de período)
+
+    Returns:
+        int: Quantidade de nomes novos incluídos no diretório
+    """
+    global _backfilled
+    if data is None:
+        with open("data.json", "r") as f:
+            data = json.load(f)
+
+    import archive_store
+
+    found = set(KNOWN_CLIENTS)
+    for process in data.get('processes', []) + archive_store.load_archived():
+        found |= _scrape_event_clients(process)
+
     # Também verificar campo clients se existir
-    if 'clients' in data:
-        for client in data.get('clients', []):
-            if isinstance(client, str) and client.strip():
-                clients.add(client.strip())
-            elif isinstance(client, dict) and 'name' in client and client['name'].strip():
-                clients.add(client['name'].strip())
-    
-    # Adicionar manualmente clientes que sabemos que existem
-    known_clients = ["121", "Skills Química"]
-    for client in known_clients:
-        clients.add(client)
-    
-    return sorted(list(clients))
\ No newline at end of file
+    for client in data.get('clients', []):
+        if isinstance(client, str) and client.strip():
+            found.add(client.strip())
+        elif isinstance(client, dict) and isinstance(client.get('name'), str) and client['name'].strip():
+            found.add(client['name'].strip())
+
+    with _lock:
+        backfilled = _load_backfilled()
+        added = found - backfilled
+        if not added:
+            return 0
+        backfilled = backfilled | added
+        tmp_file = f"{CLIENT_DIRECTORY_FILE}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"backfilled": sorted(backfilled)}, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_file, CLIENT_DIRECTORY_FILE)
+        _backfilled = backfilled
+
+    logger.info("Clientes recuperados dos eventos", extra={"fields": {"added": len(added)}})
+    return len(added)
+
+
+if __name__ == "__main__":
+    print(f"{backfill_from_events()} clientes incluídos no diretório a partir dos eventos.")
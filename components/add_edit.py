@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from data import get_process_by_id, add_process, update_process, add_event
-from components.auth import get_users, assign_processes_to_client
+from components.auth import get_users, assign_process_to_client
 
 def display_add_edit_form(navigate_function):
     """Display form for adding or editing a process"""
@@ -441,6 +441,13 @@ def display_add_edit_form(navigate_function):
             # Se não for admin, não pode atribuir cliente
             assigned_client = None
         
+        # Novo processo com container ou B/L de outro processo é recusado, salvo se permitido
+        # (D.I., NF e PO repetidos geram apenas um aviso)
+        allow_duplicates = False
+        if not st.session_state.edit_mode:
+            allow_duplicates = st.checkbox("Permitir identificadores já cadastrados em outro processo",
+                                           help="Container e B/L")
+        
         # Submit buttons
         col1, col2 = st.columns(2)
         
@@ -638,38 +645,25 @@ def display_add_edit_form(navigate_function):
                             client = next((c for c in users if c['id'] == assigned_client), None)
                             
                             if client:
-                                # Atualizar a lista de processos do cliente
-                                processes = client.get('processes', [])
-                                if process_data["id"] not in processes:
-                                    processes.append(process_data["id"])
-                                    success, _ = assign_processes_to_client(assigned_client, processes)
-                                    
-                                    if success:
-                                        # Adicionar evento ao processo
-                                        add_event(process_data["id"], f"Processo atribuído ao cliente {client['name']}")
-                                        st.success(f"Processo atualizado com sucesso e atribuído a {client['name']}!")
-                                    else:
-                                        st.success("Processo atualizado com sucesso, mas não foi possível atribuir ao cliente.")
+                                # Atribuir ao novo cliente (removendo do cliente anterior)
+                                success, _ = assign_process_to_client(process_data["id"], assigned_client)
+                                
+                                if success:
+                                    # Adicionar evento ao processo
+                                    add_event(process_data["id"], f"Processo atribuído ao cliente {client['name']}")
+                                    st.success(f"Processo atualizado com sucesso e atribuído a {client['name']}!")
                                 else:
-                                    st.success("Processo atualizado com sucesso!")
+                                    st.success("Processo atualizado com sucesso, mas não foi possível atribuir ao cliente.")
                             else:
                                 st.success("Processo atualizado com sucesso!")
                         else:
                             st.success("Processo atualizado com sucesso!")
                     else:
-                        # Se nenhum cliente foi selecionado, remover o processo dos clientes que possam tê-lo
-                        from components.auth import load_users, save_users
-                        users_data = load_users()
-                        
-                        # Verificar se algum cliente tem este processo
-                        process_removed = False
-                        for user in users_data.get('users', []):
-                            if user['role'] == 'client' and 'processes' in user and process_data["id"] in user['processes']:
-                                user['processes'].remove(process_data["id"])
-                                process_removed = True
+                        # Se nenhum cliente foi selecionado, remover o processo do cliente que possa tê-lo
+                        from components.auth import get_client_id_for_process
                         
-                        if process_removed:
-                            save_users(users_data)
+                        if get_client_id_for_process(process_data["id"]) is not None:
+                            assign_process_to_client(process_data["id"], None)
                             add_event(process_data["id"], "Processo removido de cliente")
                             st.success("Processo atualizado com sucesso e desassociado de cliente!")
                         else:
@@ -683,7 +677,10 @@ def display_add_edit_form(navigate_function):
                 st.error("Erro ao atualizar processo!")
         else:
             # Add a new process
-            if add_process(process_data):
+            success, message = add_process(process_data, allow_duplicates=allow_duplicates)
+            if success:
+                if message:
+                    st.warning(message)
                 new_process_id = process_data["id"] if process_data.get("id") else None
                 
                 # Se foi especificado um cliente e se for administrador
@@ -693,20 +690,15 @@ def display_add_edit_form(navigate_function):
                     client = next((c for c in users if c['id'] == assigned_client), None)
                     
                     if client:
-                        # Atualizar a lista de processos do cliente
-                        processes = client.get('processes', [])
-                        if new_process_id not in processes:
-                            processes.append(new_process_id)
-                            success, _ = assign_processes_to_client(assigned_client, processes)
-                            
-                            if success:
-                                # Adicionar evento ao processo
-                                add_event(new_process_id, f"Processo atribuído ao cliente {client['name']}")
-                                st.success(f"Processo adicionado com sucesso e atribuído a {client['name']}!")
-                            else:
-                                st.warning(f"Processo adicionado, mas não foi possível atribuir ao cliente.")
+                        # Atribuir o novo processo ao cliente
+                        success, _ = assign_process_to_client(new_process_id, assigned_client)
+                        
+                        if success:
+                            # Adicionar evento ao processo
+                            add_event(new_process_id, f"Processo atribuído ao cliente {client['name']}")
+                            st.success(f"Processo adicionado com sucesso e atribuído a {client['name']}!")
                         else:
-                            st.success(f"Processo adicionado com sucesso! (Já atribuído a {client['name']})")
+                            st.warning(f"Processo adicionado, mas não foi possível atribuir ao cliente.")
                     else:
                         st.success("Processo adicionado com sucesso!")
                 else:
@@ -714,7 +706,7 @@ def display_add_edit_form(navigate_function):
                 
                 navigate_function("home")
             else:
-                st.error("Erro ao adicionar processo!")
+                st.error(message or "Erro ao adicionar processo!")
     
     if cancel_button:
         st.session_state.edit_mode = False
@@ -2,8 +2,10 @@ import streamlit as st
 import pandas as pd
 import os
 from data import get_processes_df, unarchive_process
-from utils import export_to_excel, export_to_csv, get_status_color
-from html_generator import generate_processes_table_html, get_download_link
+from utils import export_to_excel, export_to_csv, lazy_download_button
+from status_registry import get_registry
+import archive_store
+import deadline_index
 
 def display_archived_processes(navigate_function, filter_ids=None):
     """Display the archived processes table
@@ -14,8 +16,21 @@ def display_archived_processes(navigate_function, filter_ids=None):
     """
     st.header("Processos Arquivados")
     
+    # Os arquivados ficam no armazenamento frio, separados por ano: apenas os anos escolhidos são lidos
+    years = archive_store.list_partitions()
+    if not years:
+        st.info("Não há processos arquivados.")
+        return
+    selected_year = st.selectbox(
+        "Ano do processo",
+        options=["Todos"] + years,
+        format_func=lambda year: "Outros" if year == archive_store.OTHER_PARTITION else year,
+        key="archived_year_filter"
+    )
+    archive_years = None if selected_year == "Todos" else [selected_year]
+    
     # Get processes data with archived=True
-    df = get_processes_df(include_archived=True)
+    df = get_processes_df(include_archived=True, archive_years=archive_years)
     
     if df.empty:
         st.info("Não há processos arquivados.")
@@ -26,18 +41,16 @@ def display_archived_processes(navigate_function, filter_ids=None):
                      "Novo Processo", "Chegada do navio alterada", "Desembaraçado", 
                      "Documento entregue", "BL enviado"]
     
-    # Se temos dados carregados, adicionar outros status que possam existir
-    if not df.empty and 'status' in df.columns:
-        # Extrair status únicos dos dados e adicionar à lista de opções
-        for status in df['status'].unique():
-            if status and status not in status_options:
-                status_options.append(status)
+    # Adicionar os demais status existentes (contagens do índice do armazenamento frio)
+    for status in archive_store.status_counts():
+        if status and status not in status_options:
+            status_options.append(status)
                 
     # Ordenar alfabeticamente para facilitar a localização
     status_options.sort()
     
     # Search and filter section
-    col1, col2, col3 = st.columns([3, 2, 2])
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
     
     with col1:
         search_term = st.text_input("Buscar processo arquivado", key="archived_search")
@@ -58,6 +71,16 @@ def display_archived_processes(navigate_function, filter_ids=None):
             key="archived_status_filter"
         )
     
+    with col4:
+        date_range = st.date_input("Período", value=[], help="Processos com prazo dentro do intervalo",
+                                   key="archived_date_range")
+        deadline_field = st.selectbox(
+            "Prazo",
+            options=["Todos os prazos"] + list(deadline_index.DEADLINE_FIELDS),
+            format_func=lambda field: deadline_index.DEADLINE_FIELDS.get(field, field),
+            key="archived_deadline_field"
+        )
+    
     # Export buttons
     export_option = None
     if st.session_state.user_role == 'admin':
@@ -77,6 +100,13 @@ def display_archived_processes(navigate_function, filter_ids=None):
     if status_filter != "Todos" and not df.empty and 'status' in df.columns:
         df = df[df['status'] == status_filter]
     
+    # Filtrar pelo período (índice dos prazos de cada ano arquivado)
+    if isinstance(date_range, (list, tuple)) and len(date_range) == 2 and not df.empty:
+        fields = None if deadline_field == "Todos os prazos" else [deadline_field]
+        period_ids = deadline_index.ids_in_range(date_range[0], date_range[1], fields=fields,
+                                                 archived=True, partitions=archive_years)
+        df = df[df['id'].isin(period_ids)]
+    
     # Filtrar por termo de busca
     if search_term and not df.empty:
         search_result = pd.DataFrame()
@@ -106,14 +136,10 @@ def display_archived_processes(navigate_function, filter_ids=None):
         st.write("Clique em um processo para restaurá-lo:")
     
     # Mostrar a tabela com processos
-    def color_status(val):
-        color = get_status_color(val)
-        return f'background-color: {color}; border-radius: 50px; padding: 0.3rem 0.9rem; text-align: center; font-weight: 500; color: white; width: 90%; margin: auto; box-shadow: 0 1px 3px rgba(0,0,0,0.12), 0 1px 2px rgba(0,0,0,0.24);'
-    
-    # Apply the style only to the status column
+    # Apply the style only to the status column (um único mapeamento status -> estilo)
     if 'status' in df.columns:
-        styled_df = df.style.applymap(
-            color_status, 
+        styled_df = df.style.apply(
+            get_registry().style_column, 
             subset=['status']
         )
     else:
@@ -153,27 +179,27 @@ def display_archived_processes(navigate_function, filter_ids=None):
     # Handle exports - similar ao componente home.py
     if st.session_state.user_role == 'admin' and export_option != "Escolha um formato...":
         if export_option == "Excel":
-            excel_data = export_to_excel(df)
-            st.download_button(
-                label="Baixar Excel",
-                data=excel_data,
+            lazy_download_button(
+                label="Gerar Excel",
+                build_data=lambda: export_to_excel(df),
                 file_name="processos_arquivados.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                key="download_excel_archived"
+                key="excel_archived"
             )
         elif export_option == "CSV":
-            csv_data = export_to_csv(df)
-            st.download_button(
-                label="Baixar CSV",
-                data=csv_data,
+            lazy_download_button(
+                label="Gerar CSV",
+                build_data=lambda: export_to_csv(df),
                 file_name="processos_arquivados.csv",
                 mime="text/csv",
-                key="download_csv_archived"
+                key="csv_archived"
             )
         elif export_option == "HTML (interativo)":
             # Gerar HTML interativo
             include_details = st.checkbox("Incluir detalhes completos", value=True, key="include_details_archived")
             if st.button("Gerar HTML", key="generate_html_archived"):
+                from html_generator import generate_processes_table_html, get_download_link
+                
                 filepath, rel_path = generate_processes_table_html(
                     filtered_df=df, 
                     include_details=include_details,
@@ -190,4 +216,5 @@ def display_archived_processes(navigate_function, filter_ids=None):
                 st.markdown(download_html, unsafe_allow_html=True)
     
     # Rodapé informativo
-    st.caption("Os processos arquivados não aparecem na lista principal de processos ativos.")
\ No newline at end of file
+    st.caption(f"Os processos arquivados não aparecem na lista principal de processos ativos. "
+               f"Total de arquivados: {archive_store.count()}.")
\ No newline at end of file
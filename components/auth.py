@@ -4,10 +4,24 @@ import os
 import hashlib
 from datetime import datetime, timedelta
 import uuid
+from log_config import get_logger
+
+logger = get_logger(__name__)
 
 # Caminho para o arquivo de usuários
 USERS_FILE = 'users.json'
 
+# Índice de atribuições (cliente -> processos, processo -> cliente), gravado ao lado
+# de data.json e sempre atualizado junto com o arquivo de usuários
+ASSIGNMENTS_FILE = 'assignments.json'
+
+# Cópia em memória do índice de atribuições
+_assignment_index = None
+
+# Usuários por ID e a versão do arquivo de usuários de que foram lidos (apenas em memória)
+_users_by_id = None
+_users_by_id_signature = None
+
 def init_auth_state():
     """Inicializa o estado de autenticação na sessão"""
     if 'authenticated' not in st.session_state:
@@ -53,9 +67,132 @@ def load_users():
         return json.load(f)
 
 def save_users(users_data):
-    """Salvar usuários no arquivo"""
-    with open(USERS_FILE, 'w') as f:
+    """Salvar usuários no arquivo (e atualizar o índice de atribuições)"""
+    tmp_file = f"{USERS_FILE}.tmp"
+    with open(tmp_file, 'w') as f:
         json.dump(users_data, f, indent=4)
+    os.replace(tmp_file, USERS_FILE)
+    
+    _save_assignment_index(_build_assignment_index(users_data))
+
+def _users_signature():
+    """Identifica a versão atual do arquivo de usuários (mtime e tamanho)"""
+    try:
+        stat = os.stat(USERS_FILE)
+        return [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        return None
+
+def _build_assignment_index(users_data):
+    """
+    Monta o índice de atribuições a partir dos usuários.
+    
+    Returns:
+        dict: 'by_client' (ID do cliente -> set de IDs de processos),
+              'by_process' (ID do processo -> ID do cliente) e
+              'clients' (ID do cliente -> {'id', 'name'}; os demais dados, como email
+              e senha, ficam apenas em users.json)
+    """
+    by_client = {}
+    by_process = {}
+    clients = {}
+    
+    for user in users_data.get('users', []):
+        if user.get('role') != 'client':
+            continue
+        clients[user['id']] = {"id": user['id'], "name": user.get('name', '')}
+        process_ids = set(user.get('processes', []))
+        by_client[user['id']] = process_ids
+        for process_id in process_ids:
+            # Em dados antigos um processo pode estar em mais de um cliente: vale o primeiro
+            by_process.setdefault(process_id, user['id'])
+    
+    return {
+        "signature": _users_signature(),
+        "by_client": by_client,
+        "by_process": by_process,
+        "clients": clients
+    }
+
+def _save_assignment_index(index):
+    """Grava o índice de atribuições em disco e o mantém em memória"""
+    global _assignment_index
+    
+    _assignment_index = index
+    try:
+        tmp_file = f"{ASSIGNMENTS_FILE}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                "signature": index["signature"],
+                "by_client": {cid: sorted(pids) for cid, pids in index["by_client"].items()},
+                "by_process": index["by_process"],
+                "clients": index["clients"]
+            }, f, indent=4)
+        os.replace(tmp_file, ASSIGNMENTS_FILE)
+    except Exception as e:
+        logger.error(f"Erro ao salvar índice de atribuições: {e}")
+
+def _load_assignment_index():
+    """Carrega o índice gravado, se ele corresponder à versão atual do arquivo de usuários"""
+    if not os.path.exists(ASSIGNMENTS_FILE):
+        return None
+    try:
+        with open(ASSIGNMENTS_FILE, 'r') as f:
+            stored = json.load(f)
+        if stored.get("signature") != _users_signature():
+            return None
+        # Índices antigos guardavam o cadastro completo dos clientes (com a senha): regravar
+        if any(set(client) - {"id", "name"} for client in stored.get("clients", {}).values()):
+            return None
+        stored["by_client"] = {cid: set(pids) for cid, pids in stored["by_client"].items()}
+        return stored
+    except Exception:
+        return None
+
+def get_assignment_index():
+    """
+    Obter o índice de atribuições, reconstruindo-o apenas se o arquivo de
+    usuários tiver sido alterado fora de save_users.
+    """
+    global _assignment_index
+    
+    signature = _users_signature()
+    if _assignment_index is not None and _assignment_index["signature"] == signature:
+        return _assignment_index
+    
+    index = _load_assignment_index()
+    if index is not None:
+        _assignment_index = index
+        return index
+    
+    _save_assignment_index(_build_assignment_index(load_users()))
+    return _assignment_index
+
+def _get_user(user_id):
+    """Obter o usuário pelo ID, relendo users.json apenas quando o arquivo mudou"""
+    global _users_by_id, _users_by_id_signature
+    
+    signature = _users_signature()
+    if _users_by_id is None or _users_by_id_signature != signature:
+        _users_by_id = {user['id']: user for user in load_users().get('users', [])}
+        _users_by_id_signature = signature
+    return _users_by_id.get(user_id)
+
+def get_client_process_ids(client_id):
+    """Obter o conjunto de IDs de processos atribuídos a um cliente"""
+    return get_assignment_index()["by_client"].get(client_id, set())
+
+def get_client_id_for_process(process_id):
+    """Obter o ID do cliente associado a um processo (ou None)"""
+    return get_assignment_index()["by_process"].get(process_id)
+
+def _release_processes(users_data, process_ids, keep_user_id):
+    """Remover os processos de todos os clientes exceto keep_user_id (um cliente por processo)"""
+    process_ids = set(process_ids)
+    for user in users_data.get('users', []):
+        if user['id'] != keep_user_id and user.get('role') == 'client' and user.get('processes'):
+            if process_ids.intersection(user['processes']):
+                user['processes'] = [p for p in user['processes'] if p not in process_ids]
 
 def authenticate(username, password):
     """Autenticar usuário"""
@@ -111,6 +248,7 @@ def add_user(name, email, password, role='client', processes=None, logo_path=Non
     # Adicionar processos se for cliente
     if role == 'client' and processes:
         new_user['processes'] = processes
+        _release_processes(users_data, processes, user_id)
         
     # Adicionar logo se for cliente
     if logo_path:
@@ -138,6 +276,7 @@ def update_user(user_id, name=None, email=None, password=None, role=None, proces
                 users_data['users'][i]['role'] = role
             if processes is not None:  # Permitir lista vazia
                 users_data['users'][i]['processes'] = processes
+                _release_processes(users_data, processes, user_id)
             if logo_path is not None:
                 users_data['users'][i]['logo_path'] = logo_path
             
@@ -175,6 +314,7 @@ def assign_processes_to_client(user_id, process_ids):
     for i, user in enumerate(users_data.get('users', [])):
         if user['id'] == user_id and user['role'] == 'client':
             users_data['users'][i]['processes'] = process_ids
+            _release_processes(users_data, process_ids, user_id)
             save_users(users_data)
             
             # Atualizar a sessão se for o usuário atual
@@ -185,15 +325,53 @@ def assign_processes_to_client(user_id, process_ids):
     
     return False, "Usuário não encontrado ou não é cliente"
 
-def get_client_for_process(process_id):
-    """Obter cliente associado a um processo"""
+def assign_process_to_client(process_id, client_id):
+    """
+    Atribuir um único processo a um cliente, removendo-o do cliente anterior.
+    
+    Args:
+        process_id: ID do processo
+        client_id: ID do cliente, ou None para remover a atribuição
+        
+    Returns:
+        tuple: (sucesso, mensagem)
+    """
     users_data = load_users()
     
-    for user in users_data.get('users', []):
-        if user['role'] == 'client' and 'processes' in user and process_id in user['processes']:
-            return user
+    client = None
+    if client_id is not None:
+        client = next((u for u in users_data.get('users', [])
+                       if u['id'] == client_id and u['role'] == 'client'), None)
+        if client is None:
+            return False, "Usuário não encontrado ou não é cliente"
+    
+    _release_processes(users_data, [process_id], client_id)
+    if client is not None:
+        client.setdefault('processes', [])
+        if process_id not in client['processes']:
+            client['processes'].append(process_id)
+    save_users(users_data)
+    
+    # Atualizar a sessão se for o usuário atual
+    if client is not None and st.session_state.get('user_id') == client_id:
+        st.session_state.client_processes = client['processes']
+    
+    return True, "Processo atribuído com sucesso" if client else "Atribuição removida com sucesso"
+
+def get_client_for_process(process_id):
+    """Obter cliente associado a um processo"""
+    index = get_assignment_index()
+    client_id = index["by_process"].get(process_id)
+    if client_id is None:
+        return None
     
-    return None
+    # Os dados do cliente vêm de users.json; devolver uma cópia, sem a senha
+    user = _get_user(client_id)
+    if user is None:
+        return None
+    client = {key: value for key, value in user.items() if key != 'password'}
+    client['processes'] = list(client.get('processes', []))
+    return client
 
 def display_login():
     """Exibir página de login"""
@@ -0,0 +1,103 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime, time
+import backup_store
+from data import load_data
+
+def _format_size(size):
+    """Formata um tamanho em bytes (ex: 1.2 MB)"""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def _reload_data():
+    """Recarrega os dados restaurados na sessão atual"""
+    st.session_state.data = load_data()
+
+def display_backup_page():
+    """Exibir a página de backup e restauração (admin e gestores)"""
+    st.header("Backup e Restauração")
+    st.caption("Os backups são incrementais: cada backup grava apenas os processos que mudaram desde o anterior.")
+
+    # Criar backup
+    st.subheader("Novo backup")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        label = st.text_input("Descrição", placeholder="Ex: Antes da importação de maio",
+                              label_visibility="collapsed")
+    with col2:
+        if st.button("💾 Criar backup", use_container_width=True):
+            with st.spinner("Criando backup..."):
+                entry = backup_store.create_snapshot(st.session_state.data, label=label)
+            st.success(f"✅ Backup criado: {entry['processes']} processos, "
+                       f"{entry['new_processes']} novos ou alterados ({_format_size(entry['bytes_added'])}).")
+
+    st.divider()
+
+    # Lista de backups (apenas o índice é lido)
+    snapshots = backup_store.list_snapshots()
+    st.subheader("Backups disponíveis")
+
+    if not snapshots:
+        st.info("Nenhum backup encontrado.")
+    else:
+        snapshots_df = pd.DataFrame(snapshots)
+        snapshots_df["bytes_added"] = snapshots_df["bytes_added"].map(_format_size)
+        st.dataframe(
+            snapshots_df[["created_at", "label", "processes", "new_processes", "bytes_added", "id"]],
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "created_at": "Data",
+                "label": "Descrição",
+                "processes": "Processos",
+                "new_processes": "Novos/alterados",
+                "bytes_added": "Espaço usado",
+                "id": "ID",
+            }
+        )
+        st.caption(f"Espaço total ocupado pelos backups: {_format_size(backup_store.get_store_size())}")
+
+        st.divider()
+
+        # Restauração
+        st.subheader("Restaurar")
+        st.warning("⚠️ A restauração substitui os dados atuais. Um backup do estado atual é criado antes.")
+
+        mode = st.radio("Restaurar a partir de", ["Backup selecionado", "Data e hora"], horizontal=True)
+
+        if mode == "Backup selecionado":
+            options = {s["id"]: f"{s['created_at'].replace('T', ' ')} — {s['label'] or 'Sem descrição'}"
+                       for s in snapshots}
+            snapshot_id = st.selectbox("Backup", list(options), format_func=options.get)
+            target = backup_store.find_snapshot(snapshot_id=snapshot_id)
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                restore_date = st.date_input("Data", value=datetime.now().date(), format="DD/MM/YYYY")
+            with col2:
+                restore_time = st.time_input("Hora", value=time(23, 59))
+            target = backup_store.find_snapshot(at=datetime.combine(restore_date, restore_time))
+            if target:
+                st.info(f"Será restaurado o backup de {target['created_at'].replace('T', ' ')} "
+                        f"({target['label'] or 'Sem descrição'}).")
+            else:
+                st.info("Nenhum backup anterior a essa data.")
+
+        if target and st.button("♻️ Restaurar", type="primary"):
+            with st.spinner("Restaurando..."):
+                backup_store.restore_snapshot(snapshot_id=target["id"])
+                _reload_data()
+            st.success(f"✅ Dados restaurados a partir do backup de {target['created_at'].replace('T', ' ')}.")
+            st.rerun()
+
+    # Backups antigos (cópias completas em JSON)
+    with st.expander("Importar backups antigos"):
+        st.write("Importa os arquivos data_backup_*.json, data_pre_restauracao_*.json e "
+                 "backups/data_backup_antes_limpeza_*.json para o novo formato. Os arquivos originais são mantidos.")
+        if st.button("📥 Importar"):
+            with st.spinner("Importando..."):
+                imported = backup_store.import_legacy_backups()
+            st.success(f"✅ {imported} backups importados.")
+            st.rerun()
@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
 from data import get_process_by_id
-from utils import format_date, get_status_color
+from view_models import get_detail_view_model
+from utils import lazy_download_button
 from components.event_log import display_event_log
-from html_generator import generate_process_html, get_download_link
 
 def display_client_view(process_id):
     """Display a client-facing view of a process"""
@@ -13,36 +13,39 @@ def display_client_view(process_id):
         st.error("Processo não encontrado!")
         return
     
+    # Modelo de exibição (memorizado enquanto o processo não for alterado)
+    view_model = get_detail_view_model(process)
+    values = view_model["values"]
+    
     # Title with process ID and status
     col1, col2, col3 = st.columns([3, 1, 1])
     
     with col1:
-        process_type = "Exportação" if process.get('type', '') == "exportacao" else "Importação"
-        st.header(f"Processo de {process_type} - {process['id']}")
-        st.caption(f"Referência: {process.get('ref', '')}")
+        st.header(f"Processo de {view_model['type_label']} - {process['id']}")
+        st.caption(f"Referência: {values.get('ref', '')}")
     
     with col2:
-        status = process.get('status', 'Em andamento')
-        status_color = get_status_color(status)
+        status = values.get('status', 'Em andamento')
         st.markdown(f"""
-        <div style="background-color: {status_color}; color: white; padding: 10px; 
+        <div style="background-color: {view_model['status_color']}; color: white; padding: 10px; 
         border-radius: 5px; text-align: center; font-weight: bold;">
             {status}
         </div>
         """, unsafe_allow_html=True)
     
     with col3:
-        # Gerar HTML do processo e oferecer download
-        if st.button("📄 Exportar HTML", use_container_width=True):
-            with st.spinner("Gerando arquivo HTML..."):
-                filepath, filename = generate_process_html(process_id, include_details=True)
-                if filepath:
-                    href, name = get_download_link(filepath, filename)
-                    st.success("Arquivo HTML gerado com sucesso!")
-                    st.markdown(
-                        f'<a href="{href}" download="{name}" target="_blank">📥 Baixar arquivo HTML</a>',
-                        unsafe_allow_html=True
-                    )
+        # Relatório HTML gerado apenas quando solicitado (e reaproveitado enquanto o processo não mudar)
+        def build_process_html():
+            from html_generator import get_process_html_bytes
+            return get_process_html_bytes(process_id, include_details=True)[0] or b""
+        
+        lazy_download_button(
+            label="📄 Exportar HTML",
+            build_data=build_process_html,
+            file_name=f"processo_{process_id}_r{view_model['revision']}.html",
+            mime="text/html",
+            key=f"process_html_{process_id}"
+        )
     
     # Main information in tabs
     tab1, tab2 = st.tabs(["Informações Gerais", "Eventos"])
@@ -57,33 +60,33 @@ def display_client_view(process_id):
         
         with col1:
             st.markdown("**Código:**")
-            st.markdown(process.get('id', ''))
+            st.markdown(values.get('id', ''))
             
             st.markdown("**Referência:**")
-            st.markdown(process.get('ref', ''))
+            st.markdown(values.get('ref', ''))
             
             st.markdown("**PO:**")
-            st.markdown(process.get('po', ''))
+            st.markdown(values.get('po', ''))
         
         with col2:
             st.markdown("**Invoice:**")
-            st.markdown(process.get('invoice', ''))
+            st.markdown(values.get('invoice', ''))
             
             st.markdown("**Origem:**")
-            st.markdown(process.get('origin', ''))
+            st.markdown(values.get('origin', ''))
             
             st.markdown("**Produto:**")
-            st.markdown(process.get('product', ''))
+            st.markdown(values.get('product', ''))
         
         with col3:
             st.markdown("**Tipo:**")
-            st.markdown(process.get('type', ''))
+            st.markdown(values.get('type', ''))
             
             st.markdown("**ETA:**")
-            st.markdown(format_date(process.get('eta', '')))
+            st.markdown(values.get('eta', ''))
             
             st.markdown("**Status:**")
-            st.markdown(process.get('status', ''))
+            st.markdown(values.get('status', ''))
         
         st.divider()
         
@@ -94,33 +97,33 @@ def display_client_view(process_id):
         
         with col1:
             st.markdown("**Exportador:**")
-            st.markdown(process.get('exporter', ''))
+            st.markdown(values.get('exporter', ''))
             
             st.markdown("**Navio:**")
-            st.markdown(process.get('ship', ''))
+            st.markdown(values.get('ship', ''))
             
             st.markdown("**Agente:**")
-            st.markdown(process.get('agent', ''))
+            st.markdown(values.get('agent', ''))
         
         with col2:
             st.markdown("**Número B/L:**")
-            st.markdown(process.get('bl_number', ''))
+            st.markdown(values.get('bl_number', ''))
             
             st.markdown("**Container:**")
-            st.markdown(process.get('container', ''))
+            st.markdown(values.get('container', ''))
             
             st.markdown("**Previsão de Chegada:**")
-            st.markdown(format_date(process.get('arrival_date', '')))
+            st.markdown(values.get('arrival_date', ''))
         
         with col3:
             st.markdown("**Free Time:**")
-            st.markdown(f"{process.get('free_time', '')} dias")
+            st.markdown(f"{values.get('free_time', '')} dias")
             
             st.markdown("**Vencimento Free Time:**")
-            st.markdown(format_date(process.get('free_time_expiry', '')))
+            st.markdown(values.get('free_time_expiry', ''))
             
             st.markdown("**Devolução de Vazio:**")
-            st.markdown(format_date(process.get('empty_return', '')))
+            st.markdown(values.get('empty_return', ''))
         
         st.divider()
         
@@ -131,24 +134,24 @@ def display_client_view(process_id):
         
         with col1:
             st.markdown("**Terminal:**")
-            st.markdown(process.get('terminal', ''))
+            st.markdown(values.get('terminal', ''))
             
             st.markdown("**Entrada no Porto/Recinto:**")
-            st.markdown(format_date(process.get('port_entry_date', '')))
+            st.markdown(values.get('port_entry_date', ''))
         
         with col2:
             st.markdown("**Início do Período Atual:**")
-            st.markdown(format_date(process.get('current_period_start', '')))
+            st.markdown(values.get('current_period_start', ''))
             
             st.markdown("**Vencimento do Período:**")
-            st.markdown(format_date(process.get('current_period_expiry', '')))
+            st.markdown(values.get('current_period_expiry', ''))
         
         with col3:
             st.markdown("**Dias Armazenados:**")
-            st.markdown(process.get('storage_days', '0'))
+            st.markdown(values.get('storage_days', '0'))
             
             st.markdown("**Mapa:**")
-            st.markdown(process.get('map', ''))
+            st.markdown(values.get('map', ''))
         
         st.divider()
         
@@ -159,27 +162,27 @@ def display_client_view(process_id):
         
         with col1:
             st.markdown("**Nota Fiscal:**")
-            st.markdown(process.get('invoice_number', ''))
+            st.markdown(values.get('invoice_number', ''))
             
             st.markdown("**D.I.:**")
-            st.markdown(process.get('di', ''))
+            st.markdown(values.get('di', ''))
         
         with col2:
             st.markdown("**Documentos Originais:**")
-            st.markdown(process.get('original_docs', ''))
+            st.markdown(values.get('original_docs', ''))
             
             st.markdown("**Data de Devolução:**")
-            st.markdown(format_date(process.get('return_date', '')))
+            st.markdown(values.get('return_date', ''))
         
         with col3:
             st.markdown("**Última Atualização:**")
-            st.markdown(format_date(process.get('last_update', '')))
+            st.markdown(values.get('last_update', ''))
         
         st.divider()
         
         # Observations
         st.subheader("Observações")
-        st.text_area("Observações", value=process.get('observations', ''), disabled=True, height=100, label_visibility="collapsed")
+        st.text_area("Observações", value=values.get('observations', ''), disabled=True, height=100, label_visibility="collapsed")
     
     # Tab 2: Events log (read-only)
     with tab2:
@@ -0,0 +1,107 @@
+import streamlit as st
+import pandas as pd
+import aggregates
+import rollups
+
+def display_dashboard():
+    """Exibir a página de indicadores da operação (admin e gestores)"""
+    if st.session_state.user_role not in ['admin', 'manager']:
+        st.error("Acesso não autorizado")
+        return
+
+    st.header("Indicadores")
+    st.caption("Calculados a partir das contagens e tabelas diárias, atualizadas a cada alteração de processo.")
+
+    processes = st.session_state.data["processes"]
+
+    # Situação da carteira e da armazenagem
+    terminal_load = rollups.get_terminal_load(processes)
+    expiring = aggregates.get_expiring(processes)
+    type_counts = aggregates.get_counts("type", processes)
+    cargo_rows = rollups.get_cargo_deadlines(processes)
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Processos ativos", aggregates.get_total(processes),
+                  help=f"Importação: {type_counts.get('importacao', 0)} · "
+                       f"Exportação: {type_counts.get('exportacao', 0)}")
+    with col2:
+        st.metric("Em armazenagem", sum(terminal_load.values()),
+                  help="Com entrada no porto e sem devolução do vazio")
+    with col3:
+        st.metric(f"Período vence em {aggregates.EXPIRING_WINDOW_DAYS} dias",
+                  expiring["current_period_expiry"])
+    with col4:
+        st.metric(f"Free time vence em {aggregates.EXPIRING_WINDOW_DAYS} dias",
+                  expiring["free_time_expiry"])
+    with col5:
+        st.metric("Deadlines de carga na semana", len(cargo_rows))
+
+    st.divider()
+
+    # Distribuição dos processos ativos
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Processos por status")
+        status_counts = aggregates.get_counts("status", processes)
+        if status_counts:
+            status_df = pd.DataFrame(
+                [{"Status": status or "Não informado", "Processos": n}
+                 for status, n in sorted(status_counts.items(), key=lambda item: -item[1])]
+            ).set_index("Status")
+            st.bar_chart(status_df)
+        else:
+            st.info("Nenhum processo ativo.")
+    with col2:
+        st.subheader("Dias desde a entrada no porto")
+        buckets = aggregates.get_storage_day_buckets(processes)
+        buckets_df = pd.DataFrame(
+            [{"Dias": label, "Processos": n} for label, n in buckets.items()]
+        ).set_index("Dias")
+        st.bar_chart(buckets_df)
+
+    # Volume e permanência por mês
+    throughput = pd.DataFrame(rollups.get_monthly_throughput(processes))
+    throughput = throughput.rename(columns={
+        "month": "Mês",
+        "entries": "Entradas",
+        "returns": "Devoluções",
+        "avg_dwell_days": "Permanência média (dias)",
+    }).set_index("Mês")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Volume por mês")
+        st.bar_chart(throughput[["Entradas", "Devoluções"]])
+    with col2:
+        st.subheader("Permanência média")
+        st.caption("Dias entre a entrada no porto e a devolução do vazio, pelo mês da devolução.")
+        st.line_chart(throughput[["Permanência média (dias)"]])
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Armazenagem por terminal")
+        if terminal_load:
+            load_df = pd.DataFrame(
+                [{"Terminal": terminal or "Não informado", "Processos": n}
+                 for terminal, n in sorted(terminal_load.items(), key=lambda item: -item[1])]
+            ).set_index("Terminal")
+            st.bar_chart(load_df)
+        else:
+            st.info("Nenhum processo em armazenagem.")
+
+    with col2:
+        st.subheader("Deadlines de carga na semana")
+        if cargo_rows:
+            cargo_df = pd.DataFrame(cargo_rows)
+            cargo_df["cargo_deadline"] = cargo_df["cargo_deadline"].map(lambda d: d.strftime("%d/%m/%Y"))
+            cargo_df = cargo_df.rename(columns={
+                "id": "ID",
+                "cargo_deadline": "Deadline",
+                "client": "Cliente",
+                "terminal": "Terminal",
+                "status": "Status",
+            })
+            st.dataframe(cargo_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("Nenhuma exportação com deadline de carga nesta semana.")
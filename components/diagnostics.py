@@ -0,0 +1,88 @@
+import streamlit as st
+import pandas as pd
+import profiling
+
+def display_diagnostics():
+    """Exibir a página de diagnóstico de desempenho (apenas para admin)"""
+    if st.session_state.user_role != 'admin':
+        st.error("Acesso não autorizado")
+        return
+
+    st.header("Diagnóstico de Desempenho")
+    st.caption("Tempo por chamada, número de chamadas e bytes gravados nos caminhos críticos da aplicação.")
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        enabled = st.toggle(
+            "Instrumentação ativa",
+            value=profiling.is_enabled(),
+            help="Quando desativada, as medições não são coletadas e o custo é desprezível."
+        )
+        if enabled != profiling.is_enabled():
+            profiling.set_enabled(enabled)
+            st.rerun()
+
+    with col2:
+        scope = st.radio("Escopo", ["Esta sessão", "Todas as sessões"], horizontal=True)
+
+    with col3:
+        if st.button("🧹 Limpar medições", use_container_width=True):
+            profiling.reset_stats()
+            st.rerun()
+
+    # Obter o ID da sessão atual para filtrar as medições
+    session_id = None
+    if scope == "Esta sessão":
+        session_id = profiling.current_session_id()
+
+    stats = profiling.get_stats(session_id=session_id)
+
+    if not stats:
+        if profiling.is_enabled():
+            st.info("Nenhuma medição registrada ainda. Navegue pelo sistema para coletar dados.")
+        else:
+            st.info("A instrumentação está desativada. Ative-a para coletar medições.")
+        return
+
+    stats_df = pd.DataFrame(stats)
+    stats_df["total_ms"] = (stats_df["total_seconds"] * 1000).round(2)
+    stats_df["avg_ms"] = (stats_df["avg_seconds"] * 1000).round(2)
+    stats_df["max_ms"] = (stats_df["max_seconds"] * 1000).round(2)
+
+    st.dataframe(
+        stats_df[["name", "calls", "total_ms", "avg_ms", "max_ms", "bytes_written", "session_id", "pid"]],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "name": "Operação",
+            "calls": "Chamadas",
+            "total_ms": "Total (ms)",
+            "avg_ms": "Média (ms)",
+            "max_ms": "Máximo (ms)",
+            "bytes_written": "Bytes gravados",
+            "session_id": "Sessão",
+            "pid": "Processo"
+        }
+    )
+
+    # Exportação das medições
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.download_button(
+            label="📥 Baixar JSON lines",
+            data=profiling.to_jsonl(),
+            file_name="diagnostico.jsonl",
+            mime="application/json",
+            use_container_width=True
+        )
+
+    with col2:
+        st.download_button(
+            label="📥 Baixar métricas Prometheus",
+            data=profiling.to_prometheus(),
+            file_name="diagnostico.prom",
+            mime="text/plain",
+            use_container_width=True
+        )
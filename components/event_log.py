@@ -1,75 +1,66 @@
 import streamlit as st
-import pandas as pd
 from data import edit_event, delete_event
+from view_models import get_detail_view_model
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Quantidade de eventos exibidos por vez no histórico
+EVENTS_PAGE_SIZE = 20
 
 def display_event_log(process):
     """Display the event log for a process"""
     st.subheader("Histórico de Eventos")
     
-    events = process.get("events", [])
+    is_admin = 'user_role' not in st.session_state or st.session_state.user_role == 'admin'
     
-    if not events:
-        st.info("Nenhum evento registrado para este processo.")
-        return
+    # Eventos já ordenados (mais recentes primeiro) com a posição original de cada um,
+    # usada como identificador dos eventos antigos sem ID
+    view_model = get_detail_view_model(process)
     
-    # Convert events to dataframe for display
-    events_df = pd.DataFrame(events)
+    # Filter events for client view - remover eventos de atribuição de cliente
+    if st.session_state.get('user_role') == 'client':
+        indexed_events = view_model["client_timeline"]
+    else:
+        indexed_events = view_model["timeline"]
     
-    # Make sure columns exist
-    if "date" not in events_df.columns:
-        events_df["date"] = ""
-    if "description" not in events_df.columns:
-        events_df["description"] = ""
-    if "user" not in events_df.columns:
-        events_df["user"] = ""
-    if "id" not in events_df.columns:
-        events_df["id"] = ""
+    if not indexed_events:
+        st.info("Nenhum evento registrado para este processo.")
+        return
     
-    # Filter events for client view - remover eventos de atribuição de cliente
-    if 'user_role' in st.session_state and st.session_state.user_role == 'client':
-        filtered_events = []
-        for _, event in events_df.iterrows():
-            # Excluir eventos relacionados à atribuição de processos
-            desc = event['description'].lower() if isinstance(event['description'], str) else ""
-            if "processo atribuído ao cliente" not in desc and "processo removido do cliente" not in desc:
-                filtered_events.append(event)
-        if filtered_events:
-            events_df = pd.DataFrame(filtered_events)
-        else:
-            st.info("Nenhum evento registrado para este processo.")
-            return
+    # Exibir apenas a página atual do histórico
+    limit_key = f"event_log_limit_{process.get('id')}"
+    limit = st.session_state.get(limit_key, EVENTS_PAGE_SIZE)
+    visible_events = indexed_events[:limit]
     
-    # Sort events by date (most recent first)
-    events_df = events_df.sort_values(by="date", ascending=False)
+    logger.debug("Renderizando histórico de eventos", extra={"fields": {
+        "process_id": process.get("id"), "events": len(indexed_events), "rendered": len(visible_events)}})
     
     # Inicializar estados para edição
     if 'editing_event' not in st.session_state:
         st.session_state.editing_event = None
     
     # Display events in a timeline format
-    for i, event in events_df.iterrows():
-        # Garantir que event_id nunca seja None/NaN/vazio
-        if pd.isna(event.get('id')) or event.get('id', '') == '':
-            event_id = f"event_{i}"  # Usar o índice como identificador único
-        else:
-            event_id = event.get('id', '')
-            
-        # Registrar IDs para debug
-        print(f"Evento {i}: ID = '{event_id}'")
+    for i, event in visible_events:
+        # Garantir que event_id nunca seja None/vazio
+        event_id = event.get('id') or f"event_{i}"  # Usar o índice como identificador único
+        event_date = event.get('date', '')
+        event_user = event.get('user', '')
+        event_description = event.get('description', '')
         
         with st.container():
             # Se o usuário for administrador e estiver no modo de edição para este evento
-            if 'user_role' in st.session_state and st.session_state.user_role == 'admin' and st.session_state.editing_event == event_id:
+            if st.session_state.get('user_role') == 'admin' and st.session_state.editing_event == event_id:
                 col1, col2, col3 = st.columns([1, 3, 1])
                 
                 with col1:
-                    st.markdown(f"**{event['date']}**")
-                    st.caption(f"Usuário: {event['user']}")
+                    st.markdown(f"**{event_date}**")
+                    st.caption(f"Usuário: {event_user}")
                 
                 with col2:
                     new_description = st.text_area(
                         "Editar descrição", 
-                        value=event['description'],
+                        value=event_description,
                         key=f"edit_{event_id}"
                     )
                 
@@ -89,16 +80,16 @@ def display_event_log(process):
                 col1, col2, col3 = st.columns([1, 3, 1])
                 
                 with col1:
-                    st.markdown(f"**{event['date']}**")
+                    st.markdown(f"**{event_date}**")
                     # Ocultar informações de usuário para cliente
-                    if 'user_role' not in st.session_state or st.session_state.user_role == 'admin':
-                        st.caption(f"Usuário: {event['user']}")
+                    if is_admin:
+                        st.caption(f"Usuário: {event_user}")
                 
                 with col2:
-                    st.markdown(f"{event['description']}")
+                    st.markdown(f"{event_description}")
                 
                 # Mostrar opções de edição apenas para administradores
-                if 'user_role' in st.session_state and st.session_state.user_role == 'admin':
+                if st.session_state.get('user_role') == 'admin':
                     with col3:
                         col3_1, col3_2 = st.columns(2)
                         
@@ -116,3 +107,11 @@ def display_event_log(process):
                                     st.error("Erro ao excluir evento.")
             
         st.divider()
+    
+    # Carregar a próxima página de eventos
+    remaining = len(indexed_events) - len(visible_events)
+    if remaining > 0:
+        st.caption(f"Exibindo {len(visible_events)} de {len(indexed_events)} eventos")
+        if st.button(f"Carregar mais ({min(remaining, EVENTS_PAGE_SIZE)})", key=f"event_log_more_{process.get('id')}"):
+            st.session_state[limit_key] = limit + EVENTS_PAGE_SIZE
+            st.rerun()
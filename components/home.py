@@ -2,9 +2,12 @@ import streamlit as st
 import pandas as pd
 import os
 from data import get_processes_df, get_process_by_id, delete_process, archive_process
-from utils import export_to_excel, export_to_csv, get_status_color
-from html_generator import generate_processes_table_html, get_download_link
-from html_export_pagination import export_html_with_pagination
+from utils import export_to_excel, export_to_csv, lazy_download_button
+from status_registry import get_registry
+from profiling import track
+import aggregates
+import deadline_index
+import identifier_index
 
 def display_home(navigate_function, filter_ids=None):
     """Display the home page with the processes table
@@ -15,6 +18,45 @@ def display_home(navigate_function, filter_ids=None):
     """
     st.header("Processos")
     
+    # Busca rápida por identificador (índice exato, sem percorrer a tabela)
+    with st.form("quick_find_form", clear_on_submit=True):
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            quick_find = st.text_input(
+                "🔎 Busca rápida",
+                placeholder="Container, B/L, D.I., nota fiscal ou PO"
+            )
+        with col2:
+            st.write("")
+            quick_find_submitted = st.form_submit_button("Buscar", use_container_width=True)
+    
+    if quick_find_submitted and quick_find:
+        matches = identifier_index.find(
+            quick_find, include_archived=st.session_state.user_role == 'admin'
+        )
+        if filter_ids is not None:
+            matches = {pid: fields for pid, fields in matches.items() if pid in filter_ids}
+        if len(matches) == 1:
+            st.session_state.pop("quick_find_matches", None)
+            navigate_function("view_details", next(iter(matches)))
+        st.session_state.quick_find_matches = matches
+    
+    # Mais de um processo com o identificador: escolher qual abrir
+    matches = st.session_state.get("quick_find_matches")
+    if matches is not None:
+        if matches:
+            st.caption(f"{len(matches)} processos encontrados:")
+            for process_id, fields in sorted(matches.items()):
+                labels = ", ".join(identifier_index.IDENTIFIER_FIELDS[field] for field in fields)
+                if st.button(f"{process_id} ({labels})", key=f"quick_find_{process_id}"):
+                    st.session_state.pop("quick_find_matches", None)
+                    navigate_function("view_details", process_id)
+        else:
+            st.info("Nenhum processo com esse identificador.")
+        if st.button("Limpar busca rápida", key="quick_find_clear"):
+            st.session_state.pop("quick_find_matches", None)
+            st.rerun()
+    
     # Get processes data first before we set up any UI
     df = get_processes_df()
     
@@ -23,12 +65,10 @@ def display_home(navigate_function, filter_ids=None):
                       "Novo Processo", "Chegada do navio alterada", "Desembaraçado", 
                       "Documento entregue", "BL enviado"]
     
-    # Se temos dados carregados, adicionar outros status que possam existir
-    if not df.empty and 'status' in df.columns:
-        # Extrair status únicos dos dados e adicionar à lista de opções
-        for status in df['status'].unique():
-            if status and status not in status_options:
-                status_options.append(status)
+    # Adicionar os demais status existentes (contagens mantidas por aggregates, sem percorrer os dados)
+    for status in aggregates.get_options("status"):
+        if status not in status_options:
+            status_options.append(status)
                 
     # Ordenar alfabeticamente para facilitar a localização
     status_options.sort()
@@ -55,7 +95,13 @@ def display_home(navigate_function, filter_ids=None):
         status_filter = st.multiselect("Filtrar por status", status_options)
     
     with col4:
-        date_range = st.date_input("Período", value=[], help="Selecione um intervalo de datas")
+        date_range = st.date_input("Período", value=[], help="Processos com prazo dentro do intervalo")
+        deadline_field = st.selectbox(
+            "Prazo",
+            options=["Todos os prazos"] + list(deadline_index.DEADLINE_FIELDS),
+            format_func=lambda field: deadline_index.DEADLINE_FIELDS.get(field, field),
+            key="home_deadline_field"
+        )
     
     # Adicionar filtro por cliente apenas para administradores
     client_filter = None
@@ -78,67 +124,95 @@ def display_home(navigate_function, filter_ids=None):
                 selected_client_info = next((user for user in clients 
                                            if f"{user['name']} ({user['email']})" == selected_client), None)
                 if selected_client_info:
-                    client_filter = selected_client_info.get('processes', [])
+                    from components.auth import get_client_process_ids
+                    client_filter = get_client_process_ids(selected_client_info['id'])
     
     if df.empty:
         st.info("Nenhum processo encontrado. Adicione um novo processo clicando em 'Novo Processo'.")
         return
     
-    # Apply filters
-    filtered_df = df.copy()
+    with track("home.filtros"):
+        # Apply filters
+        filtered_df = df.copy()
     
-    # Filtrar por IDs específicos (quando em modo cliente ou quando filtro por cliente é aplicado)
-    if filter_ids is not None and len(filter_ids) > 0:
-        # Filtro padrão para cliente
-        filtered_df = filtered_df[filtered_df['id'].isin(filter_ids)]
-    elif client_filter is not None and len(client_filter) > 0:
-        # Filtro escolhido pelo administrador
-        filtered_df = filtered_df[filtered_df['id'].isin(client_filter)]
+        # Filtrar por IDs específicos (quando em modo cliente ou quando filtro por cliente é aplicado)
+        if filter_ids is not None and len(filter_ids) > 0:
+            # Filtro padrão para cliente
+            filtered_df = filtered_df[filtered_df['id'].isin(filter_ids)]
+        elif client_filter is not None and len(client_filter) > 0:
+            # Filtro escolhido pelo administrador
+            filtered_df = filtered_df[filtered_df['id'].isin(client_filter)]
     
-    # Garantir que a coluna 'type' exista
-    if 'type' not in filtered_df.columns:
-        filtered_df['type'] = ''  # Adiciona coluna type se não existir
+        # Garantir que a coluna 'type' exista
+        if 'type' not in filtered_df.columns:
+            filtered_df['type'] = ''  # Adiciona coluna type se não existir
 
-    # Adicionar coluna para exibição formatada do tipo de processo
-    filtered_df['processo_tipo'] = filtered_df['type'].apply(
-        lambda x: "Exportação" if x == "exportacao" else "Importação"
-    )
+        # Adicionar coluna para exibição formatada do tipo de processo
+        filtered_df['processo_tipo'] = filtered_df['type'].apply(
+            lambda x: "Exportação" if x == "exportacao" else "Importação"
+        )
 
-    # Filtrar por tipo de processo
-    if processo_type_filter != "Todos":
-        if processo_type_filter == "Importação":
-            # Filtrar processos de importação (type == "importacao" ou não definido/null)
-            mask = (filtered_df['type'] == 'importacao') | (filtered_df['type'].isna()) | (filtered_df['type'] == '')
-            filtered_df = filtered_df[mask]
-        else:  # Exportação
-            filtered_df = filtered_df[filtered_df['type'] == 'exportacao']
+        # Filtrar por tipo de processo
+        if processo_type_filter != "Todos":
+            if processo_type_filter == "Importação":
+                # Filtrar processos de importação (type == "importacao" ou não definido/null)
+                mask = (filtered_df['type'] == 'importacao') | (filtered_df['type'].isna()) | (filtered_df['type'] == '')
+                filtered_df = filtered_df[mask]
+            else:  # Exportação
+                filtered_df = filtered_df[filtered_df['type'] == 'exportacao']
     
-    if search_term:
-        filter_condition = False
-        for col in filtered_df.columns:
-            filter_condition |= filtered_df[col].astype(str).str.contains(search_term, case=False, na=False)
-        filtered_df = filtered_df[filter_condition]
+        if search_term:
+            filter_condition = False
+            for col in filtered_df.columns:
+                filter_condition |= filtered_df[col].astype(str).str.contains(search_term, case=False, na=False)
+            filtered_df = filtered_df[filter_condition]
     
-    if status_filter:
-        filtered_df = filtered_df[filtered_df['status'].isin(status_filter)]
+        if status_filter:
+            filtered_df = filtered_df[filtered_df['status'].isin(status_filter)]
+        
+        # Filtrar pelo período (índice ordenado dos prazos, sem converter as datas de cada linha)
+        if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+            fields = None if deadline_field == "Todos os prazos" else [deadline_field]
+            period_ids = deadline_index.ids_in_range(date_range[0], date_range[1], fields=fields)
+            filtered_df = filtered_df[filtered_df['id'].isin(period_ids)]
+        
+    # Próximos prazos dos processos listados
+    upcoming = deadline_index.upcoming()
+    listed_ids = set(filtered_df['id'])
+    upcoming = [row for row in upcoming if row[2] in listed_ids]
+    with st.expander(f"📅 Próximos prazos ({deadline_index.UPCOMING_DAYS} dias): {len(upcoming)}"):
+        if upcoming:
+            references = filtered_df.set_index('id').get('ref', pd.Series(dtype=object))
+            upcoming_df = pd.DataFrame([{
+                "Data": date.strftime("%d/%m/%Y"),
+                "Prazo": deadline_index.DEADLINE_FIELDS[field],
+                "Código": process_id,
+                "Referência": references.get(process_id, ""),
+            } for date, field, process_id in upcoming])
+            st.dataframe(upcoming_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("Nenhum prazo nos próximos dias.")
         
     # Display export options
     col1, col2, col3 = st.columns(3)
     
+    # Os arquivos só são gerados quando o usuário solicita a exportação
     with col1:
-        st.download_button(
+        lazy_download_button(
             label="📥 Exportar para Excel",
-            data=export_to_excel(filtered_df),
+            build_data=lambda: export_to_excel(filtered_df),
             file_name="processos_importacao_exportacao.xlsx",
-            mime="application/vnd.ms-excel"
+            mime="application/vnd.ms-excel",
+            key="home_excel"
         )
     
     with col2:
-        st.download_button(
+        lazy_download_button(
             label="📄 Exportar para CSV",
-            data=export_to_csv(filtered_df),
+            build_data=lambda: export_to_csv(filtered_df),
             file_name="processos_importacao_exportacao.csv",
-            mime="text/csv"
+            mime="text/csv",
+            key="home_csv"
         )
         
     with col3:
@@ -165,9 +239,12 @@ def display_home(navigate_function, filter_ids=None):
                                          if f"{user['name']} ({user['email']})" == selected_client), None)
                 if selected_client_info:
                     client_name = selected_client_info.get('name', '')
-                    export_process_ids = selected_client_info.get('processes', [])
+                    export_process_ids = list(client_filter or [])
                     client_logo = selected_client_info.get('logo_path')
             
+            from html_generator import get_download_link
+            from html_export_pagination import export_html_with_pagination
+            
             with st.spinner("Gerando página HTML interativa com paginação..."):
                 # Gerar HTML com a tabela interativa e paginação, mantendo o visual original
                 filepath, filename = export_html_with_pagination(
@@ -190,12 +267,33 @@ def display_home(navigate_function, filter_ids=None):
                         f'<a href="{href}" download="{name}" target="_blank">📥 Baixar página HTML interativa</a>',
                         unsafe_allow_html=True
                     )
-    
-    # Add styling to the status column
-    def color_status(val):
-        color = get_status_color(val)
-        return f'background-color: {color}; color: white; border-radius: 50px; padding: 0.3rem 0.9rem; text-align: center; font-weight: 500; width: 90%; margin: auto; box-shadow: 0 1px 3px rgba(0,0,0,0.12), 0 1px 2px rgba(0,0,0,0.24);'
-    
+
+    # Exportação dos relatórios individuais de vários processos de uma só vez
+    with st.expander("📑 Exportar relatórios individuais dos processos selecionados"):
+        selected_ids = st.multiselect("Processos", options=filtered_df['id'].tolist(), key="bulk_html_ids")
+        bulk_format = st.radio("Formato", ["Documento único (HTML)", "Um arquivo por processo (ZIP)"],
+                               horizontal=True, key="bulk_html_format")
+
+        if selected_ids:
+            from html_generator import generate_processes_report_html, generate_processes_html_zip
+
+            if bulk_format == "Documento único (HTML)":
+                lazy_download_button(
+                    label="📄 Gerar relatório",
+                    build_data=lambda: generate_processes_report_html(selected_ids)[0],
+                    file_name="relatorio_processos.html",
+                    mime="text/html",
+                    key="bulk_html"
+                )
+            else:
+                lazy_download_button(
+                    label="🗜️ Gerar ZIP",
+                    build_data=lambda: generate_processes_html_zip(selected_ids)[0],
+                    file_name="relatorios_processos.zip",
+                    mime="application/zip",
+                    key="bulk_html_zip"
+                )
+
     # Display dataframe with styling (using .map instead of .applymap which is deprecated)
     # Configuração de colunas para renomear os campos
     column_configs = {
@@ -226,9 +324,9 @@ def display_home(navigate_function, filter_ids=None):
     # Aplicar estilos às células usando Pandas Styler
     styled_df = filtered_df.style
     
-    # Estilo para as células de status
-    styled_df = styled_df.map(
-        lambda x: color_status(x) if x else '',
+    # Estilo para as células de status (um único mapeamento status -> estilo para a coluna)
+    styled_df = styled_df.apply(
+        get_registry().style_column,
         subset=['status']
     )
     
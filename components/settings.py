@@ -3,9 +3,10 @@ import os
 import json
 import time
 from data import load_data, save_data
+import status_registry
 
 # Arquivo para armazenar os status personalizados
-STATUS_FILE = "status_config.json"
+STATUS_FILE = status_registry.STATUS_FILE
 
 # Função para obter os status disponíveis por tipo de processo
 def get_status_options(process_type=None):
@@ -18,94 +19,21 @@ def get_status_options(process_type=None):
     Returns:
         list: Lista de nomes de status
     """
-    # Verificar se já temos os status na sessão
-    if process_type == "importacao" and "status_options_import" in st.session_state:
-        return st.session_state.status_options_import
-    
-    if process_type == "exportacao" and "status_options_export" in st.session_state:
-        return st.session_state.status_options_export
-    
-    if process_type is None and "status_options" in st.session_state:
-        return st.session_state.status_options
-    
-    # Se não temos em cache, carregar do arquivo
-    status_config = load_status_config()
-    
-    # No novo formato, os status estão em status_config
-    if "status_config" in status_config:
-        status_items = status_config["status_config"]
-        
-        if process_type is None:
-            # Retornar todos os status (nomes únicos)
-            status_names = [item["name"] for item in status_items]
-            st.session_state.status_options = status_names
-            return status_names
-        
-        elif process_type == "importacao":
-            # Filtrar por importação
-            import_status = [item["name"] for item in status_items 
-                            if "importacao" in item.get("process_types", [])]
-            st.session_state.status_options_import = import_status
-            return import_status
-        
-        elif process_type == "exportacao":
-            # Filtrar por exportação
-            export_status = [item["name"] for item in status_items 
-                            if "exportacao" in item.get("process_types", [])]
-            st.session_state.status_options_export = export_status
-            return export_status
-    
-    # Formato antigo ou configuração vazia
-    else:
-        default_status = ["Novo Processo", "Em andamento", "Pendente", "Concluído"]
-        if process_type == "importacao":
-            default_status.append("Navio em Santos")
-        if process_type == "exportacao":
-            default_status.append("Booking confirmado")
-        
-        return default_status
+    # O registro de status é carregado uma única vez e invalidado em save_status_config
+    return status_registry.get_registry().options(process_type)
 
 def load_status_config():
     """Carrega a configuração de status do arquivo"""
-    if os.path.exists(STATUS_FILE):
-        try:
-            with open(STATUS_FILE, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                
-                # Verificar se o arquivo tem o formato antigo (apenas lista de status)
-                if "status_list" in config and isinstance(config["status_list"], list) and not "status_config" in config:
-                    # Converter formato antigo para o novo formato
-                    status_list = config["status_list"]
-                    status_config = []
-                    
-                    for status in status_list:
-                        status_config.append({
-                            "name": status,
-                            "process_types": ["importacao", "exportacao"]  # Por padrão, disponível para ambos
-                        })
-                    
-                    # Retornar no novo formato
-                    return {"status_config": status_config}
-                
-                return config
-                
-        except Exception as e:
-            st.error(f"Erro ao carregar status: {e}")
-            return create_default_status_config()
-    else:
-        # Status padrão se o arquivo não existir
+    try:
+        # Formato antigo (apenas lista de status) já convertido para o novo formato
+        return {"status_config": status_registry.load_status_items()}
+    except Exception as e:
+        st.error(f"Erro ao carregar status: {e}")
         return create_default_status_config()
 
 def create_default_status_config():
     """Cria a configuração padrão de status"""
-    default_status = [
-        {"name": "Novo Processo", "process_types": ["importacao", "exportacao"]},
-        {"name": "Em andamento", "process_types": ["importacao", "exportacao"]},
-        {"name": "Pendente", "process_types": ["importacao", "exportacao"]},
-        {"name": "Concluído", "process_types": ["importacao", "exportacao"]},
-        {"name": "Navio em Santos", "process_types": ["importacao"]},
-        {"name": "Booking confirmado", "process_types": ["exportacao"]},
-    ]
+    default_status = [dict(item) for item in status_registry.DEFAULT_STATUS_CONFIG]
     
     return {"status_config": default_status}
         
@@ -114,10 +42,16 @@ def save_status_config(status_config):
     try:
         with open(STATUS_FILE, 'w', encoding='utf-8') as f:
             json.dump(status_config, f, indent=4)
-        return True
     except Exception as e:
         st.error(f"Erro ao salvar status: {e}")
         return False
+    
+    # Recarregar o registro (cores, códigos e listas por tipo) na próxima consulta
+    status_registry.invalidate()
+    for key in ("status_options", "status_options_import", "status_options_export"):
+        if key in st.session_state:
+            del st.session_state[key]
+    return True
 
 def display_status_manager():
     """Interface para gerenciar os status disponíveis no sistema"""
@@ -268,14 +202,6 @@ def display_status_manager():
             # Criar nova configuração com a lista temporária
             status_config = {"status_config": st.session_state.temp_status_config}
             if save_status_config(status_config):
-                # Remover as listas de status da sessão para forçar recarregamento
-                if 'status_options' in st.session_state:
-                    del st.session_state['status_options']
-                if 'status_options_import' in st.session_state:
-                    del st.session_state['status_options_import']
-                if 'status_options_export' in st.session_state:
-                    del st.session_state['status_options_export']
-                    
                 st.success("Status atualizados com sucesso! As alterações estarão disponíveis ao adicionar um novo processo.")
                 
                 # Mostrar os status que foram salvos
@@ -318,6 +244,52 @@ def display_status_manager():
         if st.button("Fechar", use_container_width=True):
             st.session_state.show_status_manager = False
             st.rerun()
+    
+    display_status_migration()
+
+def display_status_migration():
+    """Interface para renomear ou mesclar o status dos processos existentes"""
+    from status_migration import get_status_counts, migrate_statuses
+    
+    st.markdown("#### Migrar Status dos Processos")
+    st.write("Troca o status de todos os processos (inclusive arquivados) de uma só vez. "
+             "Cada processo alterado recebe um evento registrando a migração.")
+    
+    counts = get_status_counts(st.session_state.data["processes"])
+    current_status = sorted(status for status in counts if status)
+    if not current_status:
+        st.info("Nenhum processo com status definido.")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        old_status = st.multiselect(
+            "Status atuais",
+            options=current_status,
+            format_func=lambda status: f"{status} ({counts.get(status, 0)} processos)",
+            key="migration_old_status"
+        )
+    with col2:
+        configured = [item["name"] for item in st.session_state.temp_status_config if item.get("name")]
+        new_status = st.selectbox("Novo status", options=configured, key="migration_new_status")
+    
+    if not old_status or not new_status:
+        return
+    
+    mapping = {status: new_status for status in old_status}
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Simular", use_container_width=True):
+            preview = migrate_statuses(mapping, dry_run=True)
+            total = sum(preview.values())
+            st.info(f"{total} processos seriam alterados para '{new_status}': " +
+                    ", ".join(f"{status} ({count})" for status, count in preview.items()))
+    with col2:
+        if st.button("Migrar", type="primary", use_container_width=True):
+            with st.spinner("Migrando status..."):
+                result = migrate_statuses(mapping)
+            st.success(f"✅ {sum(result.values())} processos alterados para '{new_status}'.")
 
 def display_settings():
     """Display settings page for configuring email and SMS"""
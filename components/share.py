@@ -5,13 +5,27 @@ import json
 import os
 from datetime import datetime, timedelta
 import base64
+import time
+import threading
 
 from data import get_process_by_id, get_processes_df, save_data
-from utils import send_email, send_sms
+from notifications import enqueue_email, enqueue_sms, enqueue_many, get_outbox_summary
+from log_config import get_logger
+
+logger = get_logger(__name__)
 
 # Path to store share links
 SHARE_FILE = "shared_links.json"
 
+# Intervalo mínimo entre duas limpezas de links expirados/revogados
+SWEEP_INTERVAL_SECONDS = 60 * 60
+
+# Índice em memória dos links por token, invalidado quando o arquivo é alterado
+_token_index = None
+_token_index_signature = None
+_last_sweep = 0.0
+_index_lock = threading.RLock()
+
 def load_shared_links():
     """Load shared links from file"""
     if os.path.exists(SHARE_FILE):
@@ -22,70 +36,167 @@ def load_shared_links():
             return {"links": []}
     return {"links": []}
 
+def _share_file_signature():
+    """Identifica a versão atual do arquivo de links (mtime e tamanho)"""
+    try:
+        stat = os.stat(SHARE_FILE)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def _build_token_index(links_data):
+    """Monta o índice token -> link"""
+    return {link["token"]: link for link in links_data.get("links", [])}
+
+def get_token_index():
+    """
+    Retorna o índice de links por token, recarregando o arquivo apenas se ele
+    tiver sido alterado (inclusive por outro processo).
+    
+    Returns:
+        dict: Token -> dados do link
+    """
+    global _token_index, _token_index_signature
+    
+    with _index_lock:
+        signature = _share_file_signature()
+        if _token_index is None or signature != _token_index_signature:
+            _token_index = _build_token_index(load_shared_links())
+            _token_index_signature = signature
+        return _token_index
+
 def save_shared_links(links_data):
     """Save shared links to file"""
-    with open(SHARE_FILE, "w") as f:
-        json.dump(links_data, f, indent=4)
+    global _token_index, _token_index_signature
+    
+    with _index_lock:
+        # Gravar em arquivo temporário e substituir, para nunca deixar o arquivo pela metade
+        tmp_file = f"{SHARE_FILE}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(links_data, f, indent=4)
+        os.replace(tmp_file, SHARE_FILE)
+        
+        # Atualizar o índice com os dados gravados
+        _token_index = _build_token_index(links_data)
+        _token_index_signature = _share_file_signature()
 
-def generate_share_link(process_id, expiry_days=30):
-    """Generate a unique share link for a process"""
-    # Create a unique token
-    token = str(uuid.uuid4())
+def _is_link_expired(link, now=None):
+    """Verifica se a data de expiração do link já passou"""
+    now = now or datetime.now()
+    try:
+        return datetime.strptime(link["expiry_date"], "%Y-%m-%d") < now
+    except (KeyError, ValueError):
+        return True
+
+def sweep_share_links():
+    """
+    Remove do arquivo os links expirados ou revogados.
     
-    # Calculate expiry date
-    expiry_date = (datetime.now() + timedelta(days=expiry_days)).strftime("%Y-%m-%d")
+    Returns:
+        int: Quantidade de links removidos
+    """
+    global _last_sweep
     
-    # Load existing links
-    links_data = load_shared_links()
+    with _index_lock:
+        _last_sweep = time.time()
+        links_data = load_shared_links()
+        now = datetime.now()
+        
+        valid_links = [link for link in links_data["links"]
+                       if link.get("is_active") and not _is_link_expired(link, now)]
+        removed = len(links_data["links"]) - len(valid_links)
+        
+        if removed:
+            links_data["links"] = valid_links
+            save_shared_links(links_data)
+        
+        return removed
+
+def maybe_sweep_share_links():
+    """Executa a limpeza de links se o intervalo desde a última limpeza já passou"""
+    if time.time() - _last_sweep < SWEEP_INTERVAL_SECONDS:
+        return 0
+    try:
+        return sweep_share_links()
+    except Exception as e:
+        logger.error(f"Erro ao limpar links de compartilhamento: {e}")
+        return 0
+
+def generate_share_links(process_ids, expiry_days=30):
+    """
+    Gera links de compartilhamento para vários processos com uma única gravação.
     
-    # Add new link
-    links_data["links"].append({
-        "token": token,
-        "process_id": process_id,
-        "created_date": datetime.now().strftime("%Y-%m-%d"),
-        "expiry_date": expiry_date,
-        "is_active": True
-    })
+    Args:
+        process_ids: Lista de IDs de processos
+        expiry_days: Dias de validade dos links
+        
+    Returns:
+        dict: ID do processo -> token gerado
+    """
+    created_date = datetime.now().strftime("%Y-%m-%d")
+    expiry_date = (datetime.now() + timedelta(days=expiry_days)).strftime("%Y-%m-%d")
     
-    # Save links
-    save_shared_links(links_data)
+    tokens = {}
+    with _index_lock:
+        # Load existing links
+        links_data = load_shared_links()
+        
+        for process_id in process_ids:
+            # Create a unique token
+            token = str(uuid.uuid4())
+            links_data["links"].append({
+                "token": token,
+                "process_id": process_id,
+                "created_date": created_date,
+                "expiry_date": expiry_date,
+                "is_active": True
+            })
+            tokens[process_id] = token
+        
+        # Save links
+        save_shared_links(links_data)
     
-    # Return the token
-    return token
+    return tokens
+
+def generate_share_link(process_id, expiry_days=30):
+    """Generate a unique share link for a process"""
+    return generate_share_links([process_id], expiry_days)[process_id]
 
 def validate_share_token(token):
     """Validate a share token and return the process ID if valid"""
-    links_data = load_shared_links()
+    maybe_sweep_share_links()
     
-    for link in links_data["links"]:
-        if link["token"] == token and link["is_active"]:
-            # Check if expired
-            expiry_date = datetime.strptime(link["expiry_date"], "%Y-%m-%d")
-            if expiry_date >= datetime.now():
-                return link["process_id"]
+    link = get_token_index().get(token)
+    if link and link.get("is_active") and not _is_link_expired(link):
+        return link["process_id"]
     
     return None
 
 def revoke_share_link(token):
     """Revoke a share link"""
-    links_data = load_shared_links()
-    
-    for link in links_data["links"]:
-        if link["token"] == token:
-            link["is_active"] = False
-            save_shared_links(links_data)
-            return True
+    with _index_lock:
+        links_data = load_shared_links()
+        
+        for link in links_data["links"]:
+            if link["token"] == token:
+                link["is_active"] = False
+                save_shared_links(links_data)
+                return True
     
     return False
 
 def get_active_links():
     """Get all active share links"""
-    links_data = load_shared_links()
-    active_links = [link for link in links_data["links"] if link["is_active"]]
+    maybe_sweep_share_links()
     
-    # Add process information
+    now = datetime.now()
+    active_links = [dict(link) for link in get_token_index().values()
+                    if link.get("is_active") and not _is_link_expired(link, now)]
+    
+    # Add process information (um único mapa de processos para todos os links)
+    processes_by_id = {p["id"]: p for p in st.session_state.data["processes"]}
     for link in active_links:
-        process = get_process_by_id(link["process_id"])
+        process = processes_by_id.get(link["process_id"])
         if process:
             link["process_ref"] = process.get("ref", "")
             link["process_invoice"] = process.get("invoice", "")
@@ -186,11 +297,8 @@ Equipe de Importação
             
             if st.button("Enviar por Email"):
                 if email and subject and message:
-                    result = send_email(email, subject, message)
-                    if result:
-                        st.success("Email enviado com sucesso!")
-                    else:
-                        st.error("Falha ao enviar email. Verifique as configurações.")
+                    enqueue_email(email, subject, message)
+                    st.success("Email colocado na fila de envio!")
                 else:
                     st.warning("Preencha todos os campos obrigatórios.")
         
@@ -205,10 +313,64 @@ Equipe de Importação
             
             if st.button("Enviar por SMS"):
                 if phone and sms_message:
-                    result = send_sms(phone, sms_message)
-                    if result:
-                        st.success("SMS enviado com sucesso!")
-                    else:
-                        st.error("Falha ao enviar SMS. Verifique as configurações e se o serviço Twilio está configurado.")
+                    enqueue_sms(phone, sms_message)
+                    st.success("SMS colocado na fila de envio!")
                 else:
-                    st.warning("Preencha todos os campos obrigatórios.")
\ No newline at end of file
+                    st.warning("Preencha todos os campos obrigatórios.")
+    
+    # Create share links for several processes at once
+    st.subheader("Gerar Links em Lote")
+    
+    batch_ids = st.multiselect("Selecione os processos", options=df["id"].tolist(), key="batch_share_ids")
+    batch_expiry_days = st.number_input("Número de dias de validade", 
+                                     min_value=1, max_value=365, value=30, key="batch_share_expiry")
+    batch_base_url = st.text_input("URL da aplicação (com https://)", 
+                                value="https://meu-sistema-importacao.replit.app", key="batch_share_url")
+    batch_notify = st.checkbox("Enviar os links por email aos clientes responsáveis", key="batch_share_notify")
+    
+    if st.button("Gerar Links em Lote", disabled=not batch_ids):
+        tokens = generate_share_links(batch_ids, batch_expiry_days)
+        batch_df = pd.DataFrame([
+            {"ID do Processo": pid, "Link": f"{batch_base_url}/client?token={token}"}
+            for pid, token in tokens.items()
+        ])
+        st.success(f"{len(tokens)} links gerados com sucesso!")
+        
+        if batch_notify:
+            from components.auth import get_client_for_process
+            
+            emails = []
+            for pid, token in tokens.items():
+                client = get_client_for_process(pid)
+                if client and client.get("email") and "@" in client["email"]:
+                    emails.append({
+                        "channel": "email",
+                        "to": client["email"],
+                        "subject": f"Atualização sobre seu processo de importação {pid}",
+                        "body": (f"Prezado Cliente,\n\nVocê pode acompanhar o status do seu processo "
+                                 f"de importação {pid} no link abaixo:\n\n{batch_base_url}/client?token={token}\n\n"
+                                 f"Este link é válido por {batch_expiry_days} dias.\n\n"
+                                 f"Atenciosamente,\nEquipe de Importação")
+                    })
+            enqueue_many(emails)
+            skipped = len(tokens) - len(emails)
+            st.info(f"{len(emails)} emails colocados na fila de envio."
+                    + (f" {skipped} processos sem cliente com email cadastrado." if skipped else ""))
+        st.dataframe(batch_df, hide_index=True, use_container_width=True)
+        st.download_button(
+            label="📥 Baixar links (CSV)",
+            data=batch_df.to_csv(index=False).encode("utf-8"),
+            file_name="links_compartilhamento.csv",
+            mime="text/csv",
+            on_click="ignore"
+        )
+    
+    # Notification outbox status
+    summary = get_outbox_summary()
+    st.caption(f"Fila de notificações: {summary['pending']} pendentes, "
+               f"{summary['sent']} enviadas, {summary['failed']} com falha.")
+    
+    # Manual cleanup of expired/revoked links
+    if st.button("🧹 Remover links expirados ou revogados"):
+        removed = sweep_share_links()
+        st.success(f"{removed} links removidos.")
@@ -4,9 +4,9 @@ from datetime import datetime
 
 from data import get_process_by_id, add_event
 from components.event_log import display_event_log
-from utils import format_date, get_status_color
-from components.auth import get_users, assign_processes_to_client, get_client_for_process
-from html_generator import generate_process_html, get_download_link
+from view_models import get_detail_view_model
+from utils import lazy_download_button
+from components.auth import get_users, assign_process_to_client, get_client_for_process
 
 def display_detail_view(navigate_function):
     """Display detailed view of a process"""
@@ -19,6 +19,10 @@ def display_detail_view(navigate_function):
             navigate_function("home")
         return
     
+    # Modelo de exibição (memorizado enquanto o processo não for alterado)
+    view_model = get_detail_view_model(process)
+    values = view_model["values"]
+    
     # Botão X para fechar o detalhamento (posicionado no canto superior direito)
     close_btn_col1, close_btn_col2 = st.columns([0.95, 0.05])
     with close_btn_col2:
@@ -31,16 +35,13 @@ def display_detail_view(navigate_function):
     
     with col1:
         # Determinar o tipo de processo (importação ou exportação)
-        processo_tipo = process.get('type', 'importacao')
-        tipo_texto = "Exportação" if processo_tipo == "exportacao" else "Importação"
-        st.header(f"Processo de {tipo_texto} - {process['id']}")
-        st.caption(f"Referência: {process.get('ref', '')}")
+        st.header(f"Processo de {view_model['type_label']} - {process['id']}")
+        st.caption(f"Referência: {values.get('ref', '')}")
     
     with col2:
-        status = process.get('status', 'Em andamento')
-        status_color = get_status_color(status)
+        status = values.get('status', 'Em andamento')
         st.markdown(f"""
-        <div style="background-color: {status_color}; color: white; padding: 10px; 
+        <div style="background-color: {view_model['status_color']}; color: white; padding: 10px; 
         border-radius: 5px; text-align: center; font-weight: bold;">
             {status}
         </div>
@@ -65,47 +66,45 @@ def display_detail_view(navigate_function):
         
         with col1:
             st.markdown('<div class="field-label">Código:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("id", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("id", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Referência:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("ref", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("ref", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">PO:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("po", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("po", "")}</div>', unsafe_allow_html=True)
         
         with col2:
             st.markdown('<div class="field-label">Invoice:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("invoice", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("invoice", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Origem:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("origin", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("origin", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Produto:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("product", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("product", "")}</div>', unsafe_allow_html=True)
         
         with col3:
             st.markdown('<div class="field-label">Tipo de Processo:</div>', unsafe_allow_html=True)
-            tipo_processo = "Importação" if process.get("type", "importacao") == "importacao" else "Exportação"
-            st.markdown(f'<div class="data-value">{tipo_processo}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{view_model["type_label"]}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Tipo de Container:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("container_type", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("container_type", "")}</div>', unsafe_allow_html=True)
             
             # ETA para importação, ETD para exportação
-            if process.get("type", "importacao") == "importacao":
+            if not view_model["is_export"]:
                 st.markdown('<div class="field-label">ETA:</div>', unsafe_allow_html=True)
             else:
                 st.markdown('<div class="field-label">ETD:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{format_date(process.get("eta", ""))}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("eta", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Status:</div>', unsafe_allow_html=True)
-            status_color = get_status_color(process.get('status', ''))
-            st.markdown(f'<div class="status-indicator" style="background-color: {status_color};">{process.get("status", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="status-indicator" style="background-color: {view_model["status_color"]};">{values.get("status", "")}</div>', unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Second row: Shipping info
-        if process.get("type", "importacao") == "importacao":
+        if not view_model["is_export"]:
             st.markdown("""
             <div class="info-panel">
                 <h3 class="info-panel-title">Informações de Embarque</h3>
@@ -119,45 +118,45 @@ def display_detail_view(navigate_function):
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            if process.get("type", "importacao") == "importacao":
+            if not view_model["is_export"]:
                 st.markdown('<div class="field-label">Exportador:</div>', unsafe_allow_html=True)
             else:
                 st.markdown('<div class="field-label">Embarcador:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("exporter", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("exporter", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Navio:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("ship", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("ship", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Agente:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("agent", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("agent", "")}</div>', unsafe_allow_html=True)
         
         with col2:
             st.markdown('<div class="field-label">Número B/L:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("bl_number", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("bl_number", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Container:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("container", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("container", "")}</div>', unsafe_allow_html=True)
             
-            if process.get("type", "importacao") == "importacao":
+            if not view_model["is_export"]:
                 st.markdown('<div class="field-label">Previsão de Chegada:</div>', unsafe_allow_html=True)
             else:
                 st.markdown('<div class="field-label">Deadline:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{format_date(process.get("arrival_date", ""))}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("arrival_date", "")}</div>', unsafe_allow_html=True)
         
         with col3:
             st.markdown('<div class="field-label">Free Time:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("free_time", "")} dias</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("free_time", "")} dias</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Vencimento Free Time:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{format_date(process.get("free_time_expiry", ""))}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("free_time_expiry", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Devolução de Vazio:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{format_date(process.get("empty_return", ""))}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("empty_return", "")}</div>', unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Third row: Storage info
-        if process.get("type", "importacao") == "importacao":
+        if not view_model["is_export"]:
             st.markdown("""
             <div class="info-panel">
                 <h3 class="info-panel-title">Informações de Armazenagem</h3>
@@ -172,27 +171,27 @@ def display_detail_view(navigate_function):
         
         with col1:
             st.markdown('<div class="field-label">Terminal:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("terminal", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("terminal", "")}</div>', unsafe_allow_html=True)
             
-            if process.get("type", "importacao") == "importacao":
+            if not view_model["is_export"]:
                 st.markdown('<div class="field-label">Entrada no Porto/Recinto:</div>', unsafe_allow_html=True)
             else:
                 st.markdown('<div class="field-label">Data de Entrega:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{format_date(process.get("port_entry_date", ""))}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("port_entry_date", "")}</div>', unsafe_allow_html=True)
         
         with col2:
             st.markdown('<div class="field-label">Início do Período Atual:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{format_date(process.get("current_period_start", ""))}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("current_period_start", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Vencimento do Período:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{format_date(process.get("current_period_expiry", ""))}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("current_period_expiry", "")}</div>', unsafe_allow_html=True)
         
         with col3:
             st.markdown('<div class="field-label">Dias Armazenados:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("storage_days", "0")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("storage_days", "0")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Mapa:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("map", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("map", "")}</div>', unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
         
@@ -206,28 +205,28 @@ def display_detail_view(navigate_function):
         
         with col1:
             st.markdown('<div class="field-label">Nota Fiscal:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("invoice_number", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("invoice_number", "")}</div>', unsafe_allow_html=True)
             
-            if process.get("type", "importacao") == "importacao":
+            if not view_model["is_export"]:
                 st.markdown('<div class="field-label">D.I.:</div>', unsafe_allow_html=True)
             else:
                 st.markdown('<div class="field-label">DU-E:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("di", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("di", "")}</div>', unsafe_allow_html=True)
         
         with col2:
             st.markdown('<div class="field-label">Documentos Originais:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{process.get("original_docs", "")}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("original_docs", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Data de Devolução:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{format_date(process.get("return_date", ""))}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("return_date", "")}</div>', unsafe_allow_html=True)
         
         with col3:
-            if process.get("type", "importacao") == "exportacao":
+            if view_model["is_export"]:
                 st.markdown('<div class="field-label">Importador:</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="data-value">{process.get("importer", "")}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="data-value">{values.get("importer", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="field-label">Última Atualização:</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="data-value">{format_date(process.get("last_update", ""))}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="data-value">{values.get("last_update", "")}</div>', unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
         
@@ -237,20 +236,20 @@ def display_detail_view(navigate_function):
             <h3 class="info-panel-title">Observações</h3>
         """, unsafe_allow_html=True)
         
-        observations = process.get('observations', '')
+        observations = values.get('observations', '')
         st.markdown(f'<div class="data-value" style="min-height: 100px;">{observations}</div>', unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Seção específica para Exportação
-        if process.get("type", "importacao") == "exportacao":
+        if view_model["is_export"]:
             st.markdown("""
             <div class="info-panel">
                 <h3 class="info-panel-title">Informações Específicas de Exportação</h3>
             """, unsafe_allow_html=True)
             
             # Informação do tipo de exportação (Marítima/Rodoviária)
-            export_type = process.get("export_type", "Marítima")
+            export_type = values.get("export_type", "Marítima")
             st.markdown(f'<div class="info-type" style="margin-bottom: 15px; font-weight: bold;">Tipo de Exportação: <span style="color: #2c3e50;">{export_type}</span></div>', unsafe_allow_html=True)
             
             col1, col2, col3 = st.columns(3)
@@ -258,24 +257,24 @@ def display_detail_view(navigate_function):
             # Campos básicos de documentação de exportação
             with col1:
                 st.markdown('<div class="field-label">Data de Registro da DU-E:</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="data-value">{format_date(process.get("due_date", ""))}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="data-value">{values.get("due_date", "")}</div>', unsafe_allow_html=True)
                 
                 st.markdown('<div class="field-label">Valor do Despacho:</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="data-value">{process.get("dispatch_value", "")}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="data-value">{values.get("dispatch_value", "")}</div>', unsafe_allow_html=True)
             
             with col2:
                 st.markdown('<div class="field-label">Número do Conhecimento:</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="data-value">{process.get("knowledge_number", "")}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="data-value">{values.get("knowledge_number", "")}</div>', unsafe_allow_html=True)
                 
                 st.markdown('<div class="field-label">Data do Conhecimento:</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="data-value">{format_date(process.get("knowledge_date", ""))}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="data-value">{values.get("knowledge_date", "")}</div>', unsafe_allow_html=True)
             
             with col3:
                 st.markdown('<div class="field-label">Data de Averbação:</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="data-value">{format_date(process.get("endorsement_date", ""))}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="data-value">{values.get("endorsement_date", "")}</div>', unsafe_allow_html=True)
                 
                 st.markdown('<div class="field-label">Drawback:</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="data-value">{process.get("drawback", "")}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="data-value">{values.get("drawback", "")}</div>', unsafe_allow_html=True)
             
             # Subseção específica para Exportação Marítima
             if export_type == "Marítima":
@@ -285,24 +284,24 @@ def display_detail_view(navigate_function):
                 
                 with col1:
                     st.markdown('<div class="field-label">Deadline Carga:</div>', unsafe_allow_html=True)
-                    st.markdown(f'<div class="data-value">{format_date(process.get("cargo_deadline", ""))}</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="data-value">{values.get("cargo_deadline", "")}</div>', unsafe_allow_html=True)
                     
                     st.markdown('<div class="field-label">Deadline Draft:</div>', unsafe_allow_html=True)
-                    st.markdown(f'<div class="data-value">{format_date(process.get("deadline_draft", ""))}</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="data-value">{values.get("deadline_draft", "")}</div>', unsafe_allow_html=True)
                 
                 with col2:
                     st.markdown('<div class="field-label">Terminal de Embarque:</div>', unsafe_allow_html=True)
-                    st.markdown(f'<div class="data-value">{process.get("shipping_terminal", "")}</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="data-value">{values.get("shipping_terminal", "")}</div>', unsafe_allow_html=True)
                     
                     st.markdown('<div class="field-label">Data de Embarque:</div>', unsafe_allow_html=True)
-                    st.markdown(f'<div class="data-value">{format_date(process.get("shipping_date", ""))}</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="data-value">{values.get("shipping_date", "")}</div>', unsafe_allow_html=True)
                 
                 with col3:
                     st.markdown('<div class="field-label">Previsão de Chegada:</div>', unsafe_allow_html=True)
-                    st.markdown(f'<div class="data-value">{format_date(process.get("arrival_forecast", ""))}</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="data-value">{values.get("arrival_forecast", "")}</div>', unsafe_allow_html=True)
                     
                     st.markdown('<div class="field-label">Desembaraço REDEX:</div>', unsafe_allow_html=True)
-                    st.markdown(f'<div class="data-value">{process.get("redex_clearance", "Não")}</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="data-value">{values.get("redex_clearance", "Não")}</div>', unsafe_allow_html=True)
             
             # Subseção específica para Exportação Rodoviária
             elif export_type == "Rodoviária":
@@ -312,15 +311,15 @@ def display_detail_view(navigate_function):
                 
                 with col1:
                     st.markdown('<div class="field-label">Terminal de Cruze:</div>', unsafe_allow_html=True)
-                    st.markdown(f'<div class="data-value">{process.get("cross_terminal", "")}</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="data-value">{values.get("cross_terminal", "")}</div>', unsafe_allow_html=True)
                 
                 with col2:
                     st.markdown('<div class="field-label">Data de Entrega no Cliente:</div>', unsafe_allow_html=True)
-                    st.markdown(f'<div class="data-value">{format_date(process.get("client_delivery_date", ""))}</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="data-value">{values.get("client_delivery_date", "")}</div>', unsafe_allow_html=True)
                 
                 with col3:
                     st.markdown('<div class="field-label">Transportadora:</div>', unsafe_allow_html=True)
-                    st.markdown(f'<div class="data-value">{process.get("carrier", "")}</div>', unsafe_allow_html=True)
+                    st.markdown(f'<div class="data-value">{values.get("carrier", "")}</div>', unsafe_allow_html=True)
             
             # Final da subseção específica para informações de rastreamento de todos os tipos de exportação
             st.markdown('<div style="margin-top: 20px; margin-bottom: 10px; font-weight: bold; border-bottom: 1px solid #eee; padding-bottom: 5px;">Informações de Rastreio</div>', unsafe_allow_html=True)
@@ -329,11 +328,11 @@ def display_detail_view(navigate_function):
             
             with col1:
                 st.markdown('<div class="field-label">Data de Envio dos Originais:</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="data-value">{format_date(process.get("originals_sent_date", ""))}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="data-value">{values.get("originals_sent_date", "")}</div>', unsafe_allow_html=True)
             
             with col2:
                 st.markdown('<div class="field-label">Número do Rastreio:</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="data-value">{process.get("tracking_number", "")}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="data-value">{values.get("tracking_number", "")}</div>', unsafe_allow_html=True)
             
             st.markdown('</div>', unsafe_allow_html=True)
     
@@ -421,12 +420,10 @@ def display_detail_view(navigate_function):
                 if assign_btn:
                     # Obter processos atuais do cliente
                     client = next((c for c in clients if c['id'] == selected_client_id), None)
-                    processes = client.get('processes', [])
                     
-                    # Adicionar processo se ainda não estiver associado
-                    if process_id not in processes:
-                        processes.append(process_id)
-                        success, message = assign_processes_to_client(selected_client_id, processes)
+                    # Adicionar processo se ainda não estiver associado (removendo do cliente anterior)
+                    if not current_client or current_client['id'] != selected_client_id:
+                        success, message = assign_process_to_client(process_id, selected_client_id)
                         if success:
                             st.success(f"Processo atribuído com sucesso a {client['name']}!")
                             # Adicionar evento ao processo
@@ -439,10 +436,8 @@ def display_detail_view(navigate_function):
                 
                 # Remover atribuição
                 if remove_btn and current_client:
-                    processes = current_client.get('processes', [])
-                    if process_id in processes:
-                        processes.remove(process_id)
-                        success, message = assign_processes_to_client(current_client['id'], processes)
+                    if process_id in current_client.get('processes', []):
+                        success, message = assign_process_to_client(process_id, None)
                         if success:
                             st.success(f"Processo removido com sucesso de {current_client['name']}!")
                             # Adicionar evento ao processo
@@ -466,14 +461,15 @@ def display_detail_view(navigate_function):
             navigate_function("add_edit", process_id)
     
     with col3:
-        # Botão para exportar HTML
-        if st.button("📄 Exportar HTML", use_container_width=True):
-            with st.spinner("Gerando arquivo HTML..."):
-                filepath, filename = generate_process_html(process_id, include_details=True)
-                if filepath:
-                    href, name = get_download_link(filepath, filename)
-                    st.success("Arquivo HTML gerado com sucesso!")
-                    st.markdown(
-                        f'<a href="{href}" download="{name}" target="_blank">📥 Baixar arquivo HTML</a>',
-                        unsafe_allow_html=True
-                    )
+        # Relatório HTML gerado apenas quando solicitado (e reaproveitado enquanto o processo não mudar)
+        def build_process_html():
+            from html_generator import get_process_html_bytes
+            return get_process_html_bytes(process_id, include_details=True)[0] or b""
+        
+        lazy_download_button(
+            label="📄 Exportar HTML",
+            build_data=build_process_html,
+            file_name=f"processo_{process_id}_r{view_model['revision']}.html",
+            mime="text/html",
+            key=f"process_html_{process_id}"
+        )
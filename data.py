@@ -3,8 +3,15 @@ import streamlit as st
 import os
 import json
 import uuid
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from utils import format_date
+from profiling import timed, track
+from log_config import get_logger
+import archive_store
+
+logger = get_logger(__name__)
 
 # Default data structure based on the screenshots
 DEFAULT_DATA = {
@@ -95,17 +102,220 @@ DEFAULT_DATA = {
     ]
 }
 
+# Trava do armazenamento: sessões do Streamlit (threads) e scripts/workers (processos)
+STORAGE_LOCK_FILE = "data.json.lock"
+_storage_lock = threading.RLock()
+_storage_lock_depth = 0
+
+# Último número de processo usado em cada ano (alocação de IDs)
+ID_SEQUENCES_FILE = "id_sequences.json"
+
+def _lock_file(lock_file):
+    """Trava o arquivo entre processos (bloqueia até obter a trava)"""
+    if os.name == "nt":
+        import msvcrt
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+def _unlock_file(lock_file):
+    if os.name == "nt":
+        import msvcrt
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+@contextmanager
+def storage_lock():
+    """
+    Trava exclusiva do armazenamento de dados, válida entre threads e entre processos.
+    
+    Pode ser usada de forma aninhada na mesma thread.
+    """
+    global _storage_lock_depth
+    with _storage_lock:
+        if _storage_lock_depth > 0:
+            _storage_lock_depth += 1
+            try:
+                yield
+            finally:
+                _storage_lock_depth -= 1
+            return
+        
+        with open(STORAGE_LOCK_FILE, "a+") as lock_file:
+            _lock_file(lock_file)
+            _storage_lock_depth = 1
+            try:
+                yield
+            finally:
+                _storage_lock_depth = 0
+                _unlock_file(lock_file)
+
+# Trechos de descrição dos eventos que não são exibidos aos clientes
+CLIENT_HIDDEN_EVENT_MARKERS = ("processo atribuído ao cliente", "processo removido do cliente")
+
+def _compute_client_hidden(description):
+    """Verifica se a descrição corresponde a um evento interno (oculto ao cliente)"""
+    desc = description.lower() if isinstance(description, str) else ""
+    return any(marker in desc for marker in CLIENT_HIDDEN_EVENT_MARKERS)
+
+def is_client_hidden_event(event):
+    """Retorna True se o evento não deve ser exibido ao cliente (usa o campo 'client_hidden')"""
+    hidden = event.get("client_hidden")
+    if hidden is None:
+        hidden = _compute_client_hidden(event.get("description"))
+    return hidden
+
+# Funções chamadas a cada alteração de processo (ver register_change_listener)
+_change_listeners = []
+
+def register_change_listener(listener):
+    """
+    Registra uma função chamada a cada alteração de processo.
+    
+    A função recebe um dicionário com as chaves 'action' ('add', 'update', 'delete',
+    'add_event', 'edit_event', 'delete_event', 'archive', 'unarchive' ou
+    'period_rollover'), 'process_id', 'before' e 'after' (cópias do processo antes e
+    depois da alteração, quando aplicável) e 'timestamp'.
+    
+    Args:
+        listener: Função que recebe o dicionário da alteração
+    """
+    if listener not in _change_listeners:
+        _change_listeners.append(listener)
+
+def unregister_change_listener(listener):
+    """Remove uma função registrada com register_change_listener"""
+    if listener in _change_listeners:
+        _change_listeners.remove(listener)
+
+def _bump_revision(process):
+    """Incrementa a revisão do processo (usada pelos caches de exibição e exportação)"""
+    process["revision"] = process.get("revision", 0) + 1
+
+def notify_change(action, process_id, before=None, after=None, **details):
+    """Notifica as funções registradas sobre uma alteração de processo"""
+    if not _change_listeners:
+        return
+    
+    change = {
+        "action": action,
+        "process_id": process_id,
+        "before": before,
+        "after": dict(after) if after is not None else None,
+        "timestamp": datetime.now().isoformat(),
+    }
+    change.update(details)
+    
+    for listener in list(_change_listeners):
+        try:
+            listener(change)
+        except Exception as e:
+            logger.error(f"Erro ao notificar alteração do processo {process_id}: {e}")
+
+# Índices dos processos ativos montados fora de uma sessão do Streamlit (scripts)
+_local_indexes = {}
+_indexes_lock = threading.RLock()
+
+def _index_store():
+    """Índices da sessão atual (st.session_state) ou, fora de uma sessão, do processo"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    if get_script_run_ctx() is None:
+        return _local_indexes
+    if 'process_indexes' not in st.session_state:
+        st.session_state.process_indexes = {}
+    return st.session_state.process_indexes
+
+def get_process_index(name, build, update, processes=None):
+    """
+    Obtém um índice derivado dos processos ativos, mantido pelas notificações de alteração.
+
+    O índice é montado por build na primeira consulta e remontado quando a lista de
+    processos é substituída (ex: recarga dos dados). Depois disso, cada alteração de
+    processo chama update, sem percorrer a lista novamente.
+
+    Cada sessão tem os próprios índices, ligados à sua lista de processos: as alterações
+    feitas por outras sessões não estão nessa lista e não devem alterá-los.
+
+    Args:
+        name: Nome do índice (um por módulo)
+        build: Função que recebe a lista dos processos ativos e devolve o índice
+        update: Função update(índice, ID, processo) chamada a cada alteração; o processo
+            é None quando ele saiu dos ativos (excluído ou arquivado)
+        processes: Lista de processos (padrão: st.session_state.data["processes"])
+
+    Returns:
+        Índice devolvido por build (o chamador deve usá-lo sob index_lock())
+    """
+    if processes is None:
+        processes = st.session_state.data["processes"]
+    with _indexes_lock:
+        store = _index_store()
+        entry = store.get(name)
+        if entry is None or entry[0] is not processes:
+            index = build([p for p in processes if not p.get("archived")])
+            entry = (processes, index, update)
+            store[name] = entry
+        return entry[1]
+
+def index_lock():
+    """Trava dos índices de get_process_index (consultas que leem mais de uma estrutura)"""
+    return _indexes_lock
+
+def _update_process_indexes(change):
+    """Aplica uma alteração de processo aos índices já montados pela sessão"""
+    with _indexes_lock:
+        store = _index_store()
+        if not store:
+            return
+        after = change.get("after")
+        # Processos excluídos ou arquivados saem dos índices (ver archive_store)
+        if change["action"] in ("delete", "archive") or (after is not None and after.get("archived")):
+            after = None
+        for name, (_, index, update) in list(store.items()):
+            try:
+                update(index, change["process_id"], after)
+            except Exception as e:
+                # Descartado: o índice é remontado na próxima consulta
+                del store[name]
+                logger.error(f"Erro ao atualizar o índice {name}: {e}")
+
+register_change_listener(_update_process_indexes)
+
+@timed("data.load_data")
 def load_data():
     """Load data from file or return default data"""
-    try:
+    def read_data_file():
         if os.path.exists("data.json"):
             with open("data.json", "r") as f:
-                data = json.load(f)
-        else:
-            data = DEFAULT_DATA
+                return json.load(f)
+        return DEFAULT_DATA
+    
+    try:
+        data = read_data_file()
+        
+        # Concluir uma movimentação entre ativos e arquivados que tenha sido interrompida.
+        # Sob a trava, uma movimentação em andamento em outra sessão já terminou; data.json
+        # é relido porque ela pode ter sido confirmada depois da leitura acima
+        if archive_store.has_pending_move():
+            with storage_lock():
+                if archive_store.has_pending_move():
+                    data = read_data_file()
+                    archive_store.recover({process["id"] for process in data["processes"]})
+        
+        # Processos arquivados ainda em data.json (dados antigos ou importados) vão para o armazenamento frio
+        archived = [process for process in data["processes"] if process.get("archived")]
+        if archived:
+            move_archived_to_cold(data, archived)
             
         # Garantir que todos os processos tenham campos necessários
         periods_updated = []  # Lista para acompanhar quais processos tiveram períodos atualizados
+        flags_added = False  # Indica se algum evento recebeu a marcação client_hidden
         
         for process in data["processes"]:
             # Garantir que todos os eventos tenham IDs únicos
@@ -119,7 +329,13 @@ def load_data():
                 # Adicionar IDs aos eventos que não têm
                 for i in events_to_update:
                     process["events"][i]["id"] = str(uuid.uuid4())
-                    print(f"ID gerado para evento {i} do processo {process['id']}: {process['events'][i]['id']}")
+                    logger.debug("ID gerado para evento", extra={"fields": {"process_id": process["id"], "event_index": i, "event_id": process["events"][i]["id"]}})
+                
+                # Marcar os eventos internos (ocultos ao cliente) que ainda não têm a marcação
+                for event in process["events"]:
+                    if "client_hidden" not in event:
+                        event["client_hidden"] = _compute_client_hidden(event.get("description"))
+                        flags_added = True
             
             # Garantir que exista o campo 'type' (para compatibilidade)
             if "type" not in process:
@@ -142,6 +358,8 @@ def load_data():
                 
                 needs_update, new_start, new_expiry = check_period_expiry(process)
                 if needs_update and new_start and new_expiry:
+                    before = dict(process)
+                    
                     # Atualizar as datas no processo
                     process["current_period_start"] = new_start
                     process["current_period_expiry"] = new_expiry
@@ -163,12 +381,15 @@ def load_data():
                     
                     process["last_update"] = now
                     periods_updated.append(process["id"])
+                    _bump_revision(process)
+                    notify_change("period_rollover", process["id"], before, process)
             except Exception as e:
-                print(f"Erro ao verificar/atualizar período do processo {process.get('id', 'unknown')}: {e}")
+                logger.error(f"Erro ao verificar/atualizar período do processo {process.get('id', 'unknown')}: {e}")
         
         # Se houve atualizações, salvar os dados
         if periods_updated:
-            print(f"Períodos atualizados para os processos: {', '.join(periods_updated)}")
+            logger.info("Períodos atualizados", extra={"fields": {"process_ids": periods_updated}})
+        if periods_updated or flags_added:
             save_data(data)
         
         return data
@@ -176,22 +397,50 @@ def load_data():
         st.error(f"Erro ao carregar dados: {e}")
         return DEFAULT_DATA
 
+def move_archived_to_cold(data, archived=None):
+    """
+    Move os processos arquivados de data["processes"] para o armazenamento frio (archive_store).
+    
+    O armazenamento frio é gravado antes de data.json: se o processo for interrompido
+    entre as duas gravações, os processos continuam marcados como arquivados em
+    data.json e são movidos novamente no próximo carregamento.
+    
+    Returns:
+        int: Quantidade de processos movidos
+    """
+    if archived is None:
+        archived = [process for process in data["processes"] if process.get("archived")]
+    if not archived:
+        return 0
+    
+    archived_ids = {process["id"] for process in archived}
+    with storage_lock():
+        archive_store.add_processes(archived)
+        data["processes"] = [p for p in data["processes"] if p["id"] not in archived_ids]
+        save_data(data)
+    logger.info("Processos arquivados movidos para o armazenamento frio", extra={"fields": {"count": len(archived)}})
+    return len(archived)
+
 def save_data(data):
     """Save data to file"""
     try:
-        with open("data.json", "w") as f:
-            json.dump(data, f, indent=4)
+        with track("data.save_data") as span, storage_lock():
+            # Gravação atômica: outras sessões nunca leem um arquivo pela metade
+            with open("data.json.tmp", "w") as f:
+                json.dump(data, f, indent=4)
+                span.bytes = f.tell()
+            os.replace("data.json.tmp", "data.json")
         return True
     except Exception as e:
         st.error(f"Erro ao salvar dados: {e}")
         return False
 
 def get_process_by_id(process_id):
-    """Get a process by ID"""
+    """Get a process by ID (processos arquivados são buscados no armazenamento frio)"""
     for process in st.session_state.data["processes"]:
         if process["id"] == process_id:
             return process
-    return None
+    return archive_store.get_archived_process(process_id)
 
 def update_process(process_data):
     """Update an existing process"""
@@ -223,18 +472,47 @@ def update_process(process_data):
                     })
                     
                     process_data["last_update"] = now
-                    print(f"Período atualizado para o processo {process_data['id']}")
+                    logger.info("Período atualizado", extra={"fields": {"process_id": process_data["id"]}})
             except Exception as e:
-                print(f"Erro ao verificar/atualizar período do processo {process_data.get('id', 'unknown')}: {e}")
+                logger.error(f"Erro ao verificar/atualizar período do processo {process_data.get('id', 'unknown')}: {e}")
             
             # Atualizar o processo com os dados atualizados
             st.session_state.data["processes"][i] = process_data
+            process_data["revision"] = process.get("revision", 0) + 1
             save_data(st.session_state.data)
+            notify_change("update", process_data["id"], process, process_data)
             return True
     return False
 
-def add_process(process_data):
-    """Add a new process"""
+def add_process(process_data, allow_duplicates=False):
+    """
+    Add a new process
+    
+    Args:
+        process_data: Dados do processo
+        allow_duplicates: Se False, recusa o processo quando o container ou o B/L já
+            está em outro processo ativo (ver identifier_index.UNIQUE_FIELDS)
+    
+    Returns:
+        tuple: (sucesso, mensagem) - o motivo da recusa ou, no sucesso, um aviso sobre
+            D.I., nota fiscal ou PO repetidos (None se não houver)
+    """
+    import identifier_index
+    
+    duplicates = identifier_index.find_duplicates(process_data)
+    
+    def describe(fields):
+        return "; ".join(f"{identifier_index.IDENTIFIER_FIELDS[field]}: {', '.join(sorted(duplicates[field]))}"
+                         for field in fields)
+    
+    blocking = [field for field in identifier_index.UNIQUE_FIELDS if field in duplicates]
+    if blocking and not allow_duplicates:
+        return False, f"Identificadores já cadastrados em outros processos ({describe(blocking)})"
+    
+    message = None
+    if duplicates:
+        message = f"Identificadores também usados em outros processos ({describe(duplicates)})"
+    
     # Generate a new ID if not provided
     if not process_data.get("id"):
         process_data["id"] = generate_process_id()
@@ -293,11 +571,13 @@ def add_process(process_data):
                     "user": "Sistema"
                 })
         except Exception as e:
-            print(f"Erro ao configurar período inicial: {e}")
+            logger.error(f"Erro ao configurar período inicial: {e}")
     
     st.session_state.data["processes"].append(process_data)
+    _bump_revision(process_data)
     save_data(st.session_state.data)
-    return True
+    notify_change("add", process_data["id"], None, process_data)
+    return True, message
 
 def delete_process(process_id):
     """Delete a process by ID"""
@@ -305,9 +585,63 @@ def delete_process(process_id):
         if process["id"] == process_id:
             del st.session_state.data["processes"][i]
             save_data(st.session_state.data)
+            notify_change("delete", process_id, process, None)
             return True
     return False
 
+def apply_process_changes(updates=None, new_processes=(), deleted_ids=(), source=None):
+    """
+    Aplica em lote alterações vindas de fora do app (ex: sincronização com o Google Sheets)
+    
+    Os dados são gravados uma única vez e cada processo alterado é notificado às
+    funções registradas (com as chaves 'source' e 'batch_last' no dicionário da alteração).
+    
+    Args:
+        updates: Dicionário ID do processo -> {campo: novo valor}
+        new_processes: Processos a adicionar
+        deleted_ids: IDs dos processos a excluir
+        source: Origem das alterações (ex: 'sheets' ou 'status_migration')
+    
+    Returns:
+        int: Quantidade de processos alterados, adicionados ou excluídos
+    """
+    updates = updates or {}
+    deleted_ids = set(deleted_ids)
+    processes = st.session_state.data["processes"]
+    changes = []
+    
+    kept = []
+    for process in processes:
+        process_id = process["id"]
+        if process_id in deleted_ids:
+            changes.append(("delete", process_id, process, None))
+            continue
+        fields = updates.get(process_id)
+        if fields:
+            before = dict(process)
+            process.update(fields)
+            _bump_revision(process)
+            changes.append(("update", process_id, before, process))
+        kept.append(process)
+    
+    for process in new_processes:
+        process = dict(process)
+        process.setdefault("events", [])
+        _bump_revision(process)
+        kept.append(process)
+        changes.append(("add", process["id"], None, process))
+    
+    if not changes:
+        return 0
+    
+    processes[:] = kept
+    save_data(st.session_state.data)
+    # 'batch_last' marca a última alteração do lote (quem grava estado pode gravar só nela)
+    last = len(changes) - 1
+    for i, (action, process_id, before, after) in enumerate(changes):
+        notify_change(action, process_id, before, after, source=source, batch_last=(i == last))
+    return len(changes)
+
 def add_event(process_id, description, user=None):
     """Add an event to a process"""
     if user is None and 'username' in st.session_state:
@@ -323,9 +657,10 @@ def add_event(process_id, description, user=None):
                 "id": event_id,
                 "date": datetime.now().strftime("%d/%m/%Y"),
                 "description": description,
-                "user": user
+                "user": user,
+                "client_hidden": _compute_client_hidden(description)
             }
-            print(f"Adicionando evento com ID {event_id} ao processo {process_id}")
+            logger.debug("Adicionando evento", extra={"fields": {"process_id": process_id, "event_id": event_id}})
             
             # Inicializar a lista de eventos se não existir
             if "events" not in process:
@@ -333,27 +668,28 @@ def add_event(process_id, description, user=None):
                 
             process["events"].append(new_event)
             process["last_update"] = datetime.now().strftime("%d/%m/%Y")
+            _bump_revision(process)
             save_data(st.session_state.data)
+            notify_change("add_event", process_id, None, process, event=new_event)
             return True
     return False
 
 def edit_event(process_id, event_id, new_description):
     """Edit an existing event"""
-    print(f"Tentando editar evento: process_id={process_id}, event_id={event_id}, nova descrição={new_description}")
+    logger.debug("Tentando editar evento", extra={"fields": {"process_id": process_id, "event_id": event_id}})
     for process in st.session_state.data["processes"]:
         if process["id"] == process_id:
-            # Debug: listar todos os eventos neste processo para diagnóstico
-            print(f"Processo {process_id} encontrado, procurando evento {event_id}")
             for i, event in enumerate(process.get("events", [])):
-                print(f"  Evento {i}: id={event.get('id')}, description={event.get('description')}")
-                
                 # Verificar se o ID do evento corresponde
                 current_id = event.get("id")
                 if current_id == event_id:
-                    print(f"  Evento {event_id} encontrado! Atualizando descrição...")
+                    logger.debug("Evento encontrado, atualizando descrição", extra={"fields": {"process_id": process_id, "event_id": event_id, "event_index": i}})
                     event["description"] = new_description
+                    event["client_hidden"] = _compute_client_hidden(new_description)
                     process["last_update"] = datetime.now().strftime("%d/%m/%Y")
+                    _bump_revision(process)
                     save_data(st.session_state.data)
+                    notify_change("edit_event", process_id, None, process, event=dict(event))
                     return True
                 
                 # Verificação alternativa para índices como chaves
@@ -362,36 +698,37 @@ def edit_event(process_id, event_id, new_description):
                         # Se event_id é algo como "event_3", extrair o índice
                         idx = int(event_id.split("_")[1])
                         if idx == i:
-                            print(f"  Correspondência por índice {idx}! Atualizando descrição...")
+                            logger.debug("Evento encontrado por índice, atualizando descrição", extra={"fields": {"process_id": process_id, "event_index": idx}})
                             event["description"] = new_description
+                            event["client_hidden"] = _compute_client_hidden(new_description)
                             # Adicionar um ID ao evento para referência futura
                             event["id"] = str(uuid.uuid4())
                             process["last_update"] = datetime.now().strftime("%d/%m/%Y")
+                            _bump_revision(process)
                             save_data(st.session_state.data)
+                            notify_change("edit_event", process_id, None, process, event=dict(event))
                             return True
                     except (ValueError, IndexError):
                         pass
     
-    print(f"Evento não encontrado para edição")
+    logger.warning("Evento não encontrado para edição", extra={"fields": {"process_id": process_id, "event_id": event_id}})
     return False
 
 def delete_event(process_id, event_id):
     """Delete an event from a process"""
-    print(f"Tentando excluir evento: process_id={process_id}, event_id={event_id}")
+    logger.debug("Tentando excluir evento", extra={"fields": {"process_id": process_id, "event_id": event_id}})
     for process in st.session_state.data["processes"]:
         if process["id"] == process_id:
-            # Debug: listar todos os eventos neste processo para diagnóstico
-            print(f"Processo {process_id} encontrado, procurando evento {event_id}")
             for i, event in enumerate(process.get("events", [])):
-                print(f"  Evento {i}: id={event.get('id')}, description={event.get('description')}")
-                
                 # Verificar se o ID do evento corresponde
                 current_id = event.get("id")
                 if current_id == event_id:
-                    print(f"  Evento {event_id} encontrado! Excluindo...")
-                    del process["events"][i]
+                    logger.debug("Evento encontrado, excluindo", extra={"fields": {"process_id": process_id, "event_id": event_id, "event_index": i}})
+                    removed_event = process["events"].pop(i)
                     process["last_update"] = datetime.now().strftime("%d/%m/%Y")
+                    _bump_revision(process)
                     save_data(st.session_state.data)
+                    notify_change("delete_event", process_id, None, process, event=removed_event)
                     return True
                 
                 # Verificação alternativa para índices como chaves
@@ -400,96 +737,187 @@ def delete_event(process_id, event_id):
                         # Se event_id é algo como "event_3", extrair o índice
                         idx = int(event_id.split("_")[1])
                         if idx == i:
-                            print(f"  Correspondência por índice {idx}! Excluindo...")
-                            del process["events"][i]
+                            logger.debug("Evento encontrado por índice, excluindo", extra={"fields": {"process_id": process_id, "event_index": idx}})
+                            removed_event = process["events"].pop(i)
                             process["last_update"] = datetime.now().strftime("%d/%m/%Y")
+                            _bump_revision(process)
                             save_data(st.session_state.data)
+                            notify_change("delete_event", process_id, None, process, event=removed_event)
                             return True
                     except (ValueError, IndexError):
                         pass
     
-    print(f"Evento não encontrado para exclusão")
+    logger.warning("Evento não encontrado para exclusão", extra={"fields": {"process_id": process_id, "event_id": event_id}})
     return False
 
+def _seed_sequence(year, process_ids):
+    """Maior número já usado no ano (apenas na primeira alocação do ano)"""
+    prefix = str(year)
+    last = 0
+    for process_id in process_ids:
+        process_id = str(process_id)
+        if process_id.startswith(prefix) and process_id[len(prefix):].isdigit():
+            last = max(last, int(process_id[len(prefix):]))
+    return last
+
+def reserve_process_ids(count=1, year=None, processes=None):
+    """
+    Reserva um bloco de IDs de processo consecutivos no formato AAAA0001.
+    
+    O último número usado em cada ano fica em id_sequences.json e é incrementado sob
+    a trava do armazenamento, então sessões e scripts simultâneos nunca recebem o
+    mesmo ID. O custo não depende da quantidade de processos.
+    
+    Args:
+        count: Quantidade de IDs (ex: importações em lote)
+        year: Ano dos IDs (padrão: ano atual)
+        processes: Processos usados para iniciar a sequência do ano, se ainda não
+            existir (padrão: os dados da sessão, ou data.json)
+    
+    Returns:
+        list: IDs reservados, em ordem
+    """
+    if count < 1:
+        return []
+    year = str(year or datetime.now().year)
+    
+    with storage_lock():
+        sequences = {}
+        if os.path.exists(ID_SEQUENCES_FILE):
+            with open(ID_SEQUENCES_FILE, "r") as f:
+                sequences = json.load(f)
+        
+        if year not in sequences:
+            if processes is None:
+                if "data" in st.session_state:
+                    data = st.session_state.data
+                elif os.path.exists("data.json"):
+                    with open("data.json", "r") as f:
+                        data = json.load(f)
+                else:
+                    data = DEFAULT_DATA
+                processes = data.get("processes", [])
+                # Campo antigo com o próximo ID a ser usado
+                next_id = str(data.get("next_id", ""))
+                legacy_last = int(next_id[4:]) - 1 if next_id.startswith(year) and next_id[4:].isdigit() else 0
+            else:
+                legacy_last = 0
+            # IDs ativos e arquivados (os arquivados vêm do índice do armazenamento frio)
+            process_ids = [process.get("id", "") for process in processes]
+            process_ids.extend(archive_store.archived_ids(year))
+            sequences[year] = max(_seed_sequence(year, process_ids), legacy_last)
+        
+        first = sequences[year] + 1
+        sequences[year] += count
+        
+        with open(f"{ID_SEQUENCES_FILE}.tmp", "w") as f:
+            json.dump(sequences, f, indent=4)
+        os.replace(f"{ID_SEQUENCES_FILE}.tmp", ID_SEQUENCES_FILE)
+    
+    return [f"{year}{number:04d}" for number in range(first, first + count)]
+
 def generate_process_id():
     """Generate a new process ID"""
-    year = datetime.now().year
-    existing_ids = [p["id"] for p in st.session_state.data["processes"] if p["id"].startswith(str(year))]
-    if not existing_ids:
-        return f"{year}0001"
-    
-    max_id = max(existing_ids)
-    next_num = int(max_id[4:]) + 1
-    return f"{year}{next_num:04d}"
+    return reserve_process_ids(1)[0]
 
 def archive_process(process_id):
-    """Arquivar um processo pelo ID"""
-    for i, process in enumerate(st.session_state.data["processes"]):
+    """Arquivar um processo pelo ID (o processo é movido para o armazenamento frio)"""
+    processes = st.session_state.data["processes"]
+    for i, process in enumerate(processes):
         if process["id"] == process_id:
-            st.session_state.data["processes"][i]["archived"] = True
+            # Estado anterior, para desfazer a alteração se data.json não for gravado
+            before = dict(process, events=list(process.get("events", [])))
+            process["archived"] = True
             
             # Adicionar evento de arquivamento
             now = datetime.now().strftime("%d/%m/%Y")
             event_id = str(uuid.uuid4())
             
-            if "events" not in st.session_state.data["processes"][i]:
-                st.session_state.data["processes"][i]["events"] = []
+            if "events" not in process:
+                process["events"] = []
                 
-            st.session_state.data["processes"][i]["events"].append({
+            process["events"].append({
                 "id": event_id,
                 "date": now,
                 "description": "Processo arquivado",
                 "user": st.session_state.get('username', 'Admin')
             })
             
-            st.session_state.data["processes"][i]["last_update"] = now
-            save_data(st.session_state.data)
+            process["last_update"] = now
+            _bump_revision(process)
+            
+            # Gravar no armazenamento frio e depois em data.json (ponto de confirmação)
+            with storage_lock():
+                archive_store.begin_move([process_id])
+                archive_store.add_processes([process])
+                del processes[i]
+                if not save_data(st.session_state.data):
+                    # Sem confirmação: retirar a cópia do armazenamento frio e manter o processo ativo
+                    archive_store.remove_processes([process_id])
+                    archive_store.end_move()
+                    process.clear()
+                    process.update(before)
+                    processes.insert(i, process)
+                    return False
+                archive_store.end_move()
+            notify_change("archive", process_id, None, process)
             return True
     return False
 
 def unarchive_process(process_id):
-    """Desarquivar um processo pelo ID"""
-    for i, process in enumerate(st.session_state.data["processes"]):
-        if process["id"] == process_id:
-            st.session_state.data["processes"][i]["archived"] = False
-            
-            # Adicionar evento de desarquivamento
-            now = datetime.now().strftime("%d/%m/%Y")
-            event_id = str(uuid.uuid4())
-            
-            if "events" not in st.session_state.data["processes"][i]:
-                st.session_state.data["processes"][i]["events"] = []
-                
-            st.session_state.data["processes"][i]["events"].append({
-                "id": event_id,
-                "date": now,
-                "description": "Processo reativado",
-                "user": st.session_state.get('username', 'Admin')
-            })
-            
-            st.session_state.data["processes"][i]["last_update"] = now
-            save_data(st.session_state.data)
-            return True
-    return False
+    """Desarquivar um processo pelo ID (o processo volta do armazenamento frio)"""
+    with storage_lock():
+        archived = archive_store.get_archived_process(process_id)
+        if archived is None:
+            return False
+        process = dict(archived)
+        process["archived"] = False
+        
+        # Adicionar evento de desarquivamento
+        now = datetime.now().strftime("%d/%m/%Y")
+        event_id = str(uuid.uuid4())
+        
+        process["events"] = list(process.get("events", []))
+        process["events"].append({
+            "id": event_id,
+            "date": now,
+            "description": "Processo reativado",
+            "user": st.session_state.get('username', 'Admin')
+        })
+        
+        process["last_update"] = now
+        _bump_revision(process)
+        
+        # Gravar em data.json (ponto de confirmação) e depois remover do armazenamento frio
+        archive_store.begin_move([process_id])
+        st.session_state.data["processes"].append(process)
+        if not save_data(st.session_state.data):
+            # Sem confirmação: o processo continua apenas no armazenamento frio
+            st.session_state.data["processes"].remove(process)
+            archive_store.end_move()
+            return False
+        archive_store.remove_processes([process_id])
+        archive_store.end_move()
+    notify_change("unarchive", process_id, None, process)
+    return True
 
-def get_processes_df(include_archived=False, user_id=None, user_role=None, html_export=False):
+@timed("data.get_processes_df")
+def get_processes_df(include_archived=False, user_id=None, user_role=None, html_export=False, archive_years=None):
     """Convert processes to a DataFrame for display
     
     Args:
-        include_archived: Se True, inclui processos arquivados. Se False (padrão), exclui arquivados.
+        include_archived: Se True, retorna os processos arquivados (lidos do armazenamento frio).
+            Se False (padrão), retorna os processos ativos.
         user_id: ID do usuário atual para filtrar processos por permissão
         user_role: Tipo do usuário (admin, manager, client) para aplicar filtros de permissão
         html_export: Se True, ignora as permissões do gestor para a exportação HTML (lógica baseada em cliente)
+        archive_years: Anos dos processos arquivados a carregar (padrão: todos)
     """
-    if not st.session_state.data["processes"]:
-        return pd.DataFrame()
-    
-    # Filtrar processos de acordo com o status de arquivamento
-    filtered_processes = []
-    for process in st.session_state.data["processes"]:
-        is_archived = process.get("archived", False)
-        if (include_archived and is_archived) or (not include_archived and not is_archived):
-            filtered_processes.append(process)
+    # Os arquivados ficam no armazenamento frio e só são lidos quando pedidos
+    if include_archived:
+        filtered_processes = archive_store.load_archived(archive_years)
+    else:
+        filtered_processes = [p for p in st.session_state.data["processes"] if not p.get("archived", False)]
     
     # Filtrar por permissões do usuário
     if user_id and user_role and not html_export:
@@ -501,30 +929,20 @@ def get_processes_df(include_archived=False, user_id=None, user_role=None, html_
             filtered_processes = [p for p in filtered_processes if p.get('created_by') == user_id]
         # Clientes veem apenas os processos atribuídos a eles
         elif user_role == 'client':
-            # Carregando usuários para obter os processos do cliente
-            from components.auth import load_users
-            users_data = load_users()
-            
-            # Encontrar o usuário cliente atual
-            client_user = None
-            for user in users_data.get('users', []):
-                if user.get('id') == user_id and user.get('role') == 'client':
-                    client_user = user
-                    break
+            # Obter os processos do cliente pelo índice de atribuições
+            from components.auth import get_client_process_ids
+            client_processes = get_client_process_ids(user_id)
             
-            if client_user and 'processes' in client_user:
-                # Filtrar apenas os processos atribuídos ao cliente
-                client_processes = client_user.get('processes', [])
-                filtered_processes = [p for p in filtered_processes if p.get('id') in client_processes]
-            else:
-                filtered_processes = []  # Sem processos disponíveis
+            # Filtrar apenas os processos atribuídos ao cliente (sem processos se não houver)
+            filtered_processes = [p for p in filtered_processes if p.get('id') in client_processes]
     
     if not filtered_processes:
         return pd.DataFrame()
-        
-    df = pd.DataFrame(filtered_processes)
     
-    # Verificar e atualizar os períodos, e atualizar os dias armazenados para todos os processos
+    if include_archived:
+        return _format_processes_df(_archived_storage_days(pd.DataFrame(filtered_processes)))
+    
+    # Verificar e atualizar os períodos, e atualizar os dias armazenados para todos os processos ativos
     updated_processes = []
     for i, process in enumerate(st.session_state.data["processes"]):
         # 1. Verificar e atualizar o período atual se necessário
@@ -535,6 +953,8 @@ def get_processes_df(include_archived=False, user_id=None, user_role=None, html_
             if needs_update and new_start and new_expiry:
                 # Verificar se a última data de vencimento já passou
                 try:
+                    before = dict(process)
+                    
                     # Atualizar as datas no processo
                     st.session_state.data["processes"][i]["current_period_start"] = new_start
                     st.session_state.data["processes"][i]["current_period_expiry"] = new_expiry
@@ -555,8 +975,10 @@ def get_processes_df(include_archived=False, user_id=None, user_role=None, html_
                     })
                     
                     updated_processes.append(process["id"])
+                    _bump_revision(process)
+                    notify_change("period_rollover", process["id"], before, process)
                 except Exception as e:
-                    print(f"Erro ao atualizar período: {e}")
+                    logger.error(f"Erro ao atualizar período: {e}")
         
         # 2. Atualizar os dias armazenados
         if "port_entry_date" in process and process["port_entry_date"]:
@@ -579,7 +1001,7 @@ def get_processes_df(include_archived=False, user_id=None, user_role=None, html_
     
     # Informar quais processos foram atualizados
     if updated_processes:
-        print(f"Períodos atualizados para os processos: {', '.join(updated_processes)}")
+        logger.info("Períodos atualizados", extra={"fields": {"process_ids": updated_processes}})
     
     # Salvar os dados para persistir os dias armazenados atualizados
     save_data(st.session_state.data)
@@ -591,6 +1013,21 @@ def get_processes_df(include_archived=False, user_id=None, user_role=None, html_
     if 'storage_days' in df.columns:
         df['storage_days'] = pd.to_numeric(df['storage_days'], errors='coerce').fillna(0).astype(int)
     
+    return _format_processes_df(df)
+
+def _archived_storage_days(df):
+    """Dias armazenados dos processos arquivados, calculados sem alterar o armazenamento frio"""
+    if 'port_entry_date' in df.columns:
+        entry_dates = pd.to_datetime(df['port_entry_date'], dayfirst=True, errors='coerce')
+        days = (pd.Timestamp(datetime.now().date()) - entry_dates).dt.days.clip(lower=0)
+        stored = df['storage_days'] if 'storage_days' in df.columns else 0
+        df['storage_days'] = days.fillna(pd.to_numeric(stored, errors='coerce')).fillna(0).astype(int)
+    elif 'storage_days' in df.columns:
+        df['storage_days'] = pd.to_numeric(df['storage_days'], errors='coerce').fillna(0).astype(int)
+    return df
+
+def _format_processes_df(df):
+    """Colunas de exibição e datas no padrão brasileiro da tabela de processos"""
     # Select columns for main table view (removido "id" conforme solicitado)
     display_columns = [
         "status", "type", "po", "ref", "origin", "product", "eta", 
@@ -0,0 +1,185 @@
+"""
+Índices ordenados por data dos prazos dos processos.
+
+Para cada campo de prazo (DEADLINE_FIELDS) é mantida uma lista ordenada de pares
+(data, ID do processo). Uma consulta por intervalo localiza o início e o fim com
+bisect, sem converter as datas de todos os processos: O(log n + k) para k resultados.
+
+- Processos ativos: um índice por sessão, montado na primeira consulta a partir da
+  lista de processos e atualizado pelas notificações de data.py (data.get_process_index).
+- Processos arquivados: um índice por arquivo (ano) do armazenamento frio, remontado
+  apenas quando o arquivo muda (ver archive_store).
+
+Uso:
+    import deadline_index
+    deadline_index.ids_in_range(date(2025, 3, 1), date(2025, 3, 31))
+    deadline_index.upcoming(days=7)   # [(data, campo, ID), ...]
+"""
+import bisect
+import threading
+from datetime import datetime, timedelta
+
+from aggregates import parse_date
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Campos de prazo indexados -> rótulo exibido
+DEADLINE_FIELDS = {
+    "free_time_expiry": "Vencimento Free Time",
+    "current_period_expiry": "Vencimento do período",
+    "cargo_deadline": "Deadline Carga",
+    "deadline_draft": "Deadline Draft",
+}
+
+# Janela padrão dos próximos prazos (dias a partir de hoje, inclusive)
+UPCOMING_DAYS = 7
+
+_lock = threading.RLock()
+
+# Arquivo (ano) -> (lista de processos lida pelo archive_store, índice)
+_archived = {}
+
+
+class DeadlineIndex:
+    """Listas ordenadas (data, ID) de cada campo de prazo de um conjunto de processos"""
+
+    def __init__(self, processes=()):
+        self._dates = {}
+        entries = {field: [] for field in DEADLINE_FIELDS}
+        for process in processes:
+            dates = self._process_dates(process)
+            if dates:
+                self._dates[process["id"]] = dates
+                for field, date in dates.items():
+                    entries[field].append((date, process["id"]))
+        self._entries = {field: sorted(keys) for field, keys in entries.items()}
+
+    @staticmethod
+    def _process_dates(process):
+        dates = {}
+        for field in DEADLINE_FIELDS:
+            date = parse_date(process.get(field))
+            if date is not None:
+                dates[field] = date
+        return dates
+
+    def remove(self, process_id):
+        """Retira um processo do índice"""
+        for field, date in self._dates.pop(process_id, {}).items():
+            keys = self._entries[field]
+            i = bisect.bisect_left(keys, (date, process_id))
+            if i < len(keys) and keys[i] == (date, process_id):
+                del keys[i]
+
+    def update(self, process):
+        """Inclui um processo ou atualiza as datas dele (apenas os campos que mudaram)"""
+        process_id = process["id"]
+        old = self._dates.get(process_id, {})
+        new = self._process_dates(process)
+        if old == new:
+            return
+        for field in DEADLINE_FIELDS:
+            if old.get(field) == new.get(field):
+                continue
+            keys = self._entries[field]
+            if field in old:
+                i = bisect.bisect_left(keys, (old[field], process_id))
+                if i < len(keys) and keys[i] == (old[field], process_id):
+                    del keys[i]
+            if field in new:
+                bisect.insort(keys, (new[field], process_id))
+        if new:
+            self._dates[process_id] = new
+        else:
+            self._dates.pop(process_id, None)
+
+    def range(self, field, start, end):
+        """Pares (data, ID) do campo com data entre start e end (inclusive), em ordem de data"""
+        keys = self._entries[field]
+        low = bisect.bisect_left(keys, (start,))
+        high = bisect.bisect_left(keys, (end + timedelta(days=1),))
+        return keys[low:high]
+
+
+def _update_index(index, process_id, process):
+    if process is None:
+        index.remove(process_id)
+    else:
+        index.update(process)
+
+
+def get_active_index(processes=None):
+    """Índice dos processos ativos da sessão (remontado quando a lista de processos é substituída)"""
+    from data import get_process_index
+
+    return get_process_index("deadlines", DeadlineIndex, _update_index, processes)
+
+
+def get_archived_index(partition):
+    """Índice dos processos arquivados de um ano (remontado quando o arquivo muda)"""
+    import archive_store
+
+    processes = archive_store.load_partition(partition)
+    with _lock:
+        cached = _archived.get(partition)
+        if cached and cached[0] is processes:
+            return cached[1]
+        index = DeadlineIndex(processes)
+        _archived[partition] = (processes, index)
+        return index
+
+
+def _indexes(processes=None, archived=False, partitions=None):
+    if not archived:
+        return [get_active_index(processes)]
+    import archive_store
+
+    if partitions is None:
+        partitions = archive_store.list_partitions()
+    return [get_archived_index(str(partition)) for partition in partitions]
+
+
+def ids_in_range(start, end, fields=None, processes=None, archived=False, partitions=None):
+    """
+    IDs dos processos com algum prazo entre start e end (inclusive).
+
+    Args:
+        start, end: Datas (date) do intervalo
+        fields: Campos de prazo considerados (padrão: todos de DEADLINE_FIELDS)
+        processes: Lista de processos ativos (padrão: st.session_state.data["processes"])
+        archived: True para consultar os processos arquivados
+        partitions: Anos dos arquivados consultados (padrão: todos)
+
+    Returns:
+        set: IDs dos processos
+    """
+    from data import index_lock
+
+    fields = list(fields or DEADLINE_FIELDS)
+    ids = set()
+    with index_lock(), _lock:
+        for index in _indexes(processes, archived, partitions):
+            for field in fields:
+                ids.update(process_id for _, process_id in index.range(field, start, end))
+    return ids
+
+
+def upcoming(days=UPCOMING_DAYS, fields=None, processes=None):
+    """
+    Prazos dos processos ativos entre hoje e os próximos dias.
+
+    Returns:
+        list: Tuplas (data, campo, ID) em ordem de data
+    """
+    from data import index_lock
+
+    today = datetime.now().date()
+    end = today + timedelta(days=days - 1)
+    rows = []
+    with index_lock():
+        index = get_active_index(processes)
+        for field in fields or DEADLINE_FIELDS:
+            rows.extend((date, field, process_id) for date, process_id in index.range(field, today, end))
+    rows.sort()
+    return rows
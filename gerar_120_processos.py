@@ -5,7 +5,8 @@ import os
 import random
 import json
 from datetime import datetime, timedelta
-from data import load_data, save_data
+from data import load_data, save_data, reserve_process_ids
+import backup_store
 
 def gerar_data_aleatoria(inicio, fim):
     """Gera uma data aleatória entre duas datas"""
@@ -225,37 +226,26 @@ def gerar_120_processos():
     # Carregar dados existentes
     data = load_data()
     
-    # Salvar backup
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_filename = f"data_backup_{timestamp}.json"
+    # Salvar backup (incremental, ver backup_store)
+    backup = backup_store.create_snapshot(data, label="Antes de gerar 120 processos")
     
-    with open(backup_filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-    
-    print(f"Backup dos dados originais salvo em: {backup_filename}")
+    print(f"Backup dos dados originais salvo: {backup['id']}")
     
     # Limpar processos existentes
     # Por padrão, manteremos os processos existentes e apenas adicionaremos novos
     # data['processes'] = []
     
-    # ID base para novos processos
-    base_id = 1000
-    if data['processes']:
-        # Buscar maior ID existente
-        ids = [int(p.get('id', 0)) for p in data['processes'] if p.get('id', "").isdigit()]
-        if ids:
-            base_id = max(ids) + 1
+    # Reservar um bloco de IDs da sequência do ano (sem colisão com outras sessões)
+    ids = reserve_process_ids(120, processes=data['processes'])
     
     # Gerar processos
     print("Gerando 60 processos de importação...")
-    for i in range(60):
-        processo_id = str(base_id + i)
+    for processo_id in ids[:60]:
         processo = gerar_processo_importacao(processo_id)
         data['processes'].append(processo)
     
     print("Gerando 60 processos de exportação...")
-    for i in range(60):
-        processo_id = str(base_id + 60 + i)
+    for processo_id in ids[60:]:
         processo = gerar_processo_exportacao(processo_id)
         data['processes'].append(processo)
     
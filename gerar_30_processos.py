@@ -6,6 +6,7 @@ import json
 import random
 from datetime import datetime, timedelta
 import os
+import backup_store
 
 def gerar_data_aleatoria(inicio, fim):
     """Gera uma data aleatória entre duas datas"""
@@ -262,12 +263,9 @@ def gerar_30_processos():
     
     # Criar backup do arquivo existente (se houver)
     if os.path.exists("data.json"):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"data_backup_{timestamp}.json"
-        with open(backup_filename, "w") as f:
-            with open("data.json", "r") as original:
-                f.write(original.read())
-            print(f"Backup criado em {backup_filename}")
+        with open("data.json", "r") as original:
+            backup = backup_store.create_snapshot(json.load(original), label=f"Antes de executar {os.path.basename(__file__)}")
+        print(f"Backup criado: {backup['id']}")
     
     # Gerar processos
     processos = []
@@ -2,13 +2,24 @@
 Gerador de HTML para exportar processos
 """
 import os
+import logging
+import io
 import base64
+import zipfile
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from data import get_process_by_id, get_processes_df
-from utils import format_date, get_status_color
+from utils import format_date
+from status_registry import get_registry
 from custom_html_styles import get_html_styles
 from html_export_styles import get_basic_styles
 from inline_mobile_styles import get_mobile_styles
+from profiling import timed, track
+from view_models import get_detail_view_model
+from log_config import get_logger
+
+logger = get_logger(__name__)
 
 
 def get_base64_encoded_image(image_path):
@@ -30,60 +41,23 @@ def get_base64_encoded_image(image_path):
 HTML_EXPORTS_DIR = "html_exports"
 
 
-def generate_process_html(process_id, include_details=True):
-    """
-    Gera um arquivo HTML contendo as informações do processo especificado.
-    
-    Args:
-        process_id: ID do processo
-        include_details: Se True, inclui a seção de detalhes
-        
-    Returns:
-        tuple: (caminho do arquivo gerado, URL relativo)
-    """
-    process = get_process_by_id(process_id)
-    if not process:
-        return None, None
-    
-    # Criar diretório de exportação se não existir
-    if not os.path.exists(HTML_EXPORTS_DIR):
-        os.makedirs(HTML_EXPORTS_DIR)
-        
-    # Nome do arquivo
-    filename = f"processo_{process_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-    filepath = os.path.join(HTML_EXPORTS_DIR, filename)
-    
-    # Status
-    status = process.get('status', 'Em andamento')
-    status_color = get_status_color(status)
-    # Garante que status não é None para usar upper()
-    if status is None:
-        status = ""
-    
-    # Criar HTML
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Processo de Importação - {process_id}</title>
-        <style>
-            body {{
+# Folha de estilos dos relatórios individuais (sem a cor do status, aplicada no próprio elemento)
+_PROCESS_REPORT_STYLES = """
+            body {
                 font-family: Arial, sans-serif;
                 margin: 0;
                 padding: 20px;
                 color: #333;
-            }}
-            .container {{
+            }
+            .container {
                 max-width: 1200px;
                 margin: 0 auto;
                 padding: 20px;
                 background: #fff;
                 box-shadow: 0 0 10px rgba(0, 0, 0, 0.1);
                 border-radius: 5px;
-            }}
-            .header {{
+            }
+            .header {
                 display: flex;
                 justify-content: space-between;
                 align-items: center;
@@ -93,9 +67,8 @@ def generate_process_html(process_id, include_details=True):
                 box-shadow: 0 1px 3px rgba(0,0,0,0.08); /* Sombra muito sutil na tabela inteira */
                 border-bottom: 1px solid #eee;
                 padding-bottom: 10px;
-            }}
-            .status-badge {{
-                background-color: {status_color};
+            }
+            .status-badge {
                 color: white;
                 padding: 6px 15px;
                 border-radius: 50px;
@@ -107,15 +80,15 @@ def generate_process_html(process_id, include_details=True):
                 font-size: 0.9em;
                 letter-spacing: 0.5px;
                 text-transform: uppercase;
-            }}
+            }
             /* Estilo para os contadores de status */
-            .status-counts-container {{
+            .status-counts-container {
                 display: flex;
                 flex-wrap: wrap;
                 gap: 10px;
                 margin-bottom: 15px;
-            }}
-            .status-count-item {{
+            }
+            .status-count-item {
                 padding: 6px 15px;
                 border-radius: 20px;
                 font-size: 0.9em;
@@ -128,13 +101,13 @@ def generate_process_html(process_id, include_details=True):
                 box-shadow: 0 2px 4px rgba(0,0,0,0.1);
                 transition: all 0.2s ease;
                 margin: 2px;
-            }}
+            }
             
-            .status-count-item:hover {{
+            .status-count-item:hover {
                 transform: translateY(-2px);
                 box-shadow: 0 4px 8px rgba(0,0,0,0.15);
-            }}
-            .status-count-badge {{
+            }
+            .status-count-badge {
                 background: rgba(255,255,255,0.3);
                 padding: 2px 8px;
                 border-radius: 12px;
@@ -144,95 +117,130 @@ def generate_process_html(process_id, include_details=True):
                 color: white;
                 font-weight: bold;
                 font-size: 0.85em;
-            }}
-            .section {{
+            }
+            .section {
                 margin-bottom: 30px;
                 padding: 15px;
                 background: #f9f9f9;
                 border-radius: 5px;
                 border-left: 4px solid #2c3e50;
-            }}
-            .section-title {{
+            }
+            .section-title {
                 margin-top: 0;
                 color: #2c3e50;
                 font-size: 1.2em;
-            }}
-            .grid {{
+            }
+            .grid {
                 display: grid;
                 grid-template-columns: repeat(3, 1fr);
                 gap: 15px;
-            }}
-            .grid-item {{
+            }
+            .grid-item {
                 margin-bottom: 10px;
-            }}
-            .label {{
+            }
+            .label {
                 font-weight: bold;
                 font-size: 0.9em;
                 color: #555;
                 margin-bottom: 5px;
-            }}
-            .value {{
+            }
+            .value {
                 background: #f5f5f5;
                 padding: 8px;
                 border-radius: 4px;
                 font-size: 0.95em;
-            }}
-            .logo {{
+            }
+            .logo {
                 width: 150px;
-            }}
-            .footer {{
+            }
+            .footer {
                 text-align: center;
                 margin-top: 30px;
                 font-size: 0.8em;
                 color: #777;
                 border-top: 1px solid #eee;
                 padding-top: 10px;
-            }}
-            table {{
+            }
+            table {
                 width: 100%;
                 border-collapse: collapse;
                 margin-bottom: 20px;
                 border-radius: 4px;
                 overflow: hidden; /* Para garantir que as bordas arredondadas funcionem */
                 box-shadow: 0 1px 3px rgba(0,0,0,0.08); /* Sombra muito sutil na tabela inteira */
-            }}
-            table th, table td {{
+            }
+            table th, table td {
                 padding: 8px 10px;
                 text-align: left;
                 border-bottom: 1px solid #eee;
-            }}
-            table th {{
+            }
+            table th {
                 background: #f5f5f5;
                 font-weight: bold;
-            }}
-            @media print {{
-                body {{
+            }
+            @media print {
+                body {
                     padding: 0;
                     font-size: 12pt;
-                }}
-                .container {{
+                }
+                .container {
                     box-shadow: none;
                     max-width: 100%;
-                }}
-                .section {{
+                }
+                .section {
                     page-break-inside: avoid;
-                }}
-                .no-print {{
+                }
+                .no-print {
                     display: none;
-                }}
-            }}
-        </style>
-    </head>
-    <body>
+                }
+            }
+"""
+
+
+def get_process_report_styles():
+    """
+    Retorna a folha de estilos dos relatórios individuais de processo.
+    
+    Returns:
+        str: CSS compartilhado por todos os relatórios individuais
+    """
+    return _PROCESS_REPORT_STYLES
+
+
+def _render_process_section(process, include_details=True):
+    """
+    Gera o conteúdo HTML (sem cabeçalho do documento) de um processo.
+    
+    Args:
+        process: Dicionário do processo
+        include_details: Se True, inclui observações e eventos
+        
+    Returns:
+        str: Bloco HTML do processo
+    """
+    process_id = process.get('id', '')
+    
+    # Modelo de exibição (datas formatadas, cor do status e eventos visíveis ao cliente)
+    view_model = get_detail_view_model(process)
+    values = view_model["values"]
+    
+    # Status
+    status = process.get('status', 'Em andamento')
+    status_color = view_model["status_color"]
+    # Garante que status não é None para usar upper()
+    if status is None:
+        status = ""
+    
+    html = f"""
         <div class="container">
             <!-- Logo removido dos relatórios individuais conforme solicitado -->
             <div class="header">
                 <div>
-                    <h1>Processo de {"Exportação" if process.get('type', '') == "exportacao" else "Importação"} - {process_id}</h1>
-                    <p>Referência: {process.get('ref', '')}</p>
+                    <h1>Processo de {view_model["type_label"]} - {process_id}</h1>
+                    <p>Referência: {values.get('ref', '')}</p>
                 </div>
                 <div>
-                    <div class="status-badge">{status.upper() if status else ''}</div>
+                    <div class="status-badge" style="background-color: {status_color};">{status.upper() if status else ''}</div>
                 </div>
             </div>
     """
@@ -244,39 +252,39 @@ def generate_process_html(process_id, include_details=True):
                 <div class="grid">
                     <div class="grid-item">
                         <div class="label">Código</div>
-                        <div class="value">{process.get('id', '')}</div>
+                        <div class="value">{values.get('id', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Referência</div>
-                        <div class="value">{process.get('ref', '')}</div>
+                        <div class="value">{values.get('ref', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">PO</div>
-                        <div class="value">{process.get('po', '')}</div>
+                        <div class="value">{values.get('po', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Invoice</div>
-                        <div class="value">{process.get('invoice', '')}</div>
+                        <div class="value">{values.get('invoice', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Origem</div>
-                        <div class="value">{process.get('origin', '')}</div>
+                        <div class="value">{values.get('origin', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Produto</div>
-                        <div class="value">{process.get('product', '')}</div>
+                        <div class="value">{values.get('product', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Tipo de Processo</div>
-                        <div class="value">{"Exportação" if process.get('type', '') == "exportacao" else "Importação"}</div>
+                        <div class="value">{view_model["type_label"]}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">ETA</div>
-                        <div class="value">{format_date(process.get('eta', ''))}</div>
+                        <div class="value">{values.get('eta', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Status</div>
-                        <div class="value">{process.get('status', '')}</div>
+                        <div class="value">{values.get('status', '')}</div>
                     </div>
                 </div>
             </div>
@@ -285,43 +293,43 @@ def generate_process_html(process_id, include_details=True):
     # Seção de Embarque
     html += f"""
             <div class="section">
-                <h2 class="section-title">{"Informações de Exportação" if process.get('type', '') == "exportacao" else "Informações de Embarque"}</h2>
+                <h2 class="section-title">{"Informações de Exportação" if view_model["is_export"] else "Informações de Embarque"}</h2>
                 <div class="grid">
                     <div class="grid-item">
-                        <div class="label">{"Embarcador" if process.get('type', '') == "exportacao" else "Exportador"}</div>
-                        <div class="value">{process.get('exporter', '')}</div>
+                        <div class="label">{"Embarcador" if view_model["is_export"] else "Exportador"}</div>
+                        <div class="value">{values.get('exporter', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Navio</div>
-                        <div class="value">{process.get('ship', '')}</div>
+                        <div class="value">{values.get('ship', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Agente</div>
-                        <div class="value">{process.get('agent', '')}</div>
+                        <div class="value">{values.get('agent', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Número B/L</div>
-                        <div class="value">{process.get('bl_number', '')}</div>
+                        <div class="value">{values.get('bl_number', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Container</div>
-                        <div class="value">{process.get('container', '')}</div>
+                        <div class="value">{values.get('container', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Previsão de Chegada</div>
-                        <div class="value">{format_date(process.get('arrival_date', ''))}</div>
+                        <div class="value">{values.get('arrival_date', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Free Time</div>
-                        <div class="value">{process.get('free_time', '')} dias</div>
+                        <div class="value">{values.get('free_time', '')} dias</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Vencimento Free Time</div>
-                        <div class="value">{format_date(process.get('free_time_expiry', ''))}</div>
+                        <div class="value">{values.get('free_time_expiry', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Devolução de Vazio</div>
-                        <div class="value">{format_date(process.get('empty_return', ''))}</div>
+                        <div class="value">{values.get('empty_return', '')}</div>
                     </div>
                 </div>
             </div>
@@ -330,31 +338,31 @@ def generate_process_html(process_id, include_details=True):
     # Seção de Armazenagem
     html += f"""
             <div class="section">
-                <h2 class="section-title">{"Informações do Terminal de Exportação" if process.get('type', '') == "exportacao" else "Informações de Armazenagem"}</h2>
+                <h2 class="section-title">{"Informações do Terminal de Exportação" if view_model["is_export"] else "Informações de Armazenagem"}</h2>
                 <div class="grid">
                     <div class="grid-item">
-                        <div class="label">{"Terminal de Exportação" if process.get('type', '') == "exportacao" else "Terminal"}</div>
-                        <div class="value">{process.get('terminal', '')}</div>
+                        <div class="label">{"Terminal de Exportação" if view_model["is_export"] else "Terminal"}</div>
+                        <div class="value">{values.get('terminal', '')}</div>
                     </div>
                     <div class="grid-item">
-                        <div class="label">{"Entrada no Terminal" if process.get('type', '') == "exportacao" else "Entrada no Porto/Recinto"}</div>
-                        <div class="value">{format_date(process.get('port_entry_date', ''))}</div>
+                        <div class="label">{"Entrada no Terminal" if view_model["is_export"] else "Entrada no Porto/Recinto"}</div>
+                        <div class="value">{values.get('port_entry_date', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Início do Período Atual</div>
-                        <div class="value">{format_date(process.get('current_period_start', ''))}</div>
+                        <div class="value">{values.get('current_period_start', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Vencimento do Período</div>
-                        <div class="value">{format_date(process.get('current_period_expiry', ''))}</div>
+                        <div class="value">{values.get('current_period_expiry', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Dias Armazenados</div>
-                        <div class="value">{process.get('storage_days', '0')}</div>
+                        <div class="value">{values.get('storage_days', '0')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Mapa</div>
-                        <div class="value">{process.get('map', '')}</div>
+                        <div class="value">{values.get('map', '')}</div>
                     </div>
                 </div>
             </div>
@@ -367,34 +375,34 @@ def generate_process_html(process_id, include_details=True):
                 <div class="grid">
                     <div class="grid-item">
                         <div class="label">Nota Fiscal</div>
-                        <div class="value">{process.get('invoice_number', '')}</div>
+                        <div class="value">{values.get('invoice_number', '')}</div>
                     </div>
                     <div class="grid-item">
-                        <div class="label">{"DU-E" if process.get('type', '') == "exportacao" else "D.I."}</div>
-                        <div class="value">{process.get('di', '')}</div>
+                        <div class="label">{"DU-E" if view_model["is_export"] else "D.I."}</div>
+                        <div class="value">{values.get('di', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Documentos Originais</div>
-                        <div class="value">{process.get('original_docs', '')}</div>
+                        <div class="value">{values.get('original_docs', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Data de Devolução</div>
-                        <div class="value">{format_date(process.get('return_date', ''))}</div>
+                        <div class="value">{values.get('return_date', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Última Atualização</div>
-                        <div class="value">{format_date(process.get('last_update', ''))}</div>
+                        <div class="value">{values.get('last_update', '')}</div>
                     </div>
                     {f'''
                     <div class="grid-item">
                         <div class="label">Importador</div>
-                        <div class="value">{process.get('importer', '')}</div>
+                        <div class="value">{values.get('importer', '')}</div>
                     </div>
                     <div class="grid-item">
                         <div class="label">Deadline</div>
-                        <div class="value">{format_date(process.get('deadline', ''))}</div>
+                        <div class="value">{values.get('deadline', '')}</div>
                     </div>
-                    ''' if process.get('type', '') == "exportacao" else ''}
+                    ''' if view_model["is_export"] else ''}
                 </div>
             </div>
     """
@@ -405,7 +413,7 @@ def generate_process_html(process_id, include_details=True):
                 <div class="section">
                     <h2 class="section-title">Observações</h2>
                     <div class="value" style="min-height: 60px;">
-                        {process.get('observations', '')}
+                        {values.get('observations', '')}
                     </div>
                 </div>
         """
@@ -426,16 +434,15 @@ def generate_process_html(process_id, include_details=True):
                         <tbody>
             """
             
-            for event in process['events']:
-                # Filtrar eventos de atribuição
-                if not "atribuído" in event.get('description', '').lower():
-                    html += f"""
-                            <tr>
-                                <td>{event.get('date', '')}</td>
-                                <td>{event.get('description', '')}</td>
-                                <td>{event.get('user', '')}</td>
-                            </tr>
-                    """
+            # Eventos de atribuição já filtrados no modelo de exibição
+            for event in view_model["client_events"]:
+                html += f"""
+                        <tr>
+                            <td>{event.get('date', '')}</td>
+                            <td>{event.get('description', '')}</td>
+                            <td>{event.get('user', '')}</td>
+                        </tr>
+                """
             
             html += """
                         </tbody>
@@ -450,17 +457,192 @@ def generate_process_html(process_id, include_details=True):
                 <p>Documento gerado em {current_date} | JGR Broker</p>
             </div>
         </div>
+    """
+    
+    return html
+
+
+def _wrap_report_document(title, content):
+    """Monta o documento HTML completo com a folha de estilos compartilhada"""
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>{title}</title>
+        <style>{get_process_report_styles()}        </style>
+    </head>
+    <body>
+{content}
     </body>
     </html>
     """
+
+
+def render_process_html(process, include_details=True):
+    """
+    Gera o documento HTML completo de um processo.
+    
+    Args:
+        process: Dicionário do processo
+        include_details: Se True, inclui observações e eventos
+        
+    Returns:
+        str: Documento HTML
+    """
+    return _wrap_report_document(
+        f"Processo de Importação - {process.get('id', '')}",
+        _render_process_section(process, include_details)
+    )
+
+
+# Relatórios individuais já gerados: (ID do processo, include_details) -> bytes,
+# válidos enquanto o modelo de exibição do processo for o mesmo (mesma revisão)
+MAX_CACHED_PROCESS_EXPORTS = 128
+_process_html_cache = OrderedDict()
+_process_html_cache_lock = threading.Lock()
+
+
+def get_process_html_bytes(process_id, include_details=True):
+    """
+    Obtém o relatório HTML de um processo em memória, reaproveitando o último
+    relatório gerado enquanto o processo não for alterado.
+    
+    Args:
+        process_id: ID do processo
+        include_details: Se True, inclui observações e eventos
+        
+    Returns:
+        tuple: (conteúdo em bytes, nome do arquivo) ou (None, None)
+    """
+    process = get_process_by_id(process_id)
+    if not process:
+        return None, None
+    
+    view_model = get_detail_view_model(process)
+    key = (process_id, include_details)
+    
+    with _process_html_cache_lock:
+        entry = _process_html_cache.get(key)
+        if entry is not None and entry["view_model"] is view_model:
+            _process_html_cache.move_to_end(key)
+        else:
+            entry = None
+    
+    if entry is None:
+        # Gerado fora do lock: outras sessões continuam lendo o cache enquanto isso
+        with track("html_generator.render_process_html") as span:
+            html_bytes = render_process_html(process, include_details).encode('utf-8')
+            span.bytes = len(html_bytes)
+        entry = {"view_model": view_model, "bytes": html_bytes}
+        with _process_html_cache_lock:
+            _process_html_cache[key] = entry
+            _process_html_cache.move_to_end(key)
+            while len(_process_html_cache) > MAX_CACHED_PROCESS_EXPORTS:
+                _process_html_cache.popitem(last=False)
+    
+    filename = f"processo_{process_id}_r{view_model['revision']}.html"
+    return entry["bytes"], filename
+
+
+@timed("html_generator.generate_process_html")
+def generate_process_html(process_id, include_details=True):
+    """
+    Gera um arquivo HTML contendo as informações do processo especificado.
+    
+    O arquivo só é gravado novamente se o processo tiver sido alterado desde a
+    última exportação.
+    
+    Args:
+        process_id: ID do processo
+        include_details: Se True, inclui a seção de detalhes
+        
+    Returns:
+        tuple: (caminho do arquivo gerado, URL relativo)
+    """
+    html_bytes, filename = get_process_html_bytes(process_id, include_details)
+    if html_bytes is None:
+        return None, None
+    
+    # Criar diretório de exportação se não existir
+    if not os.path.exists(HTML_EXPORTS_DIR):
+        os.makedirs(HTML_EXPORTS_DIR)
+    
+    if not include_details:
+        filename = filename.replace(".html", "_resumo.html")
+    filepath = os.path.join(HTML_EXPORTS_DIR, filename)
     
     # Salvar arquivo
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html)
+    if not os.path.exists(filepath):
+        with open(filepath, 'wb') as f:
+            f.write(html_bytes)
     
     return filepath, filename
 
 
+@timed("html_generator.generate_processes_report_html")
+def generate_processes_report_html(process_ids, include_details=True):
+    """
+    Gera um único documento HTML com o relatório individual de vários processos,
+    com a folha de estilos e o logo incluídos uma única vez.
+    
+    Args:
+        process_ids: Lista de IDs de processos
+        include_details: Se True, inclui observações e eventos
+        
+    Returns:
+        tuple: (conteúdo em bytes, nome do arquivo) ou (None, None)
+    """
+    processes = [p for p in (get_process_by_id(pid) for pid in process_ids) if p]
+    if not processes:
+        return None, None
+    
+    logo_base64 = get_jgr_logo_base64()
+    parts = []
+    if logo_base64:
+        parts.append(f'<div style="text-align: center; margin-bottom: 20px;">'
+                     f'<img src="data:image/png;base64,{logo_base64}" class="logo" alt="JGR Broker"></div>')
+    
+    # Cada processo em uma página ao imprimir
+    page_break = '<div style="page-break-after: always;"></div>'
+    parts.append(page_break.join(_render_process_section(p, include_details) for p in processes))
+    
+    html = _wrap_report_document(f"Relatório de Processos - {len(processes)} processos", "\n".join(parts))
+    filename = f"processos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
+    return html.encode('utf-8'), filename
+
+
+def generate_processes_html_zip(process_ids, include_details=True):
+    """
+    Gera um arquivo ZIP com o relatório individual de cada processo, reaproveitando
+    os relatórios em cache dos processos que não foram alterados.
+    
+    Args:
+        process_ids: Lista de IDs de processos
+        include_details: Se True, inclui observações e eventos
+        
+    Returns:
+        tuple: (conteúdo em bytes, nome do arquivo) ou (None, None)
+    """
+    buffer = io.BytesIO()
+    count = 0
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for process_id in process_ids:
+            html_bytes, filename = get_process_html_bytes(process_id, include_details)
+            if html_bytes is not None:
+                zf.writestr(filename, html_bytes)
+                count += 1
+    
+    if not count:
+        return None, None
+    return buffer.getvalue(), f"processos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+
+
+# Logo codificado em base64: (mtime do arquivo, conteúdo)
+_jgr_logo_cache = None
+
+
 def get_jgr_logo_base64():
     """
     Retorna o logo da JGR Broker em formato base64.
@@ -469,15 +651,20 @@ def get_jgr_logo_base64():
     Returns:
         str: String codificada em base64 do logo
     """
-    import base64
+    global _jgr_logo_cache
     logo_path = "assets/images/jgr_logo.png"
     if not os.path.exists(logo_path):
         return ""
-        
-    with open(logo_path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode('utf-8')
+    
+    # Reaproveitar a codificação enquanto o arquivo do logo não mudar
+    mtime = os.path.getmtime(logo_path)
+    if _jgr_logo_cache is None or _jgr_logo_cache[0] != mtime:
+        with open(logo_path, "rb") as img_file:
+            _jgr_logo_cache = (mtime, base64.b64encode(img_file.read()).decode('utf-8'))
+    return _jgr_logo_cache[1]
 
 
+@timed("html_generator.generate_processes_table_html")
 def generate_processes_table_html(filtered_df=None, process_ids=None, include_details=True, client_filter=None, client_name=None, client_logo=None, archived=False, user_role=None):
     """
     Gera um arquivo HTML contendo uma tabela de processos com funcionalidade de expansão de detalhes.
@@ -504,15 +691,12 @@ def generate_processes_table_html(filtered_df=None, process_ids=None, include_de
     
     # Filtrar por cliente (novo)
     if client_filter:
-        from components.auth import get_users
-        users = get_users()
-        
-        # Encontrar o cliente pelo ID
-        client = next((u for u in users if u['id'] == client_filter), None)
+        from components.auth import get_client_process_ids
+        client_processes = get_client_process_ids(client_filter)
         
-        if client and 'processes' in client and client['processes']:
+        if client_processes:
             # Filtrar processos pelo cliente selecionado
-            filtered_df = filtered_df[filtered_df['id'].isin(client['processes'])]
+            filtered_df = filtered_df[filtered_df['id'].isin(client_processes)]
     
     # Verificar se há dados
     if filtered_df.empty:
@@ -983,21 +1167,19 @@ def generate_processes_table_html(filtered_df=None, process_ids=None, include_de
     # Adicionar cada processo como uma linha da tabela
     process_details_html = ""
     
-    # Registrar todos os status para debug
-    status_counts = {}
-    for _, row in filtered_df.iterrows():
-        row_status = row.get('status', '')
-        if row_status in status_counts:
-            status_counts[row_status] += 1
-        else:
-            status_counts[row_status] = 1
+    # Status e cores de todas as linhas em um único mapeamento
+    registry = get_registry()
+    statuses = registry.status_column(filtered_df)
+    status_colors = registry.map_colors(statuses)
     
-    print(f"Status encontrados no DataFrame: {status_counts}")
+    # Registrar todos os status para debug (contagem apenas com o log de debug ativo)
+    if logger.isEnabledFor(logging.DEBUG):
+        status_counts = statuses.value_counts(dropna=False).to_dict()
+        logger.debug("Status encontrados no DataFrame", extra={"fields": {"status_counts": status_counts}})
     
-    for _, row in filtered_df.iterrows():
+    for (_, row), status_color in zip(filtered_df.iterrows(), status_colors):
         process_id = row['id']
         status = row.get('status', '')
-        status_color = get_status_color(status)
         # Garante que status não é None para usar upper()
         if status is None:
             status = ""
@@ -2083,8 +2265,10 @@ def generate_processes_table_html(filtered_df=None, process_ids=None, include_de
     """
     
     # Salvar arquivo
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html)
+    with track("html_generator.write_table_html") as span:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(html)
+            span.bytes = f.tell()
     
     return filepath, filename
 
@@ -0,0 +1,196 @@
+"""
+Índices de busca exata pelos identificadores dos processos.
+
+Operadores localizam processos pelo container, B/L, D.I., nota fiscal ou PO. Este
+módulo mantém, para cada um desses campos, um dicionário valor normalizado -> IDs dos
+processos, de modo que a busca rápida da página inicial e a verificação de duplicados
+em data.add_process não percorrem a tabela. Apenas container e B/L (UNIQUE_FIELDS)
+impedem o cadastro; os demais identificadores repetidos geram um aviso.
+
+Os valores são normalizados (maiúsculas, apenas letras e números): "TTNU 121234-2" e
+"ttnu1212342" são o mesmo container. Um campo com vários valores separados por
+vírgula, ponto e vírgula ou quebra de linha é indexado por cada um deles.
+
+- Processos ativos: um índice por sessão, montado na primeira consulta e atualizado
+  pelas notificações de data.py (data.get_process_index).
+- Processos arquivados: um índice por arquivo (ano) do armazenamento frio, remontado
+  apenas quando o arquivo muda; consultado somente pela busca (find).
+
+Uso:
+    import identifier_index
+    identifier_index.find("TTNU1212342")              # {"20250001"}
+    identifier_index.find_duplicates(process_data)    # {"container": {"20250001"}}
+"""
+import re
+import threading
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Campos indexados -> rótulo exibido
+IDENTIFIER_FIELDS = {
+    "container": "Container",
+    "bl_number": "B/L",
+    "di": "D.I./DU-E",
+    "invoice_number": "Nota Fiscal",
+    "po": "PO",
+}
+
+# Campos que não podem se repetir entre processos ativos (ver data.add_process)
+UNIQUE_FIELDS = ("container", "bl_number")
+
+_SEPARATORS = re.compile(r"[,;\n]")
+_NOT_ALNUM = re.compile(r"[^0-9A-Z]")
+
+_lock = threading.RLock()
+
+# Arquivo (ano) -> (lista de processos lida pelo archive_store, índice)
+_archived = {}
+
+
+def normalize(value):
+    """Valor normalizado de um identificador ('' se vazio)"""
+    if value is None or value != value:  # None ou NaN
+        return ""
+    return _NOT_ALNUM.sub("", str(value).upper())
+
+
+def _keys(process, field):
+    value = process.get(field)
+    if value is None or value != value:
+        return set()
+    keys = {normalize(part) for part in _SEPARATORS.split(str(value))}
+    keys.discard("")
+    return keys
+
+
+class IdentifierIndex:
+    """Dicionários valor normalizado -> IDs de cada campo identificador de um conjunto de processos"""
+
+    def __init__(self, processes=()):
+        self._by_field = {field: {} for field in IDENTIFIER_FIELDS}
+        self._keys = {}
+        for process in processes:
+            self.update(process)
+
+    def remove(self, process_id):
+        """Retira um processo do índice"""
+        for field, keys in self._keys.pop(process_id, {}).items():
+            values = self._by_field[field]
+            for key in keys:
+                ids = values.get(key)
+                if ids is not None:
+                    ids.discard(process_id)
+                    if not ids:
+                        del values[key]
+
+    def update(self, process):
+        """Inclui um processo ou atualiza os identificadores dele"""
+        process_id = process["id"]
+        new = {}
+        for field in IDENTIFIER_FIELDS:
+            keys = _keys(process, field)
+            if keys:
+                new[field] = keys
+        if self._keys.get(process_id) == new:
+            return
+        self.remove(process_id)
+        for field, keys in new.items():
+            values = self._by_field[field]
+            for key in keys:
+                values.setdefault(key, set()).add(process_id)
+        if new:
+            self._keys[process_id] = new
+
+    def lookup(self, key, fields=None):
+        """IDs por campo com o valor normalizado informado: {campo: {IDs}}"""
+        found = {}
+        for field in fields or IDENTIFIER_FIELDS:
+            ids = self._by_field[field].get(key)
+            if ids:
+                found[field] = set(ids)
+        return found
+
+
+def _update_index(index, process_id, process):
+    if process is None:
+        index.remove(process_id)
+    else:
+        index.update(process)
+
+
+def get_active_index(processes=None):
+    """Índice dos processos ativos da sessão (remontado quando a lista de processos é substituída)"""
+    from data import get_process_index
+
+    return get_process_index("identifiers", IdentifierIndex, _update_index, processes)
+
+
+def get_archived_index(partition):
+    """Índice dos processos arquivados de um ano (remontado quando o arquivo muda)"""
+    import archive_store
+
+    processes = archive_store.load_partition(partition)
+    with _lock:
+        cached = _archived.get(partition)
+        if cached and cached[0] is processes:
+            return cached[1]
+        index = IdentifierIndex(processes)
+        _archived[partition] = (processes, index)
+        return index
+
+
+def find(value, fields=None, processes=None, include_archived=False):
+    """
+    Busca exata de um identificador.
+
+    Args:
+        value: Container, B/L, D.I., nota fiscal ou PO (em qualquer formatação)
+        fields: Campos consultados (padrão: todos de IDENTIFIER_FIELDS)
+        processes: Lista de processos ativos (padrão: st.session_state.data["processes"])
+        include_archived: True para buscar também nos arquivados
+
+    Returns:
+        dict: ID do processo -> campos em que o valor foi encontrado
+    """
+    from data import index_lock
+
+    key = normalize(value)
+    if not key:
+        return {}
+    with index_lock(), _lock:
+        indexes = [get_active_index(processes)]
+        if include_archived:
+            import archive_store
+            indexes.extend(get_archived_index(partition) for partition in archive_store.list_partitions())
+        matches = {}
+        for index in indexes:
+            for field, ids in index.lookup(key, fields).items():
+                for process_id in ids:
+                    matches.setdefault(process_id, []).append(field)
+    return matches
+
+
+def find_duplicates(process, processes=None):
+    """
+    Processos ativos que já usam algum identificador do processo informado.
+
+    Args:
+        process: Processo a verificar (ex: antes de data.add_process)
+
+    Returns:
+        dict: Campo -> IDs dos outros processos com o mesmo valor
+    """
+    from data import index_lock
+
+    duplicates = {}
+    with index_lock():
+        index = get_active_index(processes)
+        for field in IDENTIFIER_FIELDS:
+            for key in _keys(process, field):
+                ids = index.lookup(key, [field]).get(field, set())
+                ids.discard(process.get("id"))
+                if ids:
+                    duplicates.setdefault(field, set()).update(ids)
+    return duplicates
@@ -1,36 +1,23 @@
 """
 Script para remover os processos de teste gerados anteriormente
 """
-import os
-import json
-import datetime
 from data import load_data, save_data
+import backup_store
 
 def fazer_backup_dados():
     """Fazer backup dos dados atuais antes de removê-los"""
     data = load_data()
     
-    # Criar nome de arquivo com timestamp
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_filename = f"data_backup_antes_limpeza_{timestamp}.json"
+    # Backup incremental (apenas os processos alterados desde o último backup)
+    backup = backup_store.create_snapshot(data, label="Antes da limpeza dos processos de teste")
     
-    # Garantir que o diretório de backup exista
-    backup_dir = "backups"
-    if not os.path.exists(backup_dir):
-        os.makedirs(backup_dir)
-    
-    # Salvar backup
-    backup_path = os.path.join(backup_dir, backup_filename)
-    with open(backup_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    print(f"Backup criado em: {backup_path}")
-    return backup_path
+    print(f"Backup criado: {backup['id']}")
+    return backup['id']
 
 def remover_processos_teste():
     """Remover processos de teste gerados pelo gerador automático"""
     # Primeiro, fazer backup
-    backup_path = fazer_backup_dados()
+    backup_id = fazer_backup_dados()
     
     # Carregar dados
     data = load_data()
@@ -57,7 +44,7 @@ def remover_processos_teste():
     print(f"Total de processos antes: {total_processos_antes}")
     print(f"Total de processos depois: {total_processos_depois}")
     print(f"Processos removidos: {processos_removidos}")
-    print(f"Backup salvo em: {backup_path}")
+    print(f"Backup salvo: {backup_id} (restaure com: python restaurar_backup.py {backup_id})")
 
 if __name__ == "__main__":
     remover_processos_teste()
\ No newline at end of file
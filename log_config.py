@@ -0,0 +1,140 @@
+"""
+Configuração de logging estruturado da aplicação.
+
+Substitui os print() de diagnóstico espalhados pelos caminhos críticos. Os registros
+são emitidos em JSON (uma linha por registro) e a configuração é feita por variáveis
+de ambiente:
+
+    JGR_LOG_LEVEL    Nível padrão de todos os módulos (padrão: WARNING)
+    JGR_LOG_LEVELS   Níveis por módulo, ex: "data=DEBUG,components.event_log=INFO"
+    JGR_LOG_SAMPLE   Fração (0 a 1) dos registros DEBUG que serão emitidos (padrão: 1)
+
+Por padrão apenas avisos e erros são emitidos, então as mensagens de depuração dos
+caminhos críticos não custam nada além da verificação de nível.
+"""
+import os
+import json
+import random
+import logging
+from datetime import datetime
+
+ROOT_LOGGER_NAME = "jgr"
+
+DEFAULT_LEVEL = "WARNING"
+
+_configured = False
+
+
+class SamplingFilter(logging.Filter):
+    """Emite apenas uma fração dos registros abaixo de um nível"""
+
+    def __init__(self, rate=1.0, max_level=logging.DEBUG):
+        super().__init__()
+        self.rate = rate
+        self.max_level = max_level
+
+    def filter(self, record):
+        if record.levelno > self.max_level or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON"""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        # Campos estruturados passados via extra={"fields": {...}}
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _parse_module_levels(value):
+    """
+    Converte a configuração por módulo em um dicionário.
+
+    Args:
+        value: String no formato "modulo=NIVEL,outro.modulo=NIVEL"
+
+    Returns:
+        dict: Nome do módulo -> nível
+    """
+    levels = {}
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+        module, level = item.split("=", 1)
+        module = module.strip()
+        level = level.strip().upper()
+        if module and level:
+            levels[module] = level
+    return levels
+
+
+def configure_logging(level=None, module_levels=None, sample_rate=None, stream=None):
+    """
+    Configura os loggers da aplicação. Pode ser chamada novamente para reconfigurar.
+
+    Args:
+        level: Nível padrão (padrão: JGR_LOG_LEVEL ou WARNING)
+        module_levels: Dicionário módulo -> nível (padrão: JGR_LOG_LEVELS)
+        sample_rate: Fração dos registros DEBUG emitidos (padrão: JGR_LOG_SAMPLE ou 1)
+        stream: Destino dos registros (padrão: stderr)
+    """
+    global _configured
+
+    if level is None:
+        level = os.environ.get("JGR_LOG_LEVEL", DEFAULT_LEVEL)
+    if module_levels is None:
+        module_levels = _parse_module_levels(os.environ.get("JGR_LOG_LEVELS", ""))
+    if sample_rate is None:
+        try:
+            sample_rate = float(os.environ.get("JGR_LOG_SAMPLE", "1"))
+        except ValueError:
+            sample_rate = 1.0
+
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.setLevel(str(level).upper())
+    root.propagate = False
+
+    # Remover handlers de uma configuração anterior
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(StructuredFormatter())
+    handler.addFilter(SamplingFilter(sample_rate))
+    root.addHandler(handler)
+
+    # Níveis específicos por módulo
+    for module, module_level in module_levels.items():
+        logging.getLogger(f"{ROOT_LOGGER_NAME}.{module}").setLevel(module_level)
+
+    _configured = True
+
+
+def get_logger(name):
+    """
+    Obtém o logger de um módulo da aplicação.
+
+    Args:
+        name: Nome do módulo (normalmente __name__)
+
+    Returns:
+        logging.Logger: Logger configurado
+    """
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
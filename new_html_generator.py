@@ -6,6 +6,7 @@ import uuid
 import datetime
 from pathlib import Path
 import pandas as pd
+from status_registry import get_registry
 from custom_html_styles import get_html_styles
 from html_post_processor import process_html_file
 
@@ -25,22 +26,7 @@ def format_date(date_str):
 
 def get_status_color(status):
     """Obter cor para o status"""
-    status_colors = {
-        "Novo Processo": "#17a2b8",  # Ciano
-        "Pendente": "#ffc107",       # Amarelo
-        "Liberado": "#28a745",       # Verde
-        "Em andamento": "#007bff",   # Azul
-        "Atrasado": "#dc3545",       # Vermelho
-        "BL liberado": "#28a745",    # Verde
-        "Chegada do navio alterada": "#ffc107",  # Amarelo
-        "Aguardando documentos": "#ffc107",     # Amarelo
-        "Aguardando chegada": "#17a2b8",        # Ciano
-        "Em desembaraço": "#007bff",            # Azul
-        "Nacionalizado": "#28a745",             # Verde
-        "Concluído": "#6c757d",                # Cinza
-    }
-    
-    return status_colors.get(status, "#6c757d")  # Cinza como padrão
+    return get_registry().report_color(status)
 
 def generate_html_with_pagination(filtered_df, title="Relatório de Processos", include_details=True, client_name=None, archived=False):
     """
@@ -611,21 +597,19 @@ def generate_html_with_pagination(filtered_df, title="Relatório de Processos",
     # Adicionar cada processo como uma linha da tabela
     process_details_html = ""
     
+    # Status e cores de todas as linhas em um único mapeamento
+    registry = get_registry()
+    statuses = registry.status_column(filtered_df)
+    status_colors = registry.map_colors(statuses, report=True)
+    
     # Registrar todos os status para debug
-    status_counts = {}
-    for _, row in filtered_df.iterrows():
-        row_status = row.get('status', '')
-        if row_status in status_counts:
-            status_counts[row_status] += 1
-        else:
-            status_counts[row_status] = 1
+    status_counts = statuses.value_counts(dropna=False).to_dict()
     
     print(f"Status encontrados no DataFrame: {status_counts}")
     
-    for _, row in filtered_df.iterrows():
+    for (_, row), status_color in zip(filtered_df.iterrows(), status_colors):
         process_id = row['id']
         status = row.get('status', '')
-        status_color = get_status_color(status)
         # Garante que status não é None para usar upper()
         if status is None:
             status = ""
@@ -0,0 +1,472 @@
+"""
+Envio assíncrono de notificações por email e SMS.
+
+As mensagens são gravadas em uma caixa de saída persistente (notifications_outbox.json)
+e enviadas por uma thread em segundo plano, fora do script do Streamlit. A thread
+envia em lotes, reaproveitando uma única conexão SMTP por lote e um único cliente
+Twilio por processo, respeita um limite de envios por segundo e tenta novamente as
+mensagens que falharam com espera exponencial.
+
+Os transportes podem ser substituídos (set_transport) por um servidor SMTP local,
+como o aiosmtpd, ou pelo FakeTransport, que apenas guarda as mensagens em memória.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+from datetime import datetime
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Caixa de saída persistente
+OUTBOX_FILE = "notifications_outbox.json"
+
+# Parâmetros do envio
+BATCH_SIZE = 50
+RATE_LIMIT_PER_SECOND = 5.0
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+WORKER_IDLE_SECONDS = 5
+
+# Estados de uma mensagem
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+_outbox_lock = threading.RLock()
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+_installed = False
+
+
+class SmtpTransport:
+    """Transporte de email via SMTP, com uma conexão reaproveitada por lote"""
+
+    channel = "email"
+
+    def __init__(self, server=None, port=None, username=None, password=None, from_email=None,
+                 use_tls=True):
+        self._config = {
+            "server": server,
+            "port": port,
+            "username": username,
+            "password": password,
+            "from_email": from_email,
+        }
+        self.use_tls = use_tls
+        self._connection = None
+
+    def _get_config(self):
+        """Combina a configuração explícita com as variáveis de ambiente"""
+        username = self._config["username"] or os.environ.get("SMTP_USERNAME", "")
+        return {
+            "server": self._config["server"] or os.environ.get("SMTP_SERVER", ""),
+            "port": int(self._config["port"] or os.environ.get("SMTP_PORT", 587)),
+            "username": username,
+            "password": self._config["password"] or os.environ.get("SMTP_PASSWORD", ""),
+            "from_email": self._config["from_email"] or os.environ.get("FROM_EMAIL", username),
+        }
+
+    def is_configured(self):
+        config = self._get_config()
+        return bool(config["server"])
+
+    def open(self):
+        import smtplib
+
+        config = self._get_config()
+        if not config["server"]:
+            raise RuntimeError("Configuração de email incompleta")
+
+        connection = smtplib.SMTP(config["server"], config["port"], timeout=30)
+        if self.use_tls and config["password"]:
+            connection.starttls()
+        if config["username"] and config["password"]:
+            connection.login(config["username"], config["password"])
+        self._connection = connection
+
+    def send(self, message):
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
+        if self._connection is None:
+            self.open()
+
+        config = self._get_config()
+        msg = MIMEMultipart()
+        msg['From'] = config["from_email"]
+        msg['To'] = message["to"]
+        msg['Subject'] = message.get("subject", "")
+        msg.attach(MIMEText(message["body"], 'plain'))
+
+        self._connection.send_message(msg)
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except Exception:
+                pass
+            self._connection = None
+
+
+class TwilioTransport:
+    """Transporte de SMS via Twilio, com o cliente criado uma única vez"""
+
+    channel = "sms"
+
+    def __init__(self):
+        self._client = None
+        self._client_key = None
+
+    def _get_config(self):
+        return {
+            "account_sid": os.environ.get('TWILIO_ACCOUNT_SID'),
+            "auth_token": os.environ.get('TWILIO_AUTH_TOKEN'),
+            "from_phone": os.environ.get('TWILIO_PHONE_NUMBER'),
+        }
+
+    def is_configured(self):
+        config = self._get_config()
+        return bool(config["account_sid"] and config["auth_token"] and config["from_phone"])
+
+    def open(self):
+        from utils import get_twilio_client_class
+
+        config = self._get_config()
+        Client = get_twilio_client_class()
+        if Client is None:
+            raise RuntimeError("Twilio não está disponível")
+        if not self.is_configured():
+            raise RuntimeError("Configuração do Twilio incompleta")
+
+        # Recriar o cliente apenas se as credenciais mudarem
+        key = (config["account_sid"], config["auth_token"])
+        if self._client is None or self._client_key != key:
+            self._client = Client(config["account_sid"], config["auth_token"])
+            self._client_key = key
+
+    def send(self, message):
+        if self._client is None:
+            self.open()
+        self._client.messages.create(
+            body=message["body"],
+            from_=self._get_config()["from_phone"],
+            to=message["to"]
+        )
+
+    def close(self):
+        # O cliente HTTP do Twilio é mantido entre os lotes
+        pass
+
+
+class FakeTransport:
+    """Transporte em memória, para testes e ambientes sem SMTP/Twilio"""
+
+    def __init__(self, channel, fail_times=0):
+        self.channel = channel
+        self.sent = []
+        self.fail_times = fail_times
+        self.opened = 0
+
+    def is_configured(self):
+        return True
+
+    def open(self):
+        self.opened += 1
+
+    def send(self, message):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError("Falha simulada de envio")
+        self.sent.append(dict(message))
+
+    def close(self):
+        pass
+
+
+_transports = {
+    "email": SmtpTransport(),
+    "sms": TwilioTransport(),
+}
+
+
+def set_transport(channel, transport):
+    """
+    Substitui o transporte de um canal.
+
+    Args:
+        channel: 'email' ou 'sms'
+        transport: Objeto com os métodos open(), send(message) e close()
+    """
+    _transports[channel] = transport
+
+
+def get_transport(channel):
+    """Retorna o transporte configurado para o canal"""
+    return _transports[channel]
+
+
+def load_outbox():
+    """Carrega a caixa de saída do arquivo"""
+    if os.path.exists(OUTBOX_FILE):
+        try:
+            with open(OUTBOX_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Erro ao carregar caixa de saída: {e}")
+    return {"messages": []}
+
+
+def save_outbox(outbox):
+    """Grava a caixa de saída de forma atômica"""
+    tmp_file = f"{OUTBOX_FILE}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(outbox, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_file, OUTBOX_FILE)
+
+
+def _enqueue(messages):
+    """Adiciona mensagens à caixa de saída e acorda a thread de envio"""
+    with _outbox_lock:
+        outbox = load_outbox()
+        outbox["messages"].extend(messages)
+        save_outbox(outbox)
+
+    ensure_worker()
+    _wakeup.set()
+    return [m["id"] for m in messages]
+
+
+def _new_message(channel, to, body, subject=""):
+    return {
+        "id": str(uuid.uuid4()),
+        "channel": channel,
+        "to": to,
+        "subject": subject,
+        "body": body,
+        "status": STATUS_PENDING,
+        "attempts": 0,
+        "next_attempt": 0,
+        "created": datetime.now().isoformat(),
+        "sent_at": None,
+        "last_error": None,
+    }
+
+
+def enqueue_email(to_email, subject, message):
+    """
+    Coloca um email na caixa de saída.
+
+    Returns:
+        str: ID da mensagem
+    """
+    return _enqueue([_new_message("email", to_email, message, subject)])[0]
+
+
+def enqueue_sms(to_phone, message):
+    """
+    Coloca um SMS na caixa de saída.
+
+    Returns:
+        str: ID da mensagem
+    """
+    return _enqueue([_new_message("sms", to_phone, message)])[0]
+
+
+def enqueue_many(items):
+    """
+    Coloca várias mensagens na caixa de saída com uma única gravação.
+
+    Args:
+        items: Lista de dicionários com 'channel', 'to', 'body' e opcionalmente 'subject'
+
+    Returns:
+        list: IDs das mensagens
+    """
+    messages = [_new_message(item["channel"], item["to"], item["body"], item.get("subject", ""))
+                for item in items]
+    return _enqueue(messages) if messages else []
+
+
+def get_message_status(message_id):
+    """Retorna o estado de uma mensagem da caixa de saída (ou None)"""
+    with _outbox_lock:
+        for message in load_outbox()["messages"]:
+            if message["id"] == message_id:
+                return message["status"]
+    return None
+
+
+def get_outbox_summary():
+    """
+    Conta as mensagens da caixa de saída por estado.
+
+    Returns:
+        dict: Estado -> quantidade
+    """
+    summary = {STATUS_PENDING: 0, STATUS_SENT: 0, STATUS_FAILED: 0}
+    with _outbox_lock:
+        for message in load_outbox()["messages"]:
+            summary[message["status"]] = summary.get(message["status"], 0) + 1
+    return summary
+
+
+def purge_sent(older_than_days=7):
+    """Remove da caixa de saída as mensagens enviadas há mais de N dias"""
+    cutoff = time.time() - older_than_days * 86400
+    with _outbox_lock:
+        outbox = load_outbox()
+        kept = [m for m in outbox["messages"]
+                if m["status"] != STATUS_SENT
+                or datetime.fromisoformat(m["sent_at"]).timestamp() >= cutoff]
+        removed = len(outbox["messages"]) - len(kept)
+        if removed:
+            outbox["messages"] = kept
+            save_outbox(outbox)
+    return removed
+
+
+def _send_batch(channel, batch):
+    """
+    Envia um lote de mensagens de um canal com uma única conexão.
+
+    Returns:
+        dict: ID da mensagem -> erro (None se enviada)
+    """
+    transport = get_transport(channel)
+    results = {}
+    interval = 1.0 / RATE_LIMIT_PER_SECOND if RATE_LIMIT_PER_SECOND else 0
+
+    try:
+        transport.open()
+    except Exception as e:
+        return {message["id"]: str(e) for message in batch}
+
+    try:
+        last_send = 0.0
+        for message in batch:
+            # Limite de envios por segundo
+            wait = interval - (time.monotonic() - last_send)
+            if wait > 0:
+                time.sleep(wait)
+            last_send = time.monotonic()
+
+            try:
+                transport.send(message)
+                results[message["id"]] = None
+            except Exception as e:
+                results[message["id"]] = str(e)
+                # A conexão pode ter caído: reabrir para as próximas mensagens
+                transport.close()
+                try:
+                    transport.open()
+                except Exception as open_error:
+                    for remaining in batch:
+                        results.setdefault(remaining["id"], str(open_error))
+                    break
+    finally:
+        transport.close()
+
+    return results
+
+
+def process_outbox(now=None):
+    """
+    Envia as mensagens pendentes cuja próxima tentativa já venceu.
+
+    Pode ser chamada diretamente (por exemplo em testes); normalmente é executada
+    pela thread de envio.
+
+    Returns:
+        int: Quantidade de mensagens enviadas
+    """
+    now = now or time.time()
+
+    with _outbox_lock:
+        pending = [m for m in load_outbox()["messages"]
+                   if m["status"] == STATUS_PENDING and m["next_attempt"] <= now]
+
+    if not pending:
+        return 0
+
+    # Agrupar por canal e limitar o tamanho do lote
+    results = {}
+    for channel in ("email", "sms"):
+        batch = [m for m in pending if m["channel"] == channel][:BATCH_SIZE]
+        if batch:
+            results.update(_send_batch(channel, batch))
+
+    # Registrar o resultado na caixa de saída (que pode ter recebido novas mensagens)
+    sent = 0
+    with _outbox_lock:
+        outbox = load_outbox()
+        for message in outbox["messages"]:
+            if message["id"] not in results:
+                continue
+            error = results[message["id"]]
+            message["attempts"] += 1
+            if error is None:
+                message["status"] = STATUS_SENT
+                message["sent_at"] = datetime.now().isoformat()
+                message["last_error"] = None
+                sent += 1
+            else:
+                message["last_error"] = error
+                if message["attempts"] >= MAX_ATTEMPTS:
+                    message["status"] = STATUS_FAILED
+                    logger.error(f"Falha definitiva ao enviar {message['channel']} para {message['to']}: {error}")
+                else:
+                    # Espera exponencial entre as tentativas
+                    message["next_attempt"] = now + RETRY_BASE_SECONDS * (2 ** (message["attempts"] - 1))
+        save_outbox(outbox)
+
+    logger.debug("Lote de notificações processado", extra={"fields": {
+        "sent": sent, "failed": len(results) - sent}})
+    return sent
+
+
+def _worker_loop():
+    """Laço da thread de envio"""
+    while True:
+        _wakeup.wait(WORKER_IDLE_SECONDS)
+        _wakeup.clear()
+        try:
+            # Continuar enquanto houver lotes completos para enviar
+            while process_outbox() >= BATCH_SIZE:
+                pass
+        except Exception as e:
+            logger.error(f"Erro na thread de notificações: {e}")
+
+
+def ensure_worker():
+    """Inicia a thread de envio (uma por processo), se ainda não estiver rodando"""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_worker_loop, name="notifications-worker", daemon=True)
+            _worker.start()
+
+
+def install():
+    """
+    Retoma o envio ao iniciar a aplicação (uma vez por processo).
+
+    Mensagens que ficaram pendentes quando o servidor parou, ou que aguardam uma nova
+    tentativa, são enviadas sem esperar que outra notificação seja enfileirada.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    with _outbox_lock:
+        pending = sum(1 for m in load_outbox()["messages"] if m["status"] == STATUS_PENDING)
+    if pending:
+        logger.info(f"Retomando o envio de {pending} notificações pendentes")
+        ensure_worker()
+        _wakeup.set()
@@ -0,0 +1,274 @@
+"""
+Instrumentação leve dos caminhos críticos da aplicação.
+
+Fornece um decorador (`timed`) e um gerenciador de contexto (`track`) que registram
+tempo por chamada, número de chamadas e bytes gravados. Os resultados são agregados
+por sessão do Streamlit e por processo do sistema operacional e podem ser exibidos
+na página de diagnóstico, gravados em JSON lines ou exportados no formato texto do
+Prometheus.
+
+A instrumentação fica desativada por padrão. Para ativar, defina a variável de
+ambiente JGR_PROFILING=1 ou use o botão na página de diagnóstico. Quando desativada,
+o custo é apenas a leitura de uma variável global por chamada.
+"""
+import os
+import json
+import time
+import threading
+import functools
+from datetime import datetime
+
+# Variáveis de ambiente de configuração
+PROFILING_ENV_VAR = "JGR_PROFILING"
+JSONL_ENV_VAR = "JGR_PROFILING_JSONL"
+
+_enabled = os.environ.get(PROFILING_ENV_VAR, "").lower() in ("1", "true", "yes", "sim")
+_jsonl_path = os.environ.get(JSONL_ENV_VAR) or None
+
+# Estatísticas agregadas: (session_id, nome) -> dicionário de métricas
+_stats = {}
+_lock = threading.Lock()
+
+
+def is_enabled():
+    """Retorna True se a instrumentação estiver ativa"""
+    return _enabled
+
+
+def set_enabled(enabled):
+    """Ativa ou desativa a instrumentação para todo o processo"""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def set_jsonl_path(path):
+    """
+    Define o arquivo JSON lines onde cada chamada medida será registrada.
+
+    Args:
+        path: Caminho do arquivo, ou None para desativar a gravação
+    """
+    global _jsonl_path
+    _jsonl_path = path or None
+
+
+def current_session_id():
+    """Obtém o ID da sessão do Streamlit atual (ou '-' fora de uma sessão)"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            return ctx.session_id
+    except Exception:
+        pass
+    return "-"
+
+
+def record(name, elapsed, bytes_written=0):
+    """
+    Registra uma medição.
+
+    Args:
+        name: Nome da operação medida (ex: 'data.save_data')
+        elapsed: Tempo decorrido em segundos
+        bytes_written: Quantidade de bytes gravados pela operação
+    """
+    session_id = current_session_id()
+    key = (session_id, name)
+
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = {
+                "session_id": session_id,
+                "pid": os.getpid(),
+                "name": name,
+                "calls": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                "bytes_written": 0,
+            }
+            _stats[key] = entry
+
+        entry["calls"] += 1
+        entry["total_seconds"] += elapsed
+        if elapsed > entry["max_seconds"]:
+            entry["max_seconds"] = elapsed
+        entry["bytes_written"] += bytes_written or 0
+
+    if _jsonl_path:
+        try:
+            line = json.dumps({
+                "timestamp": datetime.now().isoformat(),
+                "session_id": session_id,
+                "pid": os.getpid(),
+                "name": name,
+                "seconds": elapsed,
+                "bytes_written": bytes_written or 0,
+            })
+            with _lock:
+                with open(_jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except Exception as e:
+            print(f"Erro ao gravar medição em {_jsonl_path}: {e}")
+
+
+class _Span:
+    """Medição ativa de um bloco de código"""
+    __slots__ = ("name", "bytes", "_start")
+
+    def __init__(self, name):
+        self.name = name
+        self.bytes = 0
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self._start, self.bytes)
+        return False
+
+
+class _NullSpan:
+    """Medição vazia usada quando a instrumentação está desativada"""
+    bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def track(name):
+    """
+    Gerenciador de contexto para medir um bloco de código.
+
+    O objeto retornado possui o atributo `bytes`, que pode ser preenchido com a
+    quantidade de bytes gravados dentro do bloco.
+
+    Exemplo:
+        with track("data.save_data") as span:
+            ...
+            span.bytes = f.tell()
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def timed(name=None):
+    """
+    Decorador para medir o tempo de execução de uma função.
+
+    Args:
+        name: Nome da operação (padrão: módulo.função)
+    """
+    def decorator(func):
+        metric_name = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(metric_name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def get_stats(session_id=None):
+    """
+    Retorna as estatísticas agregadas.
+
+    Args:
+        session_id: Se informado, retorna apenas as estatísticas desta sessão
+
+    Returns:
+        list: Lista de dicionários com as métricas de cada operação
+    """
+    with _lock:
+        entries = [dict(entry) for entry in _stats.values()]
+
+    if session_id is not None:
+        entries = [e for e in entries if e["session_id"] == session_id]
+
+    for entry in entries:
+        entry["avg_seconds"] = entry["total_seconds"] / entry["calls"] if entry["calls"] else 0.0
+
+    return sorted(entries, key=lambda e: e["total_seconds"], reverse=True)
+
+
+def reset_stats():
+    """Limpa todas as estatísticas acumuladas"""
+    with _lock:
+        _stats.clear()
+
+
+def _escape_label(value):
+    """Escapa um valor de label no formato do Prometheus"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def to_prometheus():
+    """
+    Exporta as estatísticas no formato texto do Prometheus.
+
+    Returns:
+        str: Métricas no formato de exposição do Prometheus
+    """
+    metrics = [
+        ("jgr_calls_total", "counter", "Número de chamadas da operação", "calls"),
+        ("jgr_call_seconds_total", "counter", "Tempo total gasto na operação", "total_seconds"),
+        ("jgr_call_seconds_max", "gauge", "Maior tempo de uma chamada da operação", "max_seconds"),
+        ("jgr_bytes_written_total", "counter", "Bytes gravados pela operação", "bytes_written"),
+    ]
+
+    entries = get_stats()
+    lines = []
+    for metric, metric_type, help_text, field in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for entry in entries:
+            labels = (
+                f'name="{_escape_label(entry["name"])}",'
+                f'session="{_escape_label(entry["session_id"])}",'
+                f'pid="{entry["pid"]}"'
+            )
+            lines.append(f"{metric}{{{labels}}} {entry[field]}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """
+    Grava as métricas em um arquivo texto (compatível com o textfile collector
+    do node_exporter).
+
+    Args:
+        path: Caminho do arquivo de destino
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(to_prometheus())
+    os.replace(tmp_path, path)
+
+
+def to_jsonl():
+    """
+    Exporta as estatísticas agregadas como JSON lines.
+
+    Returns:
+        str: Uma linha JSON por operação medida
+    """
+    return "".join(json.dumps(entry) + "\n" for entry in get_stats())
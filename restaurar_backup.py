@@ -1,54 +1,59 @@
 """
 Script para restaurar os dados originais a partir do backup mais recente.
 Isso removerá os processos gerados automaticamente.
+
+Uso:
+    python restaurar_backup.py                      # backup mais recente
+    python restaurar_backup.py <id do backup>       # backup específico
+    python restaurar_backup.py "2025-05-20 18:00"   # último backup até a data/hora
 """
 
-import os
-import json
-import glob
+import sys
 from datetime import datetime
 
+import backup_store
+
 def obter_backup_mais_recente():
-    """Encontra o arquivo de backup mais recente"""
-    arquivos_backup = glob.glob("data_backup_*.json")
+    """
+    Encontra o backup mais recente (importando os backups antigos em JSON, se houver).
+
+    As cópias de segurança feitas antes de uma restauração são ignoradas.
+    """
+    backup_store.import_legacy_backups()
+    backup = backup_store.find_snapshot()
     
-    if not arquivos_backup:
-        print("Nenhum arquivo de backup encontrado!")
+    if not backup:
+        print("Nenhum backup encontrado!")
         return None
     
-    # Ordenar por data de modificação (mais recente primeiro)
-    arquivos_backup.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-    return arquivos_backup[0]
+    return backup
 
-def restaurar_dados():
-    """Restaura os dados do backup mais recente"""
-    backup_file = obter_backup_mais_recente()
+def restaurar_dados(snapshot_id=None, momento=None):
+    """
+    Restaura os dados de um backup
     
-    if not backup_file:
-        return False
+    Args:
+        snapshot_id: ID do backup (padrão: o mais recente)
+        momento: datetime; restaura o último backup criado até esse momento
+    """
+    if snapshot_id or momento:
+        backup_store.import_legacy_backups()
+        backup = backup_store.find_snapshot(snapshot_id=snapshot_id, at=momento)
+        if not backup:
+            print("Nenhum backup correspondente encontrado!")
+            return False
+    else:
+        backup = obter_backup_mais_recente()
+        if not backup:
+            return False
     
     try:
-        # Ler dados do backup
-        with open(backup_file, 'r') as f:
-            dados_backup = json.load(f)
-        
-        # Criar backup do arquivo atual (por precaução)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        current_backup = f"data_pre_restauracao_{timestamp}.json"
-        
-        with open("data.json", 'r') as atual:
-            with open(current_backup, 'w') as backup:
-                backup.write(atual.read())
-                print(f"Backup do estado atual criado em {current_backup}")
-        
-        # Restaurar dados do backup
-        with open("data.json", 'w') as f:
-            json.dump(dados_backup, f, indent=2)
-        
-        print(f"Dados restaurados com sucesso a partir de {backup_file}")
+        # O estado atual é guardado como um novo backup antes da restauração
+        backup_store.restore_snapshot(snapshot_id=backup["id"])
+        print(f"Dados restaurados com sucesso a partir do backup {backup['id']} ({backup['created_at']})")
         
         # Exibir informações sobre processos
-        processos = dados_backup.get("processes", [])
+        processos = backup_store.load_snapshot(backup["id"]).get("processes", [])
         print(f"Restaurados {len(processos)} processos")
         
         # Contar tipos de processos
@@ -63,4 +68,11 @@ def restaurar_dados():
         return False
 
 if __name__ == "__main__":
-    restaurar_dados()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        argumento = sys.argv[1]
+        try:
+            restaurar_dados(momento=datetime.fromisoformat(argumento))
+        except ValueError:
+            restaurar_dados(snapshot_id=argumento)
+    else:
+        restaurar_dados()
@@ -0,0 +1,214 @@
+"""
+Tabelas diárias (rollups) da página de indicadores (components/dashboard.py).
+
+Mantém, por data, sem percorrer os processos a cada visualização:
+
+- entradas no porto/recinto (port_entry_date), das quais sai o volume por mês;
+- devoluções de vazio (empty_return) com a soma dos dias entre a entrada e a devolução,
+  das quais sai o tempo médio de permanência por mês;
+- deadlines de carga (cargo_deadline) das exportações;
+- e, sem data, a quantidade em armazenagem (com entrada e sem devolução) por terminal.
+
+Os vencimentos e as faixas de dias armazenados vêm de aggregates.
+
+As tabelas são montadas na primeira consulta da sessão a partir da lista de processos
+e atualizadas pelas notificações de data.py (data.get_process_index): cada processo
+guarda a sua contribuição, que é retirada e recolocada quando ele muda. O volume por
+mês depende da data de hoje e é guardado até a próxima alteração ou a virada do dia.
+
+Os processos arquivados ficam fora.
+
+Uso:
+    import rollups
+    rollups.get_monthly_throughput()   # [{"month": "2025-03", "entries": 40, ...}, ...]
+    rollups.get_terminal_load()        # {"ECOPORTO": 12, ...}
+"""
+from datetime import datetime, timedelta
+
+from aggregates import parse_date
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Tipo de processo com deadline de carga
+EXPORT_TYPE = "exportacao"
+
+
+def _text(process, field):
+    value = process.get(field)
+    if value is None or value != value:  # None ou NaN
+        return ""
+    return str(value).strip()
+
+
+def _contribution(process):
+    """Linhas com que um processo contribui para as tabelas"""
+    entry = parse_date(process.get("port_entry_date"))
+    empty_return = parse_date(process.get("empty_return"))
+
+    returned = None
+    if entry is not None and empty_return is not None and empty_return >= entry:
+        returned = (empty_return, (empty_return - entry).days)
+
+    terminal = None
+    if entry is not None and empty_return is None:
+        terminal = _text(process, "terminal")
+
+    cargo = None
+    if process.get("type") == EXPORT_TYPE:
+        deadline = parse_date(process.get("cargo_deadline"))
+        if deadline is not None:
+            client = _text(process, "client") or _text(process, "importer")
+            cargo = (deadline, (client, _text(process, "terminal"), _text(process, "status")))
+
+    return entry, returned, terminal, cargo
+
+
+def _add(table, key, delta):
+    table[key] = table.get(key, 0) + delta
+    if table[key] <= 0:
+        del table[key]
+
+
+class Rollups:
+    """Tabelas diárias de um conjunto de processos"""
+
+    def __init__(self, processes=()):
+        self.contributions = {}
+        self.entries = {}          # data -> quantidade
+        self.returns = {}          # data -> [quantidade, soma dos dias de permanência]
+        self.terminals = {}        # terminal -> quantidade em armazenagem
+        self.cargo_deadlines = {}  # data -> {ID: (cliente, terminal, status)}
+        self.version = 0
+        # Resultados calculados: chave -> (versão, dia, valor)
+        self._cache = {}
+        for process in processes:
+            self.update(process["id"], process)
+
+    def _apply(self, process_id, contribution, delta):
+        entry, returned, terminal, cargo = contribution
+        if entry is not None:
+            _add(self.entries, entry, delta)
+        if returned is not None:
+            day, dwell_days = returned
+            row = self.returns.setdefault(day, [0, 0])
+            row[0] += delta
+            row[1] += delta * dwell_days
+            if row[0] <= 0:
+                del self.returns[day]
+        if terminal is not None:
+            _add(self.terminals, terminal, delta)
+        if cargo is not None:
+            day, row = cargo
+            rows = self.cargo_deadlines.setdefault(day, {})
+            if delta > 0:
+                rows[process_id] = row
+            else:
+                rows.pop(process_id, None)
+                if not rows:
+                    del self.cargo_deadlines[day]
+
+    def update(self, process_id, process):
+        """Inclui, atualiza ou (process None) retira um processo das tabelas"""
+        old = self.contributions.pop(process_id, None)
+        new = _contribution(process) if process is not None else None
+        if new is not None:
+            self.contributions[process_id] = new
+        if old == new:
+            return
+        if old is not None:
+            self._apply(process_id, old, -1)
+        if new is not None:
+            self._apply(process_id, new, 1)
+        self.version += 1
+
+    def cached(self, key, compute):
+        """Resultado guardado até a próxima alteração ou a virada do dia"""
+        today = datetime.now().date()
+        cached = self._cache.get(key)
+        if cached and cached[0] == self.version and cached[1] == today:
+            return cached[2]
+        value = compute(today)
+        self._cache[key] = (self.version, today, value)
+        return value
+
+
+def _get_rollups(processes=None):
+    """Tabelas dos processos ativos da sessão (ver data.get_process_index)"""
+    from data import get_process_index
+
+    return get_process_index("rollups", Rollups, Rollups.update, processes)
+
+
+def get_monthly_throughput(processes=None, months=12):
+    """
+    Entradas, devoluções e tempo médio de permanência por mês.
+
+    Args:
+        processes: Lista de processos (padrão: st.session_state.data["processes"])
+        months: Quantidade de meses, até o mês atual
+
+    Returns:
+        list: Linhas {"month": "AAAA-MM", "entries", "returns", "avg_dwell_days"} em ordem
+        cronológica (avg_dwell_days é None nos meses sem devolução)
+    """
+    from data import index_lock
+
+    with index_lock():
+        rollups = _get_rollups(processes)
+
+        def compute(today):
+            rows = {}
+            year, month = today.year, today.month
+            for _ in range(months):
+                rows[f"{year:04d}-{month:02d}"] = {"entries": 0, "returns": 0, "dwell_days": 0}
+                year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+            for day, n in rollups.entries.items():
+                row = rows.get(day.strftime("%Y-%m"))
+                if row is not None:
+                    row["entries"] += n
+            for day, (n, dwell_days) in rollups.returns.items():
+                row = rows.get(day.strftime("%Y-%m"))
+                if row is not None:
+                    row["returns"] += n
+                    row["dwell_days"] += dwell_days
+            return [{"month": month_key,
+                     "entries": row["entries"],
+                     "returns": row["returns"],
+                     "avg_dwell_days": round(row["dwell_days"] / row["returns"], 1) if row["returns"] else None}
+                    for month_key, row in sorted(rows.items())]
+
+        return [dict(row) for row in rollups.cached(("throughput", months), compute)]
+
+
+def get_terminal_load(processes=None):
+    """Quantidade de processos em armazenagem por terminal (terminal vazio = não informado)"""
+    from data import index_lock
+
+    with index_lock():
+        return dict(_get_rollups(processes).terminals)
+
+
+def get_cargo_deadlines(processes=None, start=None, end=None):
+    """
+    Exportações com deadline de carga no intervalo (padrão: semana atual, de segunda a domingo).
+
+    Returns:
+        list: Linhas {"id", "cargo_deadline", "client", "terminal", "status"} ordenadas pela data
+    """
+    from data import index_lock
+
+    today = datetime.now().date()
+    if start is None:
+        start = today - timedelta(days=today.weekday())
+    if end is None:
+        end = start + timedelta(days=6)
+
+    with index_lock():
+        cargo_deadlines = _get_rollups(processes).cargo_deadlines
+        rows = []
+        for day in sorted(d for d in cargo_deadlines if start <= d <= end):
+            for process_id, (client, terminal, status) in sorted(cargo_deadlines[day].items()):
+                rows.append({"id": process_id, "cargo_deadline": day,
+                             "client": client, "terminal": terminal, "status": status})
+        return rows
@@ -0,0 +1,507 @@
+"""
+Cliente do Google Sheets compartilhado por todo o processo.
+
+O cliente é autorizado uma única vez e reaproveitado (com a mesma sessão HTTP) por
+todas as leituras, gravações e consultas de status. O token de acesso é renovado
+alguns minutos antes de expirar, sem esperar que uma requisição falhe, e um erro de
+autenticação descarta o cliente para que a próxima chamada autorize novamente.
+
+Cada chamada à API pode ser medida (measure/call), o que alimenta as métricas de
+latência e de erros exibidas na página de configuração do Google Sheets.
+
+O transporte pode ser substituído (set_transport): o GspreadTransport usa o gspread
+com as credenciais de sheets_data.get_credentials, e o FakeSheetsTransport mantém as
+planilhas em memória, para uso sem acesso à rede.
+"""
+import re
+import time
+import calendar
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from profiling import track
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Renovar o token com esta antecedência em relação à expiração
+REFRESH_MARGIN_SECONDS = 5 * 60
+
+# Validade assumida do token quando o transporte não informa a expiração
+DEFAULT_TOKEN_LIFETIME_SECONDS = 60 * 60
+
+
+def _get_status_code(error):
+    """Obtém o código HTTP de um erro da API (ou None)"""
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+class GspreadTransport:
+    """Transporte real: autoriza o gspread com as credenciais da conta de serviço"""
+
+    def __init__(self, credentials_loader=None):
+        self._credentials_loader = credentials_loader
+        self._credentials = None
+
+    def _load_credentials(self):
+        if self._credentials_loader is not None:
+            return self._credentials_loader()
+        from sheets_data import get_credentials
+        return get_credentials()
+
+    def _get_auth(self, client):
+        """Credenciais efetivamente usadas pelo cliente (varia entre versões do gspread)"""
+        auth = getattr(client, "auth", None)
+        if auth is None:
+            auth = getattr(getattr(client, "http_client", None), "auth", None)
+        return auth or self._credentials
+
+    def authorize(self):
+        import gspread
+
+        credentials = self._load_credentials()
+        if not credentials:
+            raise RuntimeError("Credenciais do Google não encontradas")
+        self._credentials = credentials
+        return gspread.authorize(credentials)
+
+    def token_expiry(self, client):
+        auth = self._get_auth(client)
+        # google-auth usa 'expiry', oauth2client usa 'token_expiry' (ambos em UTC)
+        expiry = getattr(auth, "expiry", None) or getattr(auth, "token_expiry", None)
+        if not isinstance(expiry, datetime):
+            return None
+        return calendar.timegm(expiry.utctimetuple())
+
+    def refresh(self, client):
+        auth = self._get_auth(client)
+        if hasattr(auth, "before_request"):
+            from google.auth.transport.requests import Request
+            auth.refresh(Request())
+        else:
+            import httplib2
+            auth.refresh(httplib2.Http())
+
+        # Versões antigas do gspread copiam o token para o cabeçalho da sessão
+        login = getattr(client, "login", None)
+        if callable(login):
+            login()
+
+    def close(self, client):
+        session = getattr(client, "session", None)
+        if session is not None and hasattr(session, "close"):
+            session.close()
+
+
+def _a1_to_rowcol(label):
+    """Converte uma célula A1 (ex: 'AB12') em (linha, coluna), ambos a partir de 1"""
+    match = re.match(r"^([A-Z]+)(\d+)$", label.upper())
+    letters, row = match.groups()
+    col = 0
+    for letter in letters:
+        col = col * 26 + (ord(letter) - 64)
+    return int(row), col
+
+
+def _parse_range(range_name):
+    """Separa "'Aba'!A1:C3" em (título, (linha, coluna) inicial, (linha, coluna) final)"""
+    title, _, cells = range_name.rpartition("!")
+    start, _, end = cells.partition(":")
+    return title.strip("'").replace("''", "'"), _a1_to_rowcol(start), _a1_to_rowcol(end or start)
+
+
+class FakeWorksheet:
+    """Aba em memória (subconjunto da interface do gspread.Worksheet)"""
+
+    def __init__(self, spreadsheet, title, rows=1000, cols=26):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.values = []
+
+    def _request(self, operation):
+        self.spreadsheet.client.requests.append(operation)
+
+    def get_all_values(self):
+        self._request("get_all_values")
+        return [list(row) for row in self.values]
+
+    def get_all_records(self):
+        self._request("get_all_records")
+        if not self.values:
+            return []
+        headers = self.values[0]
+        return [dict(zip(headers, row)) for row in self.values[1:]]
+
+    def row_values(self, row):
+        self._request("row_values")
+        return list(self.values[row - 1]) if row <= len(self.values) else []
+
+    def append_row(self, values):
+        self._request("append_row")
+        self.values.append([str(v) for v in values])
+
+    def append_rows(self, values):
+        self._request("append_rows")
+        self.values.extend([str(v) for v in row] for row in values)
+
+    def update_cell(self, row, col, value):
+        self._request("update_cell")
+        while len(self.values) < row:
+            self.values.append([])
+        current = self.values[row - 1]
+        current.extend([""] * (col - len(current)))
+        current[col - 1] = str(value)
+
+    def find(self, query):
+        self._request("find")
+        for i, row in enumerate(self.values):
+            for j, value in enumerate(row):
+                if value == query:
+                    return type("Cell", (), {"row": i + 1, "col": j + 1, "value": value})()
+        return None
+
+    def resize(self, rows=None, cols=None):
+        self._request("resize")
+        if rows is not None:
+            self.row_count = rows
+            del self.values[rows:]
+        if cols is not None:
+            self.col_count = cols
+
+    def clear(self):
+        self._request("clear")
+        self.values = []
+
+    def _write(self, start, rows):
+        """Grava as linhas a partir da célula inicial (linha, coluna)"""
+        first_row, first_col = start
+        for i, row in enumerate(rows):
+            while len(self.values) < first_row + i:
+                self.values.append([])
+            current = self.values[first_row + i - 1]
+            current.extend([""] * (first_col - 1 + len(row) - len(current)))
+            current[first_col - 1:first_col - 1 + len(row)] = ["" if v is None else str(v) for v in row]
+
+    def _clear_range(self, start, end):
+        for row in range(start[0], min(end[0], len(self.values)) + 1):
+            current = self.values[row - 1]
+            for col in range(start[1], min(end[1], len(current)) + 1):
+                current[col - 1] = ""
+        # A API não devolve linhas e colunas vazias no fim
+        for row in self.values:
+            while row and row[-1] == "":
+                row.pop()
+        while self.values and not self.values[-1]:
+            self.values.pop()
+
+
+class FakeSpreadsheet:
+    """Planilha em memória (subconjunto da interface do gspread.Spreadsheet)"""
+
+    def __init__(self, client, title, spreadsheet_id):
+        self.client = client
+        self.title = title
+        self.id = spreadsheet_id
+        self.url = f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}"
+        self._worksheets = []
+
+    def worksheets(self):
+        self.client.requests.append("worksheets")
+        return list(self._worksheets)
+
+    def worksheet(self, title):
+        self.client.requests.append("worksheet")
+        for sheet in self._worksheets:
+            if sheet.title == title:
+                return sheet
+        raise LookupError(f"Aba não encontrada: {title}")
+
+    def add_worksheet(self, title, rows, cols):
+        self.client.requests.append("add_worksheet")
+        sheet = FakeWorksheet(self, title, rows, cols)
+        self._worksheets.append(sheet)
+        return sheet
+
+    def values_batch_get(self, ranges):
+        self.client.requests.append("values_batch_get")
+        value_ranges = []
+        for range_name in ranges:
+            title = (range_name.rpartition("!")[0] or range_name).strip("'").replace("''", "'")
+            sheet = next((s for s in self._worksheets if s.title == title), None)
+            values = [list(row) for row in sheet.values] if sheet else []
+            value_ranges.append({"range": range_name, "values": values})
+        return {"spreadsheetId": self.id, "valueRanges": value_ranges}
+
+    def _find(self, title):
+        return next(s for s in self._worksheets if s.title == title)
+
+    def values_batch_update(self, body):
+        self.client.requests.append("values_batch_update")
+        for item in body["data"]:
+            title, start, _ = _parse_range(item["range"])
+            self._find(title)._write(start, item["values"])
+        return {"spreadsheetId": self.id}
+
+    def values_batch_clear(self, params=None, body=None):
+        self.client.requests.append("values_batch_clear")
+        for range_name in body["ranges"]:
+            title, start, end = _parse_range(range_name)
+            self._find(title)._clear_range(start, end)
+        return {"spreadsheetId": self.id}
+
+
+class FakeSheetsClient:
+    """Cliente em memória; 'requests' registra cada chamada que iria à API"""
+
+    def __init__(self):
+        self.requests = []
+        self._spreadsheets = {}
+
+    def create(self, title):
+        self.requests.append("create")
+        spreadsheet = FakeSpreadsheet(self, title, f"fake-{len(self._spreadsheets) + 1}")
+        self._spreadsheets[spreadsheet.id] = spreadsheet
+        return spreadsheet
+
+    def open_by_key(self, key):
+        self.requests.append("open_by_key")
+        return self._spreadsheets[key]
+
+    def open(self, title):
+        from gspread.exceptions import SpreadsheetNotFound
+
+        self.requests.append("open")
+        for spreadsheet in self._spreadsheets.values():
+            if spreadsheet.title == title:
+                return spreadsheet
+        raise SpreadsheetNotFound(title)
+
+
+class FakeSheetsTransport:
+    """Transporte em memória, para testes e uso sem acesso à rede"""
+
+    def __init__(self, token_lifetime=DEFAULT_TOKEN_LIFETIME_SECONDS):
+        self.client = FakeSheetsClient()
+        self.token_lifetime = token_lifetime
+        self.authorizations = 0
+        self.refreshes = 0
+        self._expires_at = None
+
+    def authorize(self):
+        self.authorizations += 1
+        self._expires_at = time.time() + self.token_lifetime
+        return self.client
+
+    def token_expiry(self, client):
+        return self._expires_at
+
+    def refresh(self, client):
+        self.refreshes += 1
+        self._expires_at = time.time() + self.token_lifetime
+
+    def close(self, client):
+        pass
+
+
+class SheetsClientManager:
+    """Mantém o cliente autorizado e as métricas de uso da API"""
+
+    def __init__(self, transport=None):
+        self._transport = transport or GspreadTransport()
+        self._client = None
+        self._authorized_at = None
+        self._lock = threading.RLock()
+        self._metrics = self._new_metrics()
+
+    @staticmethod
+    def _new_metrics():
+        return {
+            "authorizations": 0,
+            "refreshes": 0,
+            "calls": 0,
+            "errors": 0,
+            "total_latency": 0.0,
+            "max_latency": 0.0,
+            "last_latency": None,
+            "last_success_at": None,
+            "last_error": None,
+            "last_error_at": None,
+        }
+
+    @property
+    def transport(self):
+        return self._transport
+
+    def _token_expiry(self):
+        expiry = self._transport.token_expiry(self._client)
+        if expiry is None and self._authorized_at is not None:
+            expiry = self._authorized_at + DEFAULT_TOKEN_LIFETIME_SECONDS
+        return expiry
+
+    def _authorize(self):
+        start = time.perf_counter()
+        with track("sheets_client.authorize"):
+            self._client = self._transport.authorize()
+        self._authorized_at = time.time()
+        self._metrics["authorizations"] += 1
+        logger.debug("Cliente do Google Sheets autorizado", extra={"fields": {
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}})
+
+    def _refresh(self):
+        try:
+            with track("sheets_client.refresh"):
+                self._transport.refresh(self._client)
+            self._authorized_at = time.time()
+            self._metrics["refreshes"] += 1
+        except Exception as e:
+            # Sem renovação possível: autorizar novamente do zero
+            logger.warning(f"Falha ao renovar o token do Google Sheets: {e}")
+            self.reset()
+            self._authorize()
+
+    def get_client(self):
+        """
+        Obtém o cliente autorizado, autorizando na primeira chamada e renovando o
+        token quando estiver perto de expirar.
+
+        Returns:
+            Cliente do gspread (ou do transporte configurado)
+        """
+        with self._lock:
+            if self._client is None:
+                self._authorize()
+            else:
+                expiry = self._token_expiry()
+                if expiry is not None and expiry - time.time() <= REFRESH_MARGIN_SECONDS:
+                    self._refresh()
+            return self._client
+
+    @contextmanager
+    def measure(self, operation):
+        """
+        Mede uma chamada à API (latência e erros).
+
+        Um erro 401 descarta o cliente, para que a próxima chamada autorize novamente.
+
+        Exemplo:
+            with get_client_manager().measure("values_batch_get"):
+                spreadsheet.values_batch_get(ranges)
+        """
+        start = time.perf_counter()
+        try:
+            with track(f"sheets_client.{operation}"):
+                yield
+        except Exception as e:
+            self._record(operation, time.perf_counter() - start, error=e)
+            if _get_status_code(e) == 401:
+                self.reset()
+            raise
+        self._record(operation, time.perf_counter() - start)
+
+    def call(self, operation, func, *args, **kwargs):
+        """
+        Executa func(cliente, *args, **kwargs) com o cliente autorizado, medindo a chamada.
+
+        Args:
+            operation: Nome da operação (usado nas métricas)
+            func: Função que recebe o cliente como primeiro argumento
+        """
+        client = self.get_client()
+        with self.measure(operation):
+            return func(client, *args, **kwargs)
+
+    def _record(self, operation, elapsed, error=None):
+        with self._lock:
+            metrics = self._metrics
+            metrics["calls"] += 1
+            metrics["total_latency"] += elapsed
+            metrics["max_latency"] = max(metrics["max_latency"], elapsed)
+            metrics["last_latency"] = elapsed
+            now = datetime.now().isoformat()
+            if error is None:
+                metrics["last_success_at"] = now
+            else:
+                metrics["errors"] += 1
+                metrics["last_error"] = f"{operation}: {error}"
+                metrics["last_error_at"] = now
+
+    def reset(self):
+        """
+        Descarta o cliente atual (ex: após trocar as credenciais).
+
+        As planilhas e abas abertas com ele (cache de sheets_data) também são
+        descartadas, para não continuarem usando a sessão antiga.
+        """
+        from sheets_data import clear_sheets_cache
+
+        with self._lock:
+            if self._client is not None:
+                try:
+                    self._transport.close(self._client)
+                except Exception:
+                    pass
+            self._client = None
+            self._authorized_at = None
+            clear_sheets_cache()
+
+    def get_health(self):
+        """
+        Retorna o estado do cliente e as métricas acumuladas.
+
+        Returns:
+            dict: authorized, token_expires_in (segundos), contadores e latências (ms)
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            authorized = self._client is not None
+            expiry = self._token_expiry() if authorized else None
+
+        calls = metrics.pop("calls")
+        total_latency = metrics.pop("total_latency")
+        max_latency = metrics.pop("max_latency")
+        last_latency = metrics.pop("last_latency")
+        return {
+            "authorized": authorized,
+            "authorized_at": (datetime.fromtimestamp(self._authorized_at).isoformat()
+                              if self._authorized_at else None),
+            "token_expires_in": int(expiry - time.time()) if expiry is not None else None,
+            "calls": calls,
+            "error_rate": metrics["errors"] / calls if calls else 0.0,
+            "avg_latency_ms": round(total_latency / calls * 1000, 1) if calls else None,
+            "max_latency_ms": round(max_latency * 1000, 1) if calls else None,
+            "last_latency_ms": round(last_latency * 1000, 1) if last_latency is not None else None,
+            **metrics,
+        }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_client_manager():
+    """Retorna o gerenciador de cliente compartilhado pelo processo"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = SheetsClientManager()
+    return _manager
+
+
+def set_transport(transport):
+    """
+    Substitui o transporte do Google Sheets (descartando o cliente atual).
+
+    Args:
+        transport: Objeto com os métodos authorize(), token_expiry(client),
+            refresh(client) e close(client)
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.reset()
+        _manager = SheetsClientManager(transport)
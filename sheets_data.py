@@ -5,9 +5,13 @@ import os
 import json
 import datetime
 import gspread
+from gspread.utils import rowcol_to_a1
 from oauth2client.service_account import ServiceAccountCredentials
 import pandas as pd
 import streamlit as st
+from profiling import timed
+import archive_store
+from sheets_client import get_client_manager
 
 # Constantes
 PROCESSES_SHEET_NAME = "Processos"
@@ -15,6 +19,22 @@ USERS_SHEET_NAME = "Usuários"
 CONFIG_SHEET_NAME = "Configurações"
 STATUS_SHEET_NAME = "Status"
 
+# Abas lidas em uma única requisição, nesta ordem
+ALL_SHEET_NAMES = [PROCESSES_SHEET_NAME, USERS_SHEET_NAME, CONFIG_SHEET_NAME, STATUS_SHEET_NAME]
+
+# Colunas convertidas na leitura da aba de processos (as demais permanecem como texto)
+NUMERIC_PROCESS_COLUMNS = ["free_time", "storage_days"]
+BOOLEAN_PROCESS_COLUMNS = ["archived"]
+
+# Máximo de células por requisição de gravação (mantém o payload abaixo do limite da API)
+WRITE_CHUNK_CELLS = 40000
+
+# Abas e metadados já obtidos, por ID da planilha
+_sheets_cache = {}
+
+# Planilhas já abertas: (id, nome) -> (cliente usado, planilha)
+_spreadsheets = {}
+
 def get_credentials():
     """
     Verifica e retorna as credenciais para acessar a API do Google Sheets.
@@ -68,17 +88,16 @@ def get_google_sheets_client():
     """
     Obter cliente autenticado do Google Sheets
     
+    O cliente é autorizado uma única vez por processo e reaproveitado
+    (ver sheets_client.SheetsClientManager).
+    
     Returns:
         gspread.Client: Cliente autenticado para acesso às planilhas
     """
-    credentials = get_credentials()
-    if credentials:
-        try:
-            # Convertemos explicitamente para garantir compatibilidade de tipos
-            client = gspread.authorize(credentials)
-            return client
-        except Exception as e:
-            st.error(f"Erro ao autorizar cliente do Google Sheets: {str(e)}")
+    try:
+        return get_client_manager().get_client()
+    except Exception as e:
+        st.error(f"Erro ao autorizar cliente do Google Sheets: {str(e)}")
     return None
 
 def get_spreadsheet(spreadsheet_id=None, spreadsheet_name=None):
@@ -96,30 +115,75 @@ def get_spreadsheet(spreadsheet_id=None, spreadsheet_name=None):
     if not client:
         return None
     
+    # Reaproveitar a planilha já aberta com o mesmo cliente
+    key = (spreadsheet_id, spreadsheet_name)
+    cached = _spreadsheets.get(key)
+    if cached and cached[0] is client:
+        return cached[1]
+    
+    manager = get_client_manager()
     try:
+        spreadsheet = None
+        
         # Tentar obter por ID se fornecido
         if spreadsheet_id:
-            return client.open_by_key(spreadsheet_id)
-        
-        # Se não tiver ID mas tiver nome, tentar obter por nome
-        if spreadsheet_name:
+            spreadsheet = manager.call("open_by_key", lambda c: c.open_by_key(spreadsheet_id))
+        else:
+            # Se não tiver ID nem nome, usar o padrão
+            name = spreadsheet_name or "JGR Broker - Dados"
             try:
-                return client.open(spreadsheet_name)
+                spreadsheet = manager.call("open", lambda c: c.open(name))
             except gspread.exceptions.SpreadsheetNotFound:
                 # Se não encontrar, criar uma nova
-                return client.create(spreadsheet_name)
+                spreadsheet = manager.call("create", lambda c: c.create(name))
         
-        # Se não tiver ID nem nome, usar o padrão
-        spreadsheet_name = "JGR Broker - Dados"
-        try:
-            return client.open(spreadsheet_name)
-        except gspread.exceptions.SpreadsheetNotFound:
-            return client.create(spreadsheet_name)
+        _spreadsheets[key] = (client, spreadsheet)
+        return spreadsheet
             
     except Exception as e:
         st.error(f"Erro ao acessar planilha: {str(e)}")
         return None
 
+def _get_sheets_cache(spreadsheet):
+    """Obtém (ou cria) o cache de abas e metadados de uma planilha"""
+    cache = _sheets_cache.get(spreadsheet.id)
+    if cache is None:
+        # extents: título da aba -> (linhas, colunas) com dados, conforme a última leitura/gravação
+        cache = {"worksheets": None, "last_sync": None, "last_sync_row": None, "extents": {}}
+        _sheets_cache[spreadsheet.id] = cache
+    return cache
+
+def clear_sheets_cache():
+    """Descarta as planilhas, abas e metadados em cache (ex: após trocar as credenciais)"""
+    _sheets_cache.clear()
+    _spreadsheets.clear()
+
+def get_worksheets(spreadsheet, refresh=False):
+    """
+    Obtém as abas da planilha, listando-as na API apenas na primeira chamada
+    
+    Args:
+        spreadsheet: Objeto de planilha do Google Sheets
+        refresh: Se True, lista novamente as abas
+    
+    Returns:
+        dict: Título da aba -> objeto da aba
+    """
+    cache = _get_sheets_cache(spreadsheet)
+    if cache["worksheets"] is None or refresh:
+        with get_client_manager().measure("worksheets"):
+            cache["worksheets"] = {sheet.title: sheet for sheet in spreadsheet.worksheets()}
+    return cache["worksheets"]
+
+def get_worksheet(spreadsheet, name):
+    """Obtém uma aba pelo nome usando o cache de abas"""
+    worksheets = get_worksheets(spreadsheet)
+    worksheet = worksheets.get(name)
+    if worksheet is None:
+        worksheet = spreadsheet.worksheet(name)
+        worksheets[name] = worksheet
+    return worksheet
+
 def initialize_sheets(spreadsheet):
     """
     Inicializa as planilhas necessárias se não existirem
@@ -131,8 +195,8 @@ def initialize_sheets(spreadsheet):
         return
     
     try:
-        # Verificar as planilhas existentes
-        existing_sheets = [sheet.title for sheet in spreadsheet.worksheets()]
+        # Verificar as planilhas existentes (lista em cache, sem nova requisição)
+        existing_sheets = get_worksheets(spreadsheet)
         
         # Criar planilhas necessárias se não existirem
         if PROCESSES_SHEET_NAME not in existing_sheets:
@@ -146,6 +210,7 @@ def initialize_sheets(spreadsheet):
                       "di", "invoice_number", "return_date", "archived", "client_id",
                       "observations", "events", "last_update"]
             processes_sheet.append_row(headers)
+            existing_sheets[PROCESSES_SHEET_NAME] = processes_sheet
         
         if USERS_SHEET_NAME not in existing_sheets:
             users_sheet = spreadsheet.add_worksheet(title=USERS_SHEET_NAME, rows=100, cols=10)
@@ -156,6 +221,7 @@ def initialize_sheets(spreadsheet):
             # Adicionar usuário admin padrão
             admin_user = ["admin", "admin", "Administrador", "admin", "", "", "", ""]
             users_sheet.append_row(admin_user)
+            existing_sheets[USERS_SHEET_NAME] = users_sheet
         
         if CONFIG_SHEET_NAME not in existing_sheets:
             config_sheet = spreadsheet.add_worksheet(title=CONFIG_SHEET_NAME, rows=100, cols=2)
@@ -164,8 +230,11 @@ def initialize_sheets(spreadsheet):
             config_sheet.append_row(headers)
             
             # Adicionar configurações padrão
-            config_sheet.append_row(["storage_days_per_period", "15"])
-            config_sheet.append_row(["last_sync", datetime.datetime.now().isoformat()])
+            config_sheet.append_rows([
+                ["storage_days_per_period", "15"],
+                ["last_sync", datetime.datetime.now().isoformat()]
+            ])
+            existing_sheets[CONFIG_SHEET_NAME] = config_sheet
         
         if STATUS_SHEET_NAME not in existing_sheets:
             status_sheet = spreadsheet.add_worksheet(title=STATUS_SHEET_NAME, rows=100, cols=3)
@@ -181,8 +250,8 @@ def initialize_sheets(spreadsheet):
                 ["Navio em Santos", "#4169e1", "importacao"],
                 ["Documentos recebidos", "#20b2aa", "exportacao"]
             ]
-            for status in default_status:
-                status_sheet.append_row(status)
+            status_sheet.append_rows(default_status)
+            existing_sheets[STATUS_SHEET_NAME] = status_sheet
         
     except Exception as e:
         st.error(f"Erro ao inicializar planilhas: {str(e)}")
@@ -208,51 +277,201 @@ def sheet_to_dataframe(worksheet):
         st.error(f"Erro ao converter planilha para DataFrame: {str(e)}")
         return pd.DataFrame()
 
+def values_to_dataframe(values):
+    """
+    Converte os valores de uma aba (primeira linha como cabeçalho) em DataFrame
+    
+    Args:
+        values: Lista de linhas retornada pela API (linhas podem ter tamanhos diferentes)
+    
+    Returns:
+        pandas.DataFrame: DataFrame com os dados da aba (células vazias como "")
+    """
+    if not values:
+        return pd.DataFrame()
+    
+    headers = values[0]
+    df = pd.DataFrame(values[1:])
+    # A API omite as células vazias no fim de cada linha
+    df = df.reindex(columns=range(len(headers))).fillna("")
+    df.columns = headers
+    return df
+
+def fetch_sheets(spreadsheet, sheet_names):
+    """
+    Lê as abas informadas em uma única requisição
+    
+    Args:
+        spreadsheet: Objeto de planilha do Google Sheets
+        sheet_names: Nomes das abas a ler
+    
+    Returns:
+        dict: Nome da aba -> DataFrame
+    """
+    ranges = [_quote_sheet_title(name) for name in sheet_names]
+    with get_client_manager().measure("values_batch_get"):
+        response = spreadsheet.values_batch_get(ranges)
+    value_ranges = response.get("valueRanges", [])
+    
+    extents = _get_sheets_cache(spreadsheet)["extents"]
+    frames = {}
+    for name, value_range in zip(sheet_names, value_ranges):
+        values = value_range.get("values", [])
+        frames[name] = values_to_dataframe(values)
+        extents[name] = (len(values), max((len(row) for row in values), default=0))
+    return frames
+
+def fetch_all_sheets(spreadsheet):
+    """
+    Lê todas as abas usadas pelo sistema em uma única requisição
+    
+    Args:
+        spreadsheet: Objeto de planilha do Google Sheets
+    
+    Returns:
+        dict: Nome da aba -> DataFrame
+    """
+    return fetch_sheets(spreadsheet, ALL_SHEET_NAMES)
+
+def _numericise(series):
+    """Converte para número os valores numéricos de uma coluna (os demais são mantidos)"""
+    numeric = pd.to_numeric(series, errors="coerce")
+    valid = numeric.notna()
+    converted = series.astype(object).copy()
+    if valid.any():
+        converted[valid] = [int(v) if float(v).is_integer() else float(v) for v in numeric[valid]]
+    return converted
+
+def _parse_json_list(value):
+    """Converte o texto JSON de uma célula em lista (vazia se inválido)"""
+    if not value or not isinstance(value, str):
+        return []
+    try:
+        return json.loads(value)
+    except ValueError:
+        return []
+
+def coerce_processes_frame(processes_df):
+    """
+    Converte os tipos das colunas da aba de processos de uma só vez
+    
+    Args:
+        processes_df: DataFrame lido da aba de processos (todos os valores como texto)
+    
+    Returns:
+        pandas.DataFrame: DataFrame com eventos, números e booleanos convertidos
+    """
+    if processes_df.empty:
+        return processes_df
+    
+    if 'events' in processes_df.columns:
+        processes_df['events'] = processes_df['events'].map(_parse_json_list)
+    
+    for col in NUMERIC_PROCESS_COLUMNS:
+        if col in processes_df.columns:
+            processes_df[col] = _numericise(processes_df[col])
+    
+    for col in BOOLEAN_PROCESS_COLUMNS:
+        if col in processes_df.columns:
+            processes_df[col] = processes_df[col].astype(str).str.strip().str.upper().isin(["TRUE", "1", "SIM"])
+    
+    return processes_df
+
+def _quote_sheet_title(title):
+    """Título da aba no formato aceito em intervalos A1 (ex: 'Usuários')"""
+    return "'" + title.replace("'", "''") + "'"
+
+def dataframe_to_values(df):
+    """
+    Converte um DataFrame na lista de linhas gravada na planilha (cabeçalho incluído)
+    
+    Listas e dicionários (ex: eventos) são gravados como JSON e valores ausentes como "".
+    """
+    df = df.copy()
+    
+    # Converter eventos e outras colunas complexas para string JSON
+    for col in df.columns:
+        if col == 'events' or (df[col].dtype == object and
+                               df[col].map(lambda x: isinstance(x, (dict, list))).any()):
+            df[col] = df[col].map(lambda x: json.dumps(x) if x else "")
+    
+    # astype(object) devolve tipos do Python (int, float, bool), serializáveis em JSON
+    df = df.astype(object).where(df.notna(), "")
+    
+    values = [[str(col) for col in df.columns]]
+    values.extend(df.values.tolist())
+    return values
+
 def dataframe_to_sheet(df, worksheet, clear=True):
     """
     Salva um DataFrame do pandas em uma planilha do Google Sheets
     
+    Os valores são gravados por intervalo (A1:<última coluna><última linha>), em
+    blocos de até WRITE_CHUNK_CELLS células por requisição. A planilha não é
+    redimensionada para apagar os dados anteriores: apenas as linhas e colunas que
+    sobraram da gravação anterior são limpas.
+    
     Args:
         df: DataFrame a ser salvo
         worksheet: Planilha onde salvar os dados
-        clear: Se True, limpa a planilha antes de salvar
+        clear: Se True, limpa os dados anteriores que ficaram fora da nova tabela
     """
     if df.empty or not worksheet:
         return
     
     try:
-        # Obter cabeçalhos atuais da planilha
-        headers = worksheet.row_values(1)
+        values = dataframe_to_values(df)
+        n_rows, n_cols = len(values), len(values[0])
+        
+        spreadsheet = worksheet.spreadsheet
+        title = _quote_sheet_title(worksheet.title)
+        extents = _get_sheets_cache(spreadsheet)["extents"]
+        manager = get_client_manager()
+        
+        # Aumentar a grade apenas se a tabela não couber (nunca reduzir)
+        if worksheet.row_count < n_rows or worksheet.col_count < n_cols:
+            with manager.measure("resize"):
+                worksheet.resize(rows=max(worksheet.row_count, n_rows),
+                                 cols=max(worksheet.col_count, n_cols))
+        
+        # Gravar em blocos de linhas
+        rows_per_chunk = max(1, WRITE_CHUNK_CELLS // n_cols)
+        for start in range(0, n_rows, rows_per_chunk):
+            chunk = values[start:start + rows_per_chunk]
+            cells_range = f"{title}!{rowcol_to_a1(start + 1, 1)}:{rowcol_to_a1(start + len(chunk), n_cols)}"
+            with manager.measure("values_batch_update"):
+                spreadsheet.values_batch_update({
+                    "valueInputOption": "RAW",
+                    "data": [{"range": cells_range, "values": chunk}],
+                })
         
+        # Limpar o que sobrou da gravação anterior (linhas e colunas a mais)
         if clear:
-            # Limpar planilha mantendo os cabeçalhos
-            worksheet.resize(rows=1)
-            worksheet.resize(rows=df.shape[0] + 1)  # +1 para os cabeçalhos
-        
-        # Converter eventos e outras colunas complexas para string JSON
-        for col in df.columns:
-            if col in ['events'] or df[col].apply(lambda x: isinstance(x, (dict, list))).any():
-                df[col] = df[col].apply(lambda x: json.dumps(x) if x else "")
-        
-        # Preparar valores para atualização
-        values = [df.columns.tolist()]  # cabeçalhos
-        values.extend(df.values.tolist())  # dados
-        
-        # Atualizar planilha
-        cells_range = f'A1:{chr(64 + len(values[0]))}{len(values)}'
-        cell_list = worksheet.range(cells_range)
-        
-        # Preencher valores
-        for i, row in enumerate(values):
-            for j, val in enumerate(row):
-                cell_list[i * len(row) + j].value = val
-        
-        # Atualizar células
-        worksheet.update_cells(cell_list)
-        
+            # Sem leitura anterior, considerar toda a grade da aba
+            old_rows, old_cols = extents.get(worksheet.title) or (worksheet.row_count, worksheet.col_count)
+            stale_ranges = []
+            if old_rows > n_rows:
+                last_col = max(old_cols, n_cols)
+                stale_ranges.append(f"{title}!{rowcol_to_a1(n_rows + 1, 1)}:{rowcol_to_a1(old_rows, last_col)}")
+            if old_cols > n_cols:
+                stale_ranges.append(f"{title}!{rowcol_to_a1(1, n_cols + 1)}:{rowcol_to_a1(min(old_rows, n_rows), old_cols)}")
+            if stale_ranges:
+                with manager.measure("values_batch_clear"):
+                    spreadsheet.values_batch_clear(body={"ranges": stale_ranges})
+        
+        extents[worksheet.title] = (n_rows, n_cols)
+
+        # A aba de configurações foi regravada: a linha do last_sync mudou de lugar
+        # (ou deixou de existir) e update_sync_timestamp não pode usar a anterior
+        if worksheet.title == CONFIG_SHEET_NAME:
+            keys = [row[0] if row else "" for row in values[1:]]
+            cache = _get_sheets_cache(spreadsheet)
+            cache["last_sync_row"] = keys.index("last_sync") + 2 if "last_sync" in keys else None
+
     except Exception as e:
         st.error(f"Erro ao salvar DataFrame na planilha: {str(e)}")
 
+@timed("sheets_data.load_from_sheets")
 def load_from_sheets():
     """
     Carrega todos os dados das planilhas do Google Sheets
@@ -271,56 +490,41 @@ def load_from_sheets():
     initialize_sheets(spreadsheet)
     
     try:
-        # Carregar dados de processos
-        processes_sheet = spreadsheet.worksheet(PROCESSES_SHEET_NAME)
-        processes_df = sheet_to_dataframe(processes_sheet)
-        
-        # Converter colunas de eventos e outras de JSON para dicionários/listas
-        if not processes_df.empty and 'events' in processes_df.columns:
-            processes_df['events'] = processes_df['events'].apply(
-                lambda x: json.loads(x) if x and isinstance(x, str) else []
-            )
-        
-        # Converter DataFrame para lista de dicionários
+        # Ler as quatro abas em uma única requisição
+        frames = fetch_all_sheets(spreadsheet)
+        
+        # Carregar dados de processos (conversão de tipos por coluna)
+        processes_df = coerce_processes_frame(frames[PROCESSES_SHEET_NAME])
+        if 'id' in processes_df.columns:
+            # Linhas em branco (processos excluídos pela sincronização bidirecional)
+            processes_df = processes_df[processes_df['id'].astype(str).str.strip() != ""]
         processes = processes_df.to_dict('records') if not processes_df.empty else []
         
-        # Carregar dados de usuários
-        users_sheet = spreadsheet.worksheet(USERS_SHEET_NAME)
-        users_df = sheet_to_dataframe(users_sheet)
-        
-        # Converter DataFrame para dicionários indexados por username
+        # Converter usuários para dicionários indexados por username
+        users_df = frames[USERS_SHEET_NAME]
         users = {}
         if not users_df.empty:
-            for _, row in users_df.iterrows():
-                users[row['username']] = row.to_dict()
-        
-        # Carregar configurações
-        config_sheet = spreadsheet.worksheet(CONFIG_SHEET_NAME)
-        config_df = sheet_to_dataframe(config_sheet)
+            users = {row['username']: row for row in users_df.to_dict('records')}
         
-        # Converter DataFrame para dicionário
+        # Converter configurações para dicionário (valores numéricos convertidos)
+        config_df = frames[CONFIG_SHEET_NAME]
         config = {}
         if not config_df.empty:
-            for _, row in config_df.iterrows():
-                # Tentar converter valor para número se possível
-                try:
-                    value = str(row['value'])
-                    if value.isdigit():
-                        value = int(value)
-                    elif value.replace('.', '', 1).isdigit():
-                        value = float(value)
-                    config[str(row['key'])] = value
-                except:
-                    config[str(row['key'])] = str(row['value'])
-        
-        # Carregar configurações de status
-        status_sheet = spreadsheet.worksheet(STATUS_SHEET_NAME)
-        status_df = sheet_to_dataframe(status_sheet)
-        
-        # Converter DataFrame para formato usado pela aplicação
+            keys = config_df['key'].astype(str)
+            config = dict(zip(keys, _numericise(config_df['value'].astype(str))))
+            
+            # Guardar a linha do last_sync para atualizá-la sem precisar procurá-la
+            cache = _get_sheets_cache(spreadsheet)
+            last_sync_rows = (keys == "last_sync").to_numpy().nonzero()[0]
+            if len(last_sync_rows):
+                cache["last_sync_row"] = int(last_sync_rows[0]) + 2  # +1 cabeçalho, +1 base 1
+                cache["last_sync"] = str(config_df['value'].iloc[last_sync_rows[0]])
+        
+        # Converter configurações de status para o formato usado pela aplicação
+        status_df = frames[STATUS_SHEET_NAME]
         status_config = {"importacao": [], "exportacao": [], "both": []}
         if not status_df.empty:
-            for _, row in status_df.iterrows():
+            for row in status_df.to_dict('records'):
                 status_item = {"status": row['status'], "color": row['color']}
                 process_type = row['process_type']
                 
@@ -352,6 +556,7 @@ def load_from_sheets():
         from data import load_data
         return load_data()
 
+@timed("sheets_data.save_to_sheets")
 def save_to_sheets(data):
     """
     Salva todos os dados nas planilhas do Google Sheets
@@ -373,24 +578,24 @@ def save_to_sheets(data):
     initialize_sheets(spreadsheet)
     
     try:
-        # Salvar dados de processos
-        processes = data.get("processes", [])
+        # Salvar dados de processos (ativos e arquivados, que ficam no armazenamento frio)
+        processes = data.get("processes", []) + archive_store.load_archived()
         processes_df = pd.DataFrame(processes)
-        processes_sheet = spreadsheet.worksheet(PROCESSES_SHEET_NAME)
+        processes_sheet = get_worksheet(spreadsheet, PROCESSES_SHEET_NAME)
         dataframe_to_sheet(processes_df, processes_sheet)
         
         # Salvar dados de usuários
         users = data.get("users", {})
         users_list = list(users.values())
         users_df = pd.DataFrame(users_list)
-        users_sheet = spreadsheet.worksheet(USERS_SHEET_NAME)
+        users_sheet = get_worksheet(spreadsheet, USERS_SHEET_NAME)
         dataframe_to_sheet(users_df, users_sheet)
         
         # Salvar configurações
         config = data.get("config", {})
         config_list = [{"key": k, "value": str(v)} for k, v in config.items()]
         config_df = pd.DataFrame(config_list)
-        config_sheet = spreadsheet.worksheet(CONFIG_SHEET_NAME)
+        config_sheet = get_worksheet(spreadsheet, CONFIG_SHEET_NAME)
         dataframe_to_sheet(config_df, config_sheet)
         
         # Salvar configurações de status
@@ -435,7 +640,7 @@ def save_to_sheets(data):
                 })
         
         status_df = pd.DataFrame(status_list)
-        status_sheet = spreadsheet.worksheet(STATUS_SHEET_NAME)
+        status_sheet = get_worksheet(spreadsheet, STATUS_SHEET_NAME)
         dataframe_to_sheet(status_df, status_sheet)
         
         # Atualizar timestamp da última sincronização
@@ -457,18 +662,32 @@ def update_sync_timestamp(spreadsheet):
         spreadsheet: Objeto de planilha do Google Sheets
     """
     try:
-        config_sheet = spreadsheet.worksheet(CONFIG_SHEET_NAME)
+        config_sheet = get_worksheet(spreadsheet, CONFIG_SHEET_NAME)
+        cache = _get_sheets_cache(spreadsheet)
         now = datetime.datetime.now().isoformat()
         
-        # Verificar se já existe a linha
-        cell = config_sheet.find("last_sync")
-        if cell:
-            config_sheet.update_cell(cell.row, 2, now)
-        else:
-            config_sheet.append_row(["last_sync", now])
+        # Procurar a linha apenas se ela ainda não for conhecida
+        row = cache["last_sync_row"]
+        if row is None:
+            cell = config_sheet.find("last_sync")
+            row = cell.row if cell else None
+        
+        with get_client_manager().measure("update_sync_timestamp"):
+            if row:
+                config_sheet.update_cell(row, 2, now)
+            else:
+                config_sheet.append_row(["last_sync", now])
+                extent = cache["extents"].get(CONFIG_SHEET_NAME)
+                if extent:
+                    row = extent[0] + 1
+                    cache["extents"][CONFIG_SHEET_NAME] = (row, max(extent[1], 2))
+        
+        cache["last_sync_row"] = row
+        cache["last_sync"] = now
     except Exception as e:
         print(f"Erro ao atualizar timestamp de sincronização: {str(e)}")
 
+@timed("sheets_data.get_sync_status")
 def get_sync_status():
     """
     Verifica o status de sincronização com o Google Sheets
@@ -498,18 +717,22 @@ def get_sync_status():
         }
     
     try:
-        # Obter informações sobre as planilhas
-        sheets = [sheet.title for sheet in spreadsheet.worksheets()]
+        # Obter informações sobre as planilhas (do cache, após a primeira consulta)
+        sheets = list(get_worksheets(spreadsheet).keys())
         
-        # Obter timestamp da última sincronização
-        last_sync = None
-        try:
-            config_sheet = spreadsheet.worksheet(CONFIG_SHEET_NAME)
-            cell = config_sheet.find("last_sync")
-            if cell:
-                last_sync = config_sheet.cell(cell.row, 2).value
-        except:
-            pass
+        # Obter timestamp da última sincronização (lido uma única vez se ainda não conhecido)
+        cache = _get_sheets_cache(spreadsheet)
+        if cache["last_sync"] is None and CONFIG_SHEET_NAME in sheets:
+            try:
+                config_values = get_worksheet(spreadsheet, CONFIG_SHEET_NAME).get_all_values()
+                for i, row in enumerate(config_values):
+                    if row and row[0] == "last_sync":
+                        cache["last_sync_row"] = i + 1
+                        cache["last_sync"] = row[1] if len(row) > 1 else None
+                        break
+            except Exception:
+                pass
+        last_sync = cache["last_sync"]
         
         return {
             "connected": True,
@@ -549,6 +772,10 @@ def upload_credentials(uploaded_file):
             os.remove("credentials.json")
             return False
         
+        # Autorizar novamente com as novas credenciais na próxima chamada
+        get_client_manager().reset()
+        clear_sheets_cache()
+        
         return True
     except Exception as e:
         st.error(f"Erro ao salvar credenciais: {str(e)}")
@@ -602,6 +829,20 @@ def display_sheets_settings():
             st.write(f"**URL:** {sync_status['spreadsheet_url']}")
             st.write(f"**Última sincronização:** {sync_status['last_sync']}")
             st.write(f"**Abas disponíveis:** {', '.join(sync_status['sheets'])}")
+            
+            # Saúde do cliente e latência das chamadas à API
+            with st.expander("Saúde da conexão"):
+                health = get_client_manager().get_health()
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Chamadas à API", health["calls"])
+                col2.metric("Latência média", f"{health['avg_latency_ms'] or 0} ms")
+                col3.metric("Taxa de erros", f"{health['error_rate']:.0%}")
+                
+                if health["token_expires_in"] is not None:
+                    st.caption(f"Token expira em {max(health['token_expires_in'], 0) // 60} min "
+                               f"(autorizações: {health['authorizations']}, renovações: {health['refreshes']})")
+                if health["last_error"]:
+                    st.caption(f"Último erro ({health['last_error_at']}): {health['last_error']}")
         else:
             st.warning("⚠️ Não conectado ao Google Sheets")
             if "error" in sync_status:
@@ -695,8 +936,9 @@ def display_sheets_settings():
                     # Carregar do Google Sheets
                     sheets_data = load_from_sheets()
                     
-                    # Salvar localmente
-                    from data import save_data
+                    # Salvar localmente (os arquivados vão para o armazenamento frio)
+                    from data import save_data, move_archived_to_cold
+                    move_archived_to_cold(sheets_data)
                     if save_data(sheets_data):
                         st.success("✅ Dados carregados com sucesso!")
                     else:
@@ -704,6 +946,25 @@ def display_sheets_settings():
                     
                     # Reiniciar a aplicação para refletir os novos dados
                     st.rerun()
+        
+        # Sincronização bidirecional: apenas os campos alterados em cada lado
+        if st.button("🔀 Mesclar alterações (app ⇄ planilha)", use_container_width=True,
+                     help="Traz as edições feitas na planilha e envia as feitas no app. "
+                          "Se o mesmo campo foi alterado nos dois lados, vale a alteração mais recente."):
+            with st.spinner("Mesclando alterações..."):
+                from sheets_sync import merge_with_sheets
+                
+                summary = merge_with_sheets()
+                if summary is None:
+                    st.error("❌ Não foi possível acessar a planilha.")
+                else:
+                    st.success(
+                        f"✅ Recebidos {summary['pulled_fields']} campos em {summary['pulled']} processos "
+                        f"(+{summary['added_local']} novos, -{summary['deleted_local']} excluídos); "
+                        f"enviados {summary['pushed_fields']} campos em {summary['pushed']} processos "
+                        f"(+{summary['added_remote']} novos, -{summary['deleted_remote']} excluídos). "
+                        f"Conflitos resolvidos: {summary['conflicts']}."
+                    )
     
     # Modo de operação
     st.divider()
@@ -0,0 +1,459 @@
+"""
+Sincronização bidirecional dos processos com o Google Sheets (mesclagem em três vias).
+
+Cada sincronização compara três versões de cada processo, campo a campo:
+
+- base: o valor de cada campo na última sincronização (sheets_sync_base.json);
+- local: os dados do app;
+- planilha: a aba de processos, lida em uma única requisição.
+
+Um campo alterado apenas de um lado é copiado para o outro. Quando os dois lados
+alteraram o mesmo campo com valores diferentes, vence a alteração mais recente: a
+data de cada alteração local é registrada por campo (sheets_sync_mtimes.json, a
+partir das notificações de data.py) e as alterações da planilha recebem a data da
+última modificação do arquivo no Google Drive.
+
+Somente o que mudou é transferido: as alterações da planilha são aplicadas aos dados
+locais em lote (data.apply_process_changes, uma única gravação) e as alterações
+locais são gravadas na planilha célula a célula, em uma única requisição.
+
+Apenas a aba de processos é mesclada; usuários, configurações e status continuam
+sendo salvos por sheets_data.save_to_sheets.
+"""
+import os
+import json
+import time
+import threading
+from datetime import datetime
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Valores de cada campo na última sincronização
+BASE_FILE = "sheets_sync_base.json"
+
+# Data (epoch) das alterações locais feitas desde a última sincronização
+MTIMES_FILE = "sheets_sync_mtimes.json"
+
+# Campos que existem apenas no app ou que ele recalcula (dias armazenados e período
+# atual, renovado automaticamente a partir da entrada no porto) e não são sincronizados
+EXCLUDED_FIELDS = {"revision", "storage_days", "current_period_start", "current_period_expiry"}
+
+# Campos alterados por cada ação de data.py que não informa o estado anterior
+ACTION_FIELDS = {
+    "add_event": ("events", "last_update"),
+    "edit_event": ("events",),
+    "delete_event": ("events",),
+    "archive": ("archived", "events", "last_update"),
+    "unarchive": ("archived", "events", "last_update"),
+}
+
+_lock = threading.RLock()
+_installed = False
+_mtimes = None
+_mtimes_dirty = False
+
+
+def normalize_value(value):
+    """
+    Converte um valor para a forma usada na comparação entre os lados.
+
+    A planilha devolve texto, números e booleanos; os dados locais podem ter listas,
+    dicionários e números. Valores vazios, None e False são equivalentes.
+    """
+    if value is None or value is False or value == "" or value == [] or value == {}:
+        return ""
+    if value is True:
+        return "TRUE"
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ""
+        return str(int(value)) if value.is_integer() else repr(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return str(value)
+
+
+def _cell_value(value):
+    """Valor gravado na célula da planilha"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value) if value else ""
+    if value is None:
+        return ""
+    return value
+
+
+def _load_json(path, default):
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Erro ao carregar {path}: {e}")
+    return default
+
+
+def _save_json(path, content):
+    """Grava o arquivo de forma atômica"""
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(content, f, ensure_ascii=False)
+    os.replace(tmp_file, path)
+
+
+def load_base():
+    """Carrega o estado da última sincronização (ou None se nunca houve)"""
+    return _load_json(BASE_FILE, None)
+
+
+def _get_mtimes():
+    global _mtimes
+    if _mtimes is None:
+        _mtimes = _load_json(MTIMES_FILE, {"fields": {}, "deleted": {}})
+    return _mtimes
+
+
+# ---------------------------------------------------------------------------
+# Registro das alterações locais
+# ---------------------------------------------------------------------------
+
+def _changed_fields(change):
+    """Campos alterados por uma notificação de data.py"""
+    action, before, after = change["action"], change.get("before"), change.get("after")
+    if action in ACTION_FIELDS:
+        return ACTION_FIELDS[action]
+    if action == "add" and after:
+        return tuple(after.keys())
+    if before and after:
+        return tuple(f for f in set(before) | set(after)
+                     if normalize_value(before.get(f)) != normalize_value(after.get(f)))
+    return ()
+
+
+def handle_change(change):
+    """Registra a data das alterações locais (apenas após a primeira sincronização)"""
+    # Alterações aplicadas pela própria sincronização não são alterações locais
+    if change.get("source") == "sheets" or not os.path.exists(BASE_FILE):
+        return
+
+    global _mtimes_dirty
+    with _lock:
+        mtimes = _get_mtimes()
+        now = time.time()
+        process_id = change["process_id"]
+
+        if change["action"] == "delete":
+            mtimes["deleted"][process_id] = now
+            mtimes["fields"].pop(process_id, None)
+            _mtimes_dirty = True
+        else:
+            fields = [f for f in _changed_fields(change) if f not in EXCLUDED_FIELDS]
+            if fields:
+                process_mtimes = mtimes["fields"].setdefault(process_id, {})
+                for field in fields:
+                    process_mtimes[field] = now
+                mtimes["deleted"].pop(process_id, None)
+                _mtimes_dirty = True
+
+        # Alterações em lote (data.apply_process_changes): gravar apenas na última
+        if _mtimes_dirty and change.get("batch_last", True):
+            _save_json(MTIMES_FILE, mtimes)
+            _mtimes_dirty = False
+
+
+def install():
+    """Registra o acompanhamento das alterações locais (uma vez por processo)"""
+    global _installed
+    if _installed:
+        return
+    from data import register_change_listener
+
+    register_change_listener(handle_change)
+    _installed = True
+
+
+# ---------------------------------------------------------------------------
+# Mesclagem
+# ---------------------------------------------------------------------------
+
+def _remote_modified_at(spreadsheet):
+    """Data (epoch) da última modificação da planilha no Google Drive"""
+    try:
+        getter = getattr(spreadsheet, "get_lastUpdateTime", None)
+        value = getter() if callable(getter) else getattr(spreadsheet, "lastUpdateTime", None)
+        if value:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except Exception as e:
+        logger.warning(f"Não foi possível obter a data de modificação da planilha: {e}")
+    return time.time()
+
+
+def merge_records(base, local, remote, local_mtimes, remote_mtime, synced_at):
+    """
+    Mescla um processo campo a campo.
+
+    Args:
+        base: {campo: valor normalizado} da última sincronização
+        local: Processo local
+        remote: Processo lido da planilha
+        local_mtimes: {campo: data da alteração local}
+        remote_mtime: Data da última modificação da planilha
+        synced_at: Data da última sincronização
+
+    Returns:
+        tuple: (campos a aplicar localmente, campos a gravar na planilha, conflitos)
+    """
+    to_local, to_remote = {}, {}
+    conflicts = 0
+    for field in (set(base) | set(local) | set(remote)) - EXCLUDED_FIELDS:
+        base_value = base.get(field, "")
+        local_value = normalize_value(local.get(field))
+        remote_value = normalize_value(remote.get(field))
+        if local_value == remote_value:
+            continue
+
+        local_changed = local_value != base_value
+        remote_changed = remote_value != base_value
+        if local_changed and remote_changed:
+            # Conflito: vence a alteração mais recente
+            conflicts += 1
+            if local_mtimes.get(field, synced_at) >= remote_mtime:
+                to_remote[field] = local.get(field)
+            else:
+                to_local[field] = remote.get(field)
+        elif remote_changed:
+            to_local[field] = remote.get(field)
+        else:
+            to_remote[field] = local.get(field)
+    return to_local, to_remote, conflicts
+
+
+def _column_runs(columns):
+    """Agrupa índices de coluna consecutivos: [1, 2, 3, 7] -> [(1, 3), (7, 7)]"""
+    runs = []
+    for col in sorted(columns):
+        if runs and runs[-1][1] == col - 1:
+            runs[-1][1] = col
+        else:
+            runs.append([col, col])
+    return runs
+
+
+def _write_remote(spreadsheet, worksheet, header, row_numbers, last_row, remote_updates, new_rows,
+                  deleted_ids):
+    """
+    Grava na planilha apenas as células alteradas, as linhas novas e limpa as
+    linhas excluídas (no máximo uma requisição de gravação e uma de limpeza).
+    """
+    from gspread.utils import rowcol_to_a1
+    from sheets_client import get_client_manager
+    from sheets_data import _quote_sheet_title, _get_sheets_cache, WRITE_CHUNK_CELLS
+
+    title = _quote_sheet_title(worksheet.title)
+    manager = get_client_manager()
+
+    # Campos ainda sem coluna na planilha
+    columns = {field: i + 1 for i, field in enumerate(header)}
+    new_fields = []
+    for fields in list(remote_updates.values()) + new_rows:
+        for field in fields:
+            if field not in columns and field not in EXCLUDED_FIELDS:
+                columns[field] = len(columns) + 1
+                new_fields.append(field)
+
+    data = []
+    if new_fields:
+        first_col = len(header) + 1
+        data.append({
+            "range": f"{title}!{rowcol_to_a1(1, first_col)}:{rowcol_to_a1(1, first_col + len(new_fields) - 1)}",
+            "values": [new_fields],
+        })
+
+    for process_id, fields in remote_updates.items():
+        row = row_numbers[process_id]
+        by_column = {columns[f]: v for f, v in fields.items() if f in columns}
+        for start, end in _column_runs(by_column):
+            data.append({
+                "range": f"{title}!{rowcol_to_a1(row, start)}:{rowcol_to_a1(row, end)}",
+                "values": [[_cell_value(by_column[c]) for c in range(start, end + 1)]],
+            })
+
+    n_cols = len(columns)
+    if new_rows:
+        ordered_fields = sorted(columns, key=columns.get)
+        values = [[_cell_value(p.get(f)) for f in ordered_fields] for p in new_rows]
+        data.append({
+            "range": f"{title}!{rowcol_to_a1(last_row + 1, 1)}:{rowcol_to_a1(last_row + len(values), n_cols)}",
+            "values": values,
+        })
+        last_row += len(values)
+
+    # Aumentar a grade apenas se necessário
+    if worksheet.row_count < last_row or worksheet.col_count < n_cols:
+        with manager.measure("resize"):
+            worksheet.resize(rows=max(worksheet.row_count, last_row), cols=max(worksheet.col_count, n_cols))
+
+    # Uma requisição por bloco de até WRITE_CHUNK_CELLS células
+    chunk, chunk_cells = [], 0
+    for item in data + [None]:
+        cells = len(item["values"]) * len(item["values"][0]) if item else 0
+        if chunk and (item is None or chunk_cells + cells > WRITE_CHUNK_CELLS):
+            with manager.measure("values_batch_update"):
+                spreadsheet.values_batch_update({"valueInputOption": "RAW", "data": chunk})
+            chunk, chunk_cells = [], 0
+        if item:
+            chunk.append(item)
+            chunk_cells += cells
+
+    # Linhas excluídas ficam em branco (ignoradas na leitura) para não deslocar as demais
+    if deleted_ids:
+        ranges = [f"{title}!{rowcol_to_a1(row_numbers[pid], 1)}:{rowcol_to_a1(row_numbers[pid], n_cols)}"
+                  for pid in deleted_ids]
+        with manager.measure("values_batch_clear"):
+            spreadsheet.values_batch_clear(body={"ranges": ranges})
+
+    extents = _get_sheets_cache(spreadsheet)["extents"]
+    old_rows, old_cols = extents.get(worksheet.title, (0, 0))
+    extents[worksheet.title] = (max(old_rows, last_row), max(old_cols, n_cols))
+
+
+def merge_with_sheets():
+    """
+    Sincroniza os processos com a planilha nos dois sentidos.
+
+    Returns:
+        dict: Quantidades de processos/campos transferidos em cada sentido e de conflitos
+            (ou None se a planilha não estiver acessível)
+    """
+    import streamlit as st
+    import archive_store
+    from data import apply_process_changes
+    from sheets_data import (get_spreadsheet, initialize_sheets, fetch_sheets, get_worksheet,
+                             coerce_processes_frame, PROCESSES_SHEET_NAME)
+
+    spreadsheet = get_spreadsheet()
+    if not spreadsheet:
+        return None
+    initialize_sheets(spreadsheet)
+
+    with _lock:
+        started_at = time.time()
+
+        # Ler apenas a aba de processos (uma requisição) e a data da última modificação
+        frame = fetch_sheets(spreadsheet, [PROCESSES_SHEET_NAME])[PROCESSES_SHEET_NAME]
+        header = [str(col) for col in frame.columns]
+        frame = coerce_processes_frame(frame)
+        remote, row_numbers = {}, {}
+        for i, record in enumerate(frame.to_dict("records")):
+            process_id = str(record.get("id", "")).strip()
+            if process_id:
+                remote[process_id] = record
+                row_numbers[process_id] = i + 2  # +1 cabeçalho, +1 base 1
+        last_row = len(frame) + 1
+        remote_mtime = _remote_modified_at(spreadsheet)
+
+        local_processes = st.session_state.data["processes"]
+        local = {p["id"]: p for p in local_processes}
+        # Arquivados ficam fora da mesclagem (armazenamento frio); a planilha apenas os marca como arquivados
+        archived_ids = archive_store.archived_ids()
+
+        state = load_base()
+        mtimes = _get_mtimes()
+        if state is None or state.get("spreadsheet_id") != spreadsheet.id:
+            # Primeira sincronização: o que já existe nos dois lados parte da versão da planilha
+            state = {"spreadsheet_id": spreadsheet.id, "synced_at": 0, "processes": {
+                pid: {f: normalize_value(v) for f, v in record.items()}
+                for pid, record in remote.items() if pid in local
+            }}
+        base = state["processes"]
+        synced_at = state["synced_at"]
+
+        local_updates, remote_updates = {}, {}
+        new_local, new_remote, delete_local, delete_remote = [], [], [], []
+        # Processos sem versão base (ex: criados com o mesmo ID nos dois lados) e excluídos dos dois lados
+        missing_base, gone = set(), []
+        conflicts = 0
+
+        for process_id in set(local) | set(remote) | set(base):
+            if process_id in archived_ids and process_id not in local:
+                if process_id in remote and normalize_value(remote[process_id].get("archived")) != "TRUE":
+                    remote_updates[process_id] = {"archived": True}
+                continue
+
+            in_local, in_remote, in_base = process_id in local, process_id in remote, process_id in base
+
+            if in_local and in_remote:
+                to_local, to_remote, n_conflicts = merge_records(
+                    base.get(process_id, {}), local[process_id], remote[process_id],
+                    mtimes["fields"].get(process_id, {}), remote_mtime, synced_at)
+                conflicts += n_conflicts
+                if not in_base:
+                    missing_base.add(process_id)
+                if to_local:
+                    local_updates[process_id] = to_local
+                if to_remote:
+                    remote_updates[process_id] = to_remote
+
+            elif in_local:
+                # Excluído da planilha: mantido apenas se alterado localmente desde então
+                if in_base and process_id not in mtimes["fields"]:
+                    delete_local.append(process_id)
+                else:
+                    new_remote.append(local[process_id])
+
+            elif in_remote:
+                remote_record = remote[process_id]
+                remote_changed = in_base and any(
+                    normalize_value(remote_record.get(f)) != v for f, v in base[process_id].items())
+                deleted_at = mtimes["deleted"].get(process_id, synced_at)
+                # Excluído localmente: a linha é limpa, a menos que editada depois na planilha
+                if in_base and not (remote_changed and remote_mtime > deleted_at):
+                    delete_remote.append(process_id)
+                else:
+                    new_local.append({k: v for k, v in remote_record.items() if v != ""})
+
+            else:
+                gone.append(process_id)
+
+        # Aplicar as alterações da planilha aos dados locais (uma única gravação)
+        apply_process_changes(local_updates, new_local, delete_local, source="sheets")
+
+        # Gravar as alterações locais na planilha
+        if remote_updates or new_remote or delete_remote:
+            worksheet = get_worksheet(spreadsheet, PROCESSES_SHEET_NAME)
+            _write_remote(spreadsheet, worksheet, header, row_numbers, last_row, remote_updates,
+                          new_remote, delete_remote)
+
+        # Atualizar a base apenas dos processos que mudaram
+        for process_id in delete_local + delete_remote + gone:
+            base.pop(process_id, None)
+        current = {p["id"]: p for p in st.session_state.data["processes"]}
+        touched = (set(local_updates) | set(remote_updates) | {p["id"] for p in new_local}
+                   | {p["id"] for p in new_remote} | missing_base)
+        for process_id in touched:
+            process = current.get(process_id)
+            if process is not None:
+                base[process_id] = {f: normalize_value(v) for f, v in process.items()
+                                    if f not in EXCLUDED_FIELDS}
+
+        state["synced_at"] = started_at
+        _save_json(BASE_FILE, state)
+
+        # As alterações locais já foram enviadas
+        mtimes["fields"], mtimes["deleted"] = {}, {}
+        _save_json(MTIMES_FILE, mtimes)
+
+    summary = {
+        "pulled": len(local_updates),
+        "pulled_fields": sum(len(f) for f in local_updates.values()),
+        "pushed": len(remote_updates),
+        "pushed_fields": sum(len(f) for f in remote_updates.values()),
+        "added_local": len(new_local),
+        "added_remote": len(new_remote),
+        "deleted_local": len(delete_local),
+        "deleted_remote": len(delete_remote),
+        "conflicts": conflicts,
+    }
+    logger.info("Sincronização com o Google Sheets", extra={"fields": summary})
+    return summary
@@ -6,6 +6,7 @@ import uuid
 import datetime
 from pathlib import Path
 import pandas as pd
+from status_registry import get_registry
 
 def format_date(date_str):
     """Formatar data para exibição"""
@@ -23,22 +24,7 @@ def format_date(date_str):
 
 def get_status_color(status):
     """Obter cor para o status"""
-    status_colors = {
-        "Novo Processo": "#17a2b8",  # Ciano
-        "Pendente": "#ffc107",       # Amarelo
-        "Liberado": "#28a745",       # Verde
-        "Em andamento": "#007bff",   # Azul
-        "Atrasado": "#dc3545",       # Vermelho
-        "BL liberado": "#28a745",    # Verde
-        "Chegada do navio alterada": "#ffc107",  # Amarelo
-        "Aguardando documentos": "#ffc107",     # Amarelo
-        "Aguardando chegada": "#17a2b8",        # Ciano
-        "Em desembaraço": "#007bff",            # Azul
-        "Nacionalizado": "#28a745",             # Verde
-        "Concluído": "#6c757d",                # Cinza
-    }
-    
-    return status_colors.get(status, "#6c757d")  # Cinza como padrão
+    return get_registry().report_color(status)
 
 def generate_html_with_pagination(df, title="Processos de Importação/Exportação", include_details=True, client_name=None):
     """
@@ -268,10 +254,12 @@ def generate_html_with_pagination(df, title="Processos de Importação/Exportaç
 """
 
     # Adicionar linhas da tabela
-    for _, row in df.iterrows():
+    # Cores de todas as linhas em um único mapeamento
+    registry = get_registry()
+    status_colors = registry.map_colors(registry.status_column(df), report=True)
+    for (_, row), status_color in zip(df.iterrows(), status_colors):
         process_id = row['id']
         status = row.get('status', '')
-        status_color = get_status_color(status)
         
         html += f"""
                 <tr data-id="{process_id}" data-status="{status}" data-type="{row.get('type', '')}">
@@ -0,0 +1,169 @@
+"""
+Migração em lote do status dos processos (renomear ou mesclar status).
+
+Quando um status é renomeado ou vários status são unificados em
+components.settings.display_status_manager, os processos existentes continuam com
+os nomes antigos. migrate_statuses regrava todos os processos afetados sob a trava do
+armazenamento: o novo status e um evento de auditoria são gravados primeiro nos
+arquivos de arquivados e depois nos ativos, com data.apply_process_changes (uma
+única gravação de data.json).
+
+Os processos ativos afetados são encontrados por um índice status -> IDs dos processos
+da sessão (data.get_process_index), mantido atualizado pelas notificações de data.py; os
+arquivados, pelas contagens por status do índice do armazenamento frio (archive_store),
+e apenas os arquivos de arquivados com esses status são regravados. Com isso, a
+simulação (dry_run) apenas conta IDs, sem percorrer os processos.
+
+Uso:
+    from status_migration import migrate_statuses
+    migrate_statuses({"Liberado": "BL liberado"}, dry_run=True)   # {"Liberado": 120}
+    migrate_statuses({"Liberado": "BL liberado"})
+"""
+import uuid
+from datetime import datetime
+
+from log_config import get_logger
+from profiling import track
+
+logger = get_logger(__name__)
+
+# Origem informada nas notificações das alterações feitas pela migração
+SOURCE = "status_migration"
+
+class StatusIndex:
+    """Status -> IDs de um conjunto de processos"""
+
+    def __init__(self, processes=()):
+        self.by_status = {}
+        self._status = {}
+        for process in processes:
+            self.update(process["id"], process)
+
+    def update(self, process_id, process):
+        """Inclui, atualiza ou (process None) retira um processo do índice"""
+        old = self._status.pop(process_id, None)
+        if old is not None:
+            ids = self.by_status.get(old)
+            if ids is not None:
+                ids.discard(process_id)
+                if not ids:
+                    del self.by_status[old]
+        if process is not None:
+            status = process.get("status") or ""
+            self._status[process_id] = status
+            self.by_status.setdefault(status, set()).add(process_id)
+
+
+def get_status_index(processes=None):
+    """
+    Índice status -> conjunto de IDs dos processos ativos da sessão.
+
+    O índice é remontado quando a lista de processos é substituída (ex: recarga dos dados).
+    """
+    from data import get_process_index
+
+    return get_process_index("status", StatusIndex, StatusIndex.update, processes).by_status
+
+
+def get_status_counts(processes=None):
+    """Quantidade de processos (ativos e arquivados) em cada status"""
+    import archive_store
+    from data import index_lock
+
+    with index_lock():
+        counts = {status: len(ids) for status, ids in get_status_index(processes).items()}
+    for status, n in archive_store.status_counts().items():
+        counts[status] = counts.get(status, 0) + n
+    return counts
+
+
+def _normalize_mapping(mapping):
+    """Remove do mapeamento status antigo -> novo as entradas vazias ou sem efeito"""
+    return {old: new.strip() for old, new in mapping.items()
+            if new and new.strip() and old != new.strip()}
+
+
+def migrate_statuses(mapping, processes=None, dry_run=False, user=None):
+    """
+    Troca o status de todos os processos conforme o mapeamento.
+
+    Um status renomeado é um mapeamento {antigo: novo}; uma mesclagem mapeia vários
+    status antigos para o mesmo novo status.
+
+    Os processos arquivados são migrados primeiro e data.json é gravado só depois que
+    o armazenamento frio foi regravado: uma falha nos arquivados não altera os ativos.
+    Se a gravação de data.json falhar, os arquivados já estão migrados e os ativos
+    não; como a migração só altera processos que ainda têm um status antigo, basta
+    executá-la de novo para concluí-la.
+
+    Args:
+        mapping: Dicionário status antigo -> novo status
+        processes: Lista de processos (padrão: st.session_state.data["processes"])
+        dry_run: Se True, apenas conta os processos afetados, sem alterar nada
+        user: Nome registrado no evento de auditoria
+
+    Returns:
+        dict: Quantidade de processos afetados por status antigo
+    """
+    import streamlit as st
+    import archive_store
+    from data import apply_process_changes, storage_lock, index_lock
+
+    mapping = _normalize_mapping(mapping)
+    if processes is None:
+        processes = st.session_state.data["processes"]
+
+    with storage_lock():
+        with index_lock():
+            index = get_status_index(processes)
+            # Cópia: apply_process_changes atualiza o índice durante a migração
+            candidates = {old: set(index.get(old, ())) for old in mapping}
+        archived_counts = archive_store.status_counts()
+        counts = {old: len(candidates[old]) + archived_counts.get(old, 0) for old in mapping}
+        if dry_run or not any(counts.values()):
+            return counts
+
+        if user is None:
+            user = st.session_state.get("user_name") or "Admin"
+
+        with track("status_migration.migrate_statuses"):
+            affected = set().union(*candidates.values())
+            now = datetime.now().strftime("%d/%m/%Y")
+            counts = dict.fromkeys(mapping, 0)
+            
+            def migrated_fields(process):
+                old = process.get("status") or ""
+                new = mapping[old]
+                counts[old] += 1
+                return {
+                    "status": new,
+                    "last_update": now,
+                    "events": process.get("events", []) + [{
+                        "id": str(uuid.uuid4()),
+                        "date": now,
+                        "description": f"Status alterado de '{old}' para '{new}' (migração de status)",
+                        "user": user,
+                        "client_hidden": True,
+                    }],
+                }
+            
+            # Arquivados primeiro: apenas os arquivos com processos nesses status são
+            # regravados. Se falharem, a exceção interrompe a migração antes de data.json
+            def migrate_archived(process):
+                if (process.get("status") or "") not in mapping:
+                    return False
+                process.update(migrated_fields(process))
+                process["revision"] = process.get("revision", 0) + 1
+                return True
+            
+            if any(archived_counts.get(old) for old in mapping):
+                archive_store.update_processes(migrate_archived, statuses=mapping)
+            
+            # Ativos por último (data.json), com uma única gravação.
+            # O índice é apenas a lista de candidatos: o status atual é conferido
+            updates = {process["id"]: migrated_fields(process) for process in processes
+                       if process["id"] in affected and (process.get("status") or "") in mapping}
+            apply_process_changes(updates, source=SOURCE)
+
+    logger.info("Status migrados", extra={"fields": {"mapping": mapping, "counts": counts}})
+    return counts
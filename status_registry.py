@@ -0,0 +1,204 @@
+"""
+Registro único dos status de processo.
+
+Reúne em um só lugar o que antes estava espalhado: a lista de status configurada em
+status_config.json (por tipo de processo), a cor de cada status na interface e a
+paleta dos relatórios HTML exportados.
+
+O registro é montado uma única vez e descartado por invalidate(), chamado por
+components.settings.save_status_config. Para colorir uma coluna inteira de uma vez,
+use map_colors/style_column, que fazem um único mapeamento categórico em vez de uma
+chamada de função por célula.
+
+Uso:
+    from status_registry import get_registry
+    registry = get_registry()
+    registry.color("Em andamento")
+    df.style.apply(registry.style_column, subset=["status"])
+"""
+import os
+import json
+import threading
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Arquivo com os status personalizados
+STATUS_FILE = "status_config.json"
+
+# Cor dos status sem cor definida
+DEFAULT_COLOR = "orange"
+
+# Cores conhecidas (a configuração pode definir outras com o campo "color")
+STATUS_COLORS = {
+    # Status básicos
+    "Em andamento": "orange",
+    "Concluído": "green",
+    "Atrasado": "red",
+    "Pendente": "blue",
+    "Cancelado": "gray",
+
+    # Status de importação adicionais
+    "Novo Processo": "#6a0dad",  # Roxo
+    "Navio em Santos": "#4169e1",  # Azul royal
+    "Chegando no porto de Santos": "#2e8b57",  # Verde mar
+    "Chegada do navio alterada": "#ff4500",  # Laranja avermelhado
+    "Trânsito Aduaneiro": "#8b4513",  # Marrom
+    "Em rota de trânsito aduaneiro": "#8b4513",  # Marrom
+    "Presença de carga em Bauru": "#20b2aa",  # Verde azulado
+    "Entrega programada": "#228b22",  # Verde floresta
+}
+
+# Paleta dos relatórios HTML exportados (new_html_generator e simple_html_export)
+REPORT_DEFAULT_COLOR = "#6c757d"  # Cinza
+REPORT_COLORS = {
+    "Novo Processo": "#17a2b8",  # Ciano
+    "Pendente": "#ffc107",       # Amarelo
+    "Liberado": "#28a745",       # Verde
+    "Em andamento": "#007bff",   # Azul
+    "Atrasado": "#dc3545",       # Vermelho
+    "BL liberado": "#28a745",    # Verde
+    "Chegada do navio alterada": "#ffc107",  # Amarelo
+    "Aguardando documentos": "#ffc107",     # Amarelo
+    "Aguardando chegada": "#17a2b8",        # Ciano
+    "Em desembaraço": "#007bff",            # Azul
+    "Nacionalizado": "#28a745",             # Verde
+    "Concluído": "#6c757d",                # Cinza
+}
+
+# Configuração padrão (quando status_config.json não existe)
+DEFAULT_STATUS_CONFIG = [
+    {"name": "Novo Processo", "process_types": ["importacao", "exportacao"]},
+    {"name": "Em andamento", "process_types": ["importacao", "exportacao"]},
+    {"name": "Pendente", "process_types": ["importacao", "exportacao"]},
+    {"name": "Concluído", "process_types": ["importacao", "exportacao"]},
+    {"name": "Navio em Santos", "process_types": ["importacao"]},
+    {"name": "Booking confirmado", "process_types": ["exportacao"]},
+]
+
+# Estilo das células de status nas tabelas (a cor de fundo é acrescentada por status)
+CELL_STYLE = ("color: white; border-radius: 50px; padding: 0.3rem 0.9rem; text-align: center; "
+              "font-weight: 500; width: 90%; margin: auto; "
+              "box-shadow: 0 1px 3px rgba(0,0,0,0.12), 0 1px 2px rgba(0,0,0,0.24);")
+
+_registry = None
+_lock = threading.Lock()
+
+
+def load_status_items():
+    """
+    Lê os status configurados em status_config.json.
+
+    Returns:
+        list: Itens {"name", "process_types"[, "color"]} na ordem configurada
+    """
+    if not os.path.exists(STATUS_FILE):
+        return [dict(item) for item in DEFAULT_STATUS_CONFIG]
+
+    with open(STATUS_FILE, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    # Formato antigo: apenas a lista de nomes, disponível para os dois tipos
+    if "status_list" in config and isinstance(config["status_list"], list) and "status_config" not in config:
+        return [{"name": status, "process_types": ["importacao", "exportacao"]}
+                for status in config["status_list"]]
+
+    if "status_config" not in config:
+        return [dict(item) for item in DEFAULT_STATUS_CONFIG]
+
+    return config["status_config"]
+
+
+class StatusRegistry:
+    """Status configurados e os mapas status -> cor e estilo da célula"""
+
+    def __init__(self, items):
+        self.items = items
+
+        # Status configurados primeiro, depois os demais com cor conhecida
+        names = []
+        for item in items:
+            if item.get("name") and item["name"] not in names:
+                names.append(item["name"])
+        names.extend(name for name in STATUS_COLORS if name not in names)
+        self.names = names
+
+        configured_colors = {item["name"]: item["color"] for item in items
+                             if item.get("name") and item.get("color")}
+        self.colors = {name: configured_colors.get(name) or STATUS_COLORS.get(name, DEFAULT_COLOR)
+                       for name in names}
+        self.cell_styles = {name: f"background-color: {color}; {CELL_STYLE}"
+                            for name, color in self.colors.items()}
+
+        self.by_type = {"importacao": [], "exportacao": []}
+        for item in items:
+            for process_type in item.get("process_types", []):
+                if process_type in self.by_type and item.get("name"):
+                    self.by_type[process_type].append(item["name"])
+
+    def options(self, process_type=None):
+        """Nomes dos status disponíveis para o tipo de processo (ou todos os configurados)"""
+        if process_type is None:
+            return [item["name"] for item in self.items if item.get("name")]
+        return list(self.by_type.get(process_type, []))
+
+    def color(self, status):
+        return self.colors.get(status, DEFAULT_COLOR)
+
+    def report_color(self, status):
+        return REPORT_COLORS.get(status, REPORT_DEFAULT_COLOR)
+
+    def map_colors(self, statuses, report=False):
+        """
+        Cor de cada status de uma coluna (pandas.Series), em um único mapeamento.
+
+        Args:
+            statuses: Coluna de status
+            report: True para usar a paleta dos relatórios HTML
+        """
+        if report:
+            return statuses.map(REPORT_COLORS).fillna(REPORT_DEFAULT_COLOR)
+        return statuses.map(self.colors).fillna(DEFAULT_COLOR)
+
+    def status_column(self, df):
+        """Coluna de status de um DataFrame (vazia quando o DataFrame não tem a coluna)"""
+        if "status" in df.columns:
+            return df["status"]
+        import pandas as pd
+
+        return pd.Series("", index=df.index, dtype=object)
+
+    def style_column(self, statuses):
+        """
+        Estilos CSS das células de uma coluna de status, para Styler.apply.
+
+        Células vazias ficam sem estilo.
+        """
+        default_style = f"background-color: {DEFAULT_COLOR}; {CELL_STYLE}"
+        styles = statuses.map(self.cell_styles).fillna(default_style)
+        return styles.where(statuses.fillna("").astype(bool), "")
+
+
+def get_registry():
+    """Retorna o registro de status, montando-o na primeira chamada"""
+    global _registry
+    registry = _registry
+    if registry is None:
+        with _lock:
+            if _registry is None:
+                try:
+                    items = load_status_items()
+                except Exception as e:
+                    logger.error(f"Erro ao carregar status: {e}")
+                    items = [dict(item) for item in DEFAULT_STATUS_CONFIG]
+                _registry = StatusRegistry(items)
+            registry = _registry
+    return registry
+
+
+def invalidate():
+    """Descarta o registro (a configuração de status foi alterada)"""
+    global _registry
+    with _lock:
+        _registry = None
@@ -0,0 +1,160 @@
+"""
+Testes do envio da caixa de saída (notifications.process_outbox) com o FakeTransport e um relógio controlado
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import notifications
+
+
+class FakeClock:
+    """Substitui o módulo time em notifications: sleep() apenas avança o relógio"""
+
+    def __init__(self, start=1000.0):
+        self.now = start
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ReconnectFailingTransport(notifications.FakeTransport):
+    """Falha no primeiro envio e não consegue reabrir a conexão"""
+
+    def open(self):
+        self.opened += 1
+        if self.opened > 1:
+            raise ConnectionError("Servidor indisponível")
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    """Caixa de saída em um diretório temporário, sem a thread de envio"""
+    fake_clock = FakeClock()
+    monkeypatch.setattr(notifications, "OUTBOX_FILE", str(tmp_path / "outbox.json"))
+    monkeypatch.setattr(notifications, "time", fake_clock)
+    monkeypatch.setattr(notifications, "ensure_worker", lambda: None)
+    monkeypatch.setattr(notifications, "_transports", dict(notifications._transports))
+    return fake_clock
+
+
+def use_transport(transport):
+    notifications.set_transport(transport.channel, transport)
+    return transport
+
+
+def get_message(message_id):
+    for message in notifications.load_outbox()["messages"]:
+        if message["id"] == message_id:
+            return message
+    return None
+
+
+def test_failed_message_is_retried_with_exponential_backoff(clock):
+    transport = use_transport(notifications.FakeTransport("email", fail_times=2))
+    message_id = notifications.enqueue_email("cliente@example.com", "Assunto", "Mensagem")
+
+    assert notifications.process_outbox(now=clock.now) == 0
+    message = get_message(message_id)
+    assert message["attempts"] == 1
+    assert message["next_attempt"] == clock.now + notifications.RETRY_BASE_SECONDS
+    first_retry = message["next_attempt"]
+
+    # Antes do vencimento a mensagem não é enviada
+    assert notifications.process_outbox(now=first_retry - 1) == 0
+    assert get_message(message_id)["attempts"] == 1
+
+    assert notifications.process_outbox(now=first_retry) == 0
+    message = get_message(message_id)
+    assert message["attempts"] == 2
+    assert message["next_attempt"] == first_retry + 2 * notifications.RETRY_BASE_SECONDS
+
+    assert notifications.process_outbox(now=message["next_attempt"]) == 1
+    message = get_message(message_id)
+    assert message["status"] == notifications.STATUS_SENT
+    assert message["attempts"] == 3
+    assert message["last_error"] is None
+    assert len(transport.sent) == 1
+
+
+def test_message_fails_after_max_attempts(clock):
+    transport = use_transport(notifications.FakeTransport("sms", fail_times=notifications.MAX_ATTEMPTS + 1))
+    message_id = notifications.enqueue_sms("+5511999999999", "Mensagem")
+
+    now = clock.now
+    for attempt in range(1, notifications.MAX_ATTEMPTS + 1):
+        assert notifications.process_outbox(now=now) == 0
+        message = get_message(message_id)
+        assert message["attempts"] == attempt
+        now = message["next_attempt"]
+
+    assert message["status"] == notifications.STATUS_FAILED
+    assert message["last_error"] == "Falha simulada de envio"
+
+    # Mensagens com falha definitiva não são mais tentadas
+    remaining_failures = transport.fail_times
+    assert notifications.process_outbox(now=now + 10 ** 6) == 0
+    assert transport.fail_times == remaining_failures
+    assert notifications.get_outbox_summary()[notifications.STATUS_FAILED] == 1
+
+
+def test_batches_respect_batch_size_and_rate_limit(clock):
+    transport = use_transport(notifications.FakeTransport("email"))
+    total = notifications.BATCH_SIZE + 5
+    notifications.enqueue_many([
+        {"channel": "email", "to": f"cliente{i}@example.com", "subject": "Aviso", "body": f"Mensagem {i}"}
+        for i in range(total)
+    ])
+
+    assert notifications.process_outbox(now=clock.now) == notifications.BATCH_SIZE
+    # Uma única conexão por lote, com os envios espaçados pelo limite por segundo
+    assert transport.opened == 1
+    interval = 1.0 / notifications.RATE_LIMIT_PER_SECOND
+    assert len(clock.sleeps) == notifications.BATCH_SIZE - 1
+    assert all(seconds == pytest.approx(interval) for seconds in clock.sleeps)
+
+    assert notifications.process_outbox(now=clock.now) == 5
+    assert transport.opened == 2
+    assert len(transport.sent) == total
+    assert notifications.get_outbox_summary()[notifications.STATUS_SENT] == total
+
+
+def test_transport_is_reopened_after_send_error(clock):
+    transport = use_transport(notifications.FakeTransport("email", fail_times=1))
+    ids = notifications.enqueue_many([
+        {"channel": "email", "to": f"cliente{i}@example.com", "body": f"Mensagem {i}"}
+        for i in range(3)
+    ])
+
+    assert notifications.process_outbox(now=clock.now) == 2
+    assert transport.opened == 2
+    assert get_message(ids[0])["status"] == notifications.STATUS_PENDING
+    assert get_message(ids[0])["last_error"] == "Falha simulada de envio"
+    assert [m["id"] for m in transport.sent] == ids[1:]
+
+
+def test_remaining_messages_are_retried_when_reconnect_fails(clock):
+    transport = use_transport(ReconnectFailingTransport("email", fail_times=1))
+    ids = notifications.enqueue_many([
+        {"channel": "email", "to": f"cliente{i}@example.com", "body": f"Mensagem {i}"}
+        for i in range(3)
+    ])
+
+    assert notifications.process_outbox(now=clock.now) == 0
+    assert transport.sent == []
+    for message_id in ids[1:]:
+        message = get_message(message_id)
+        assert message["status"] == notifications.STATUS_PENDING
+        assert message["attempts"] == 1
+        assert message["last_error"] == "Servidor indisponível"
@@ -0,0 +1,52 @@
+"""
+Testes da leitura do Google Sheets com o transporte em memória (sheets_client.FakeSheetsTransport)
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sheets_client
+import sheets_data
+
+# Chamadas que leem valores das abas
+READ_REQUESTS = {"values_batch_get", "get_all_values", "get_all_records", "row_values", "find"}
+
+
+@pytest.fixture
+def fake_client():
+    """Planilha em memória já inicializada (abas e valores padrão criados)"""
+    transport = sheets_client.FakeSheetsTransport()
+    sheets_client.set_transport(transport)
+    sheets_data.clear_sheets_cache()
+    sheets_data.load_from_sheets()
+    yield transport.client
+    sheets_client.set_transport(sheets_client.GspreadTransport())
+    sheets_data.clear_sheets_cache()
+
+
+def test_load_from_sheets_reads_all_tabs_in_one_request(fake_client):
+    fake_client.requests.clear()
+
+    data = sheets_data.load_from_sheets()
+
+    reads = [request for request in fake_client.requests if request in READ_REQUESTS]
+    assert reads == ["values_batch_get"]
+    assert "worksheets" not in fake_client.requests
+    assert "worksheet" not in fake_client.requests
+    assert data["users"]["admin"]["role"] == "admin"
+    assert data["config"]["storage_days_per_period"] == 15
+
+
+def test_sync_timestamp_follows_rewritten_config_tab(fake_client):
+    data = sheets_data.load_from_sheets()
+    # A aba é regravada sem o last_sync (ex: configurações vindas do data.json local)
+    data["config"] = {"storage_days_per_period": 15, "alert_days": 3}
+    sheets_data.save_to_sheets(data)
+
+    spreadsheet = sheets_data.get_spreadsheet()
+    config_sheet = sheets_data.get_worksheet(spreadsheet, sheets_data.CONFIG_SHEET_NAME)
+    keys = [row[0] for row in config_sheet.values]
+    assert keys == ["key", "storage_days_per_period", "alert_days", "last_sync"]
@@ -2,17 +2,26 @@ import pandas as pd
 import streamlit as st
 from datetime import datetime
 import io
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import os
+from profiling import track
+from log_config import get_logger
+from status_registry import get_registry
 
-# Importação condicional do Twilio para evitar erros de dependência
-try:
-    from twilio.rest import Client
-    TWILIO_AVAILABLE = True
-except ImportError:
-    TWILIO_AVAILABLE = False
+logger = get_logger(__name__)
+
+# O cliente do Twilio é importado apenas quando um SMS é enviado
+_twilio_client_class = None
+
+def get_twilio_client_class():
+    """Importa o cliente do Twilio sob demanda (None se não estiver instalado)"""
+    global _twilio_client_class
+    if _twilio_client_class is None:
+        try:
+            from twilio.rest import Client
+            _twilio_client_class = Client
+        except ImportError:
+            _twilio_client_class = False
+    return _twilio_client_class or None
 
 def format_date(date_str):
     """Format date string to DD/MM/YYYY"""
@@ -128,7 +137,7 @@ def check_period_expiry(process):
         # Se não passou, não precisamos atualizar
         return False, None, None
     except Exception as e:
-        print(f"Erro ao verificar vencimento do período: {e}")
+        logger.error(f"Erro ao verificar vencimento do período: {e}")
         return False, None, None
 
 def update_period_dates(process):
@@ -156,7 +165,7 @@ def update_period_dates(process):
             from data import add_event
             add_event(process["id"], event_description)
         except Exception as e:
-            print(f"Erro ao adicionar evento de atualização de período: {e}")
+            logger.error(f"Erro ao adicionar evento de atualização de período: {e}")
         
         return True
     
@@ -164,38 +173,63 @@ def update_period_dates(process):
 
 def get_status_color(status):
     """Get color for status indicator"""
-    status_colors = {
-        # Status básicos
-        "Em andamento": "orange",
-        "Concluído": "green",
-        "Atrasado": "red",
-        "Pendente": "blue",
-        "Cancelado": "gray",
-        
-        # Status de importação adicionais
-        "Novo Processo": "#6a0dad",  # Roxo
-        "Navio em Santos": "#4169e1",  # Azul royal
-        "Chegando no porto de Santos": "#2e8b57",  # Verde mar
-        "Chegada do navio alterada": "#ff4500",  # Laranja avermelhado
-        "Trânsito Aduaneiro": "#8b4513",  # Marrom
-        "Em rota de trânsito aduaneiro": "#8b4513",  # Marrom
-        "Presença de carga em Bauru": "#20b2aa",  # Verde azulado
-        "Entrega programada": "#228b22"  # Verde floresta
-    }
-    return status_colors.get(status, "orange")
+    return get_registry().color(status)
+
+# Quantidade de linhas processadas por vez nas exportações
+EXPORT_CHUNK_SIZE = 5000
 
-def export_to_excel(df):
-    """Export dataframe to Excel"""
-    output = io.BytesIO()
+def export_to_excel(df, constant_memory=True):
+    """Export dataframe to Excel
     
-    # This avoids the LSP error by explicitly specifying the engine
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
+    Args:
+        df: DataFrame a ser exportado
+        constant_memory: Se True, usa o modo de memória constante do xlsxwriter,
+            que grava cada linha no disco assim que ela é concluída
+    
+    Returns:
+        io.BytesIO: Arquivo gerado, posicionado no início (aceito por st.download_button
+            sem uma segunda cópia do conteúdo)
+    """
+    with track("utils.export_to_excel") as span:
+        output = io.BytesIO()
+        write_excel(df, output, constant_memory=constant_memory)
+        span.bytes = output.tell()
+        output.seek(0)
+    return output
+
+def _excel_value(value):
+    """Converte um valor do DataFrame para um tipo aceito pelo xlsxwriter"""
+    if value is None:
+        return ""
+    if isinstance(value, (str, int, bool)):
+        return value
+    if isinstance(value, float):
+        return "" if pd.isna(value) else value
+    if isinstance(value, (list, dict)):
+        return str(value)
+    try:
+        if pd.isna(value):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+def write_excel(df, target, constant_memory=True):
+    """Write a dataframe to an Excel workbook row by row
     
-    df.to_excel(writer, index=False, sheet_name='Processos')
+    Args:
+        df: DataFrame a ser exportado
+        target: Caminho ou objeto de arquivo de destino
+        constant_memory: Se True, as linhas não ficam em memória após gravadas
+    """
+    import xlsxwriter
     
-    # Get the xlsxwriter workbook and worksheet objects
-    workbook = writer.book
-    worksheet = writer.sheets['Processos']
+    workbook = xlsxwriter.Workbook(target, {
+        'constant_memory': constant_memory,
+        'in_memory': not constant_memory,
+        'strings_to_urls': False
+    })
+    worksheet = workbook.add_worksheet('Processos')
     
     # Add some formatting
     header_format = workbook.add_format({
@@ -206,20 +240,77 @@ def export_to_excel(df):
         'border': 1
     })
     
-    # Write the column headers with the defined format
-    for col_num, value in enumerate(df.columns.values):
-        worksheet.write(0, col_num, value, header_format)
-        
     # Set column widths
-    for i, col in enumerate(df.columns):
-        worksheet.set_column(i, i, 15)
+    if len(df.columns):
+        worksheet.set_column(0, len(df.columns) - 1, 15)
+    
+    # Write the column headers with the defined format (apenas uma vez)
+    worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
     
-    writer.close()
-    return output.getvalue()
+    # Gravar as linhas em ordem, como exigido pelo modo de memória constante
+    for row_num, row in enumerate(df.itertuples(index=False, name=None), start=1):
+        worksheet.write_row(row_num, 0, [_excel_value(value) for value in row])
+    
+    workbook.close()
 
-def export_to_csv(df):
-    """Export dataframe to CSV"""
-    return df.to_csv(index=False).encode('utf-8')
+def iter_csv_chunks(df, chunk_size=EXPORT_CHUNK_SIZE):
+    """Generate the CSV export in encoded chunks
+    
+    Args:
+        df: DataFrame a ser exportado
+        chunk_size: Número de linhas por bloco
+        
+    Yields:
+        bytes: Blocos do arquivo CSV (o primeiro inclui o cabeçalho)
+    """
+    for start in range(0, max(len(df), 1), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        yield chunk.to_csv(index=False, header=(start == 0)).encode('utf-8')
+
+def export_to_csv(df, chunk_size=EXPORT_CHUNK_SIZE):
+    """Export dataframe to CSV
+    
+    Os blocos de iter_csv_chunks são gravados um a um no arquivo de saída, que é
+    retornado sem ser copiado.
+    
+    Returns:
+        io.BytesIO: Arquivo gerado, posicionado no início (aceito por st.download_button)
+    """
+    with track("utils.export_to_csv") as span:
+        output = io.BytesIO()
+        for chunk in iter_csv_chunks(df, chunk_size):
+            output.write(chunk)
+        span.bytes = output.tell()
+        output.seek(0)
+    return output
+
+def lazy_download_button(label, build_data, file_name, mime, key):
+    """Display a download button whose file is only generated on demand
+    
+    O arquivo não é gerado a cada execução da página: primeiro o usuário clica em
+    um botão para prepará-lo e só então a função de exportação é chamada. Em seguida
+    aparece o botão de download, com o texto "⬇️ Baixar <file_name>".
+    
+    Args:
+        label: Texto do botão que gera o arquivo
+        build_data: Função sem argumentos que gera o conteúdo do arquivo (bytes, str
+            ou arquivo em memória)
+        file_name: Nome do arquivo baixado
+        mime: Tipo MIME do arquivo
+        key: Chave única dos botões na página
+    """
+    if st.button(label, key=f"prepare_{key}", use_container_width=True):
+        with st.spinner("Gerando arquivo..."):
+            data = build_data()
+        st.download_button(
+            label=f"⬇️ Baixar {file_name}",
+            data=data,
+            file_name=file_name,
+            mime=mime,
+            key=f"download_{key}",
+            on_click="ignore",
+            use_container_width=True
+        )
 
 def get_status_from_dates(date_str, expected_date_str):
     """Determine status based on dates"""
@@ -244,6 +335,10 @@ def send_email(to_email, subject, message):
     """Send an email using SMTP"""
     # Note: For this to work, you need to set SMTP configuration
     # For Gmail, you might need an app-specific password
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
     try:
         # Try to get configurations from session state or environment variables
         smtp_server = st.session_state.get('smtp_server', os.environ.get('SMTP_SERVER', ''))
@@ -278,7 +373,8 @@ def send_email(to_email, subject, message):
 
 def send_sms(to_phone, message):
     """Send SMS via Twilio"""
-    if not TWILIO_AVAILABLE:
+    Client = get_twilio_client_class()
+    if Client is None:
         st.warning("Twilio não está disponível. A funcionalidade de SMS está desativada.")
         return False
         
@@ -0,0 +1,122 @@
+"""
+Modelo de exibição (view model) do detalhamento de processos.
+
+Reúne tudo o que as páginas de detalhe, a visão do cliente e a exportação HTML de um
+processo calculam a partir do dicionário bruto: rótulos por tipo de processo, cor do
+status, datas formatadas e o histórico de eventos já ordenado e filtrado.
+
+O modelo é memorizado por (ID do processo, revisão do processo). A revisão é
+incrementada por data.py a cada alteração, então após a primeira visita a navegação
+para o detalhe custa apenas uma consulta ao cache.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from utils import format_date, get_status_color
+from data import is_client_hidden_event
+
+# Campos exibidos como data (DD/MM/YYYY)
+DATE_FIELDS = (
+    "eta", "arrival_date", "free_time_expiry", "empty_return", "port_entry_date",
+    "current_period_start", "current_period_expiry", "return_date", "last_update",
+    "deadline", "due_date", "knowledge_date", "endorsement_date", "cargo_deadline",
+    "deadline_draft", "shipping_date", "arrival_forecast", "client_delivery_date",
+    "originals_sent_date",
+)
+
+# Quantidade máxima de modelos mantidos em memória
+MAX_CACHED_VIEW_MODELS = 512
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _event_sort_key(item):
+    """Chave de ordenação de um evento: data convertida e posição original"""
+    index, event = item
+    try:
+        date = datetime.strptime(str(event.get("date", "")).strip(), "%d/%m/%Y")
+    except ValueError:
+        date = datetime.min
+    # Eventos do mesmo dia mantêm a ordem em que foram registrados
+    return (date, index)
+
+
+def build_detail_view_model(process):
+    """
+    Monta o modelo de exibição de um processo.
+
+    Args:
+        process: Dicionário do processo
+
+    Returns:
+        dict: Modelo com os valores formatados, rótulos e eventos
+    """
+    is_export = process.get("type", "importacao") == "exportacao"
+    status = process.get("status") or ""
+
+    # Valores prontos para exibição (datas já formatadas)
+    values = {}
+    for field, value in process.items():
+        if field == "events":
+            continue
+        values[field] = format_date(value) if field in DATE_FIELDS else value
+
+    # Eventos na ordem em que foram registrados, com a posição original
+    indexed_events = list(enumerate(process.get("events", [])))
+    timeline = sorted(indexed_events, key=_event_sort_key, reverse=True)
+
+    return {
+        "id": process.get("id", ""),
+        "revision": process.get("revision", 0),
+        "is_export": is_export,
+        "type_label": "Exportação" if is_export else "Importação",
+        "status": status,
+        "status_color": get_status_color(status),
+        "values": values,
+        # Eventos (posição, evento) do mais recente para o mais antigo
+        "timeline": timeline,
+        "client_timeline": [item for item in timeline if not is_client_hidden_event(item[1])],
+        # Eventos visíveis ao cliente na ordem de registro (exportação HTML)
+        "client_events": [event for _, event in indexed_events if not is_client_hidden_event(event)],
+    }
+
+
+def get_detail_view_model(process):
+    """
+    Obtém o modelo de exibição de um processo, usando o cache quando o processo
+    não mudou desde a última chamada.
+
+    Args:
+        process: Dicionário do processo
+
+    Returns:
+        dict: Modelo de exibição (não deve ser alterado por quem o recebe)
+    """
+    key = (process.get("id"), process.get("revision", 0))
+    today = datetime.now().date()
+
+    with _lock:
+        entry = _cache.get(key)
+        # O mesmo objeto garante que os dados não foram substituídos (ex: sincronização
+        # com o Sheets ou restauração de backup) sem passar pelas funções de data.py
+        if entry is not None and entry["process"] is process and entry["day"] == today:
+            _cache.move_to_end(key)
+            return entry["view_model"]
+
+    view_model = build_detail_view_model(process)
+
+    with _lock:
+        _cache[key] = {"process": process, "day": today, "view_model": view_model}
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_VIEW_MODELS:
+            _cache.popitem(last=False)
+
+    return view_model
+
+
+def clear_view_models():
+    """Descarta todos os modelos em cache"""
+    with _lock:
+        _cache.clear()